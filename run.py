@@ -1,3 +1,4 @@
+import argparse
 import os
 import threading
 # import webbrowser
@@ -9,8 +10,21 @@ from src import server_utils
 #     webbrowser.open_new("http://127.0.0.1:5000/")
 
 if __name__ == '__main__':
-    app = create_app()
+    parser = argparse.ArgumentParser(description='Production scheduling dashboard')
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('SCHEDULER_WORKERS', 0)),
+                        help='Serve with a solving supervisor and N API worker processes (0: development server)')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--snapshot-dir', default=os.environ.get('SCHEDULER_SNAPSHOT_DIR'),
+                        help='Directory for the result snapshots shared with the workers')
+    args = parser.parse_args()
+
     if os.environ.get('WERKZEUG_RUN_MAIN') != 'true':
-        server_utils.check_and_kill_port(5000)
+        server_utils.check_and_kill_port(args.port)
         # threading.Timer(1.25, open_browser).start()
-    app.run(debug=True, host='0.0.0.0', port=5000, use_reloader=False)
+
+    if args.workers > 0 and os.name != 'nt':
+        from src import serving
+        serving.serve(host='0.0.0.0', port=args.port, workers=args.workers, snapshot_dir=args.snapshot_dir)
+    else:
+        app = create_app()
+        app.run(debug=True, host='0.0.0.0', port=args.port, use_reloader=False)
@@ -2,23 +2,48 @@
 # Compatible with corrected ProductionScheduler with product-task instances
 # OPTIMIZED: Limits dashboard data to top 1000 tasks for performance
 
-from flask import Flask, render_template, jsonify, request, send_file
+from flask import Flask, jsonify, request
 from flask_cors import CORS
-import pandas as pd
-import json
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
-from collections import defaultdict
-import traceback
-import re
+import threading
+import queue
+import sqlite3
+import time
 from src.server_utils import export_scenario_with_capacities
+from src.job_runner import JobRunner
+from src.solver_pool import SolverPool
+from src.result_store import ResultStore, file_hash
+from src.payload_codec import EncodedBodyCache
+from src.json_provider import FastJSONProvider
+from src.scenario_history import ScenarioHistory
+from src.event_bus import events
+from src.scheduler.solver_governor import governor
 
 # Import the corrected scheduler
 from src.scheduler.main import ProductionScheduler
+from src.scheduler import scenario_runner, utils, data_refresh
+from src.scheduler.solve_cache import SolveCache
 
-def create_app():
-    """Create and configure an instance of the Flask application."""
+DATA_FILE = 'scheduling_data.csv'
+LATE_PART_DELAY_DAYS = 1.0
+# Versions of each stored scenario kept when the store is opened
+KEEP_RESULT_VERSIONS = 5
+
+def announce_solve_started(grant):
+    """Governor listener: a solve got its search threads and starts."""
+    events.publish('solve.started', name=grant.name, threads=grant.threads, requested=grant.requested)
+
+
+def create_app(mode='standalone', snapshot_dir=None, supervisor_url=None):
+    """
+    Create and configure an instance of the Flask application.
+    mode is 'standalone' (load and solve in this process), 'supervisor' (the same, and publish
+    result snapshots to snapshot_dir) or 'worker' (serve the snapshots read-only and forward
+    writes to supervisor_url); see src/serving.py.
+    """
     app = Flask(__name__, template_folder='../templates', static_folder='../static')
+    app.json = FastJSONProvider(app)
     CORS(app)
     app.config['JSON_AS_ASCII'] = False
 
@@ -31,8 +56,30 @@ def create_app():
     with app.app_context():
         app.scheduler = None
         app.scenario_results = {}
+        app.scenario_schedules = {}
         app.saved_scenarios = {}
         app.mechanic_assignments = {}
+        app.scenario_results_lock = threading.Lock()
+        # One lock per scenario, held by a repair from reading the result to publishing it
+        app.repair_locks = {}
+        app.scenario_solves = {}
+        app.result_store = None
+        app.restored_scenarios = set()
+        app.scenario_progress = None
+        # Sorted task indexes of the published results, built on first query
+        app.task_indexes = {}
+        # Serialized (and compressed) scenario bodies, rebuilt when a result is republished
+        app.encoded_bodies = EncodedBodyCache()
+        # Recently served versions of each scenario, for delta updates
+        app.scenario_history = ScenarioHistory()
+        app.data_path = utils.resource_path(DATA_FILE)
+        app.data_hash = None
+        app.last_refresh = None
+        app.jobs = JobRunner()
+        # On-demand solves (what-if) are queued here, bounded by the machine's cores
+        app.solver_pool = SolverPool()
+        # Background job that produces each scenario's final result
+        app.scenario_jobs = {'baseline': 'baseline', 'scenario1': 'scenario1', 'scenario3': 'scenario3'}
 
 
 
@@ -41,77 +88,338 @@ def create_app():
     from src.blueprints.assignments import assignments_bp
     from src.blueprints.supply_chain import supply_chain_bp
     from src.blueprints.industrial_engineering import ie_bp
+    from src.blueprints.health import health_bp
+    from src.blueprints.results import results_bp
+    from src.blueprints.refresh import refresh_bp
+    from src.blueprints.events import events_bp
 
-    def initialize_scheduler_with_context():
-        """Initialize the scheduler within the application context."""
-        with app.app_context():
-            try:
-                print("=" * 80)
-                print("Initializing Production Scheduler Dashboard")
-                print("=" * 80)
+    def load_scheduler(app):
+        """Load the scheduling data; the scheduler is only visible to requests once it is complete."""
+        print("=" * 80)
+        print("Initializing Production Scheduler Dashboard")
+        print("=" * 80)
+
+        scheduler = ProductionScheduler(DATA_FILE, debug=False, late_part_delay_days=LATE_PART_DELAY_DAYS)
+        scheduler.load_data_from_csv(use_snapshot=True)
+        # Shared with the solver processes through the scheduler snapshot
+        scheduler.solve_cache = SolveCache(os.environ.get(
+            'SCHEDULER_SOLVE_CACHE', os.path.join(os.path.dirname(scheduler.csv_file_path), 'solve_cache.sqlite3')))
+        app.scheduler = scheduler
+
+        print("\nScheduler loaded successfully!")
+        print(f"Total task instances: {len(scheduler.tasks)}")
+
+    def publish_scenario_result(app, scenario_id, result, schedule=None):
+        """
+        Swap in one scenario result atomically; readers see the old or the new result, never a mix.
+        The raw task_schedule behind it is kept for schedule repair.
+        """
+        with app.scenario_results_lock:
+            app.scenario_results = {**app.scenario_results, scenario_id: result}
+            if schedule is not None:
+                app.scenario_schedules = {**app.scenario_schedules, scenario_id: schedule}
+        announce_published(app, scenario_id)
 
-                scheduler = ProductionScheduler('scheduling_data.csv', debug=False, late_part_delay_days=1.0)
-                scheduler.load_data_from_csv()
-                app.scheduler = scheduler
+    def announce_published(app, scenario_id):
+        """Publish a scenario.published event with the version clients will now be served."""
+        result = app.scenario_results.get(scenario_id)
+        if result is None:
+            return
+        entry = app.scenario_history.current(scenario_id, result, app.scheduler)
+        events.publish('scenario.published', scenarioId=scenario_id, version=entry['version'],
+                       solverStatus=result.get('solverStatus'), objective=result.get('objective'),
+                       makespan=result.get('makespan'))
 
-                print("\nScheduler loaded successfully!")
-                print(f"Total task instances: {len(scheduler.tasks)}")
+    app.announce_published = lambda scenario_id: announce_published(app, scenario_id)
 
-                # Run scenarios
-                run_all_scenarios(app)
+    def restore_results(app):
+        """
+        Open the persistent result store and publish every stored scenario, saved what-if and
+        mechanic assignment computed from the current data file with the current solver.
+        Without a usable store everything is simply recomputed.
+        """
+        started = time.time()
+        app.data_hash = file_hash(app.data_path)
+        store_path = os.environ.get('SCHEDULER_RESULT_STORE',
+                                    os.path.join(os.path.dirname(app.data_path), 'scenario_results.sqlite3'))
+        try:
+            store = ResultStore(store_path, app.data_hash, scenario_runner.solver_profile())
+            store.prune(keep_versions=KEEP_RESULT_VERSIONS)
+        except (sqlite3.Error, OSError) as e:
+            print(f"[WARNING] Result store unavailable ({e}); all scenarios will be solved")
+            return
+        app.result_store = store
 
-            except Exception as e:
-                print(f"\n✗ ERROR during initialization: {str(e)}")
-                traceback.print_exc()
-                # Create minimal data so server can run
-                app.scenario_results = {'baseline': {'tasks': [], 'products': []}}
+        for scenario_id in scenario_runner.SCENARIOS:
+            stored = store.load('scenario', scenario_id, scenario_runner.scenario_params(scenario_id, LATE_PART_DELAY_DAYS))
+            if stored:
+                publish_scenario_result(app, scenario_id, stored['result'], stored['schedule'])
+                app.restored_scenarios.add(scenario_id)
+        app.saved_scenarios = {**store.load_all('what_if'), **app.saved_scenarios}
+        app.mechanic_assignments.update(store.load_all('assignments'))
 
+        print(f"[INFO] Result store {store_path}: restored {sorted(app.restored_scenarios) or 'no scenarios'}, "
+              f"{len(app.saved_scenarios)} saved what-ifs in {(time.time() - started) * 1000:.0f}ms")
 
-    def run_all_scenarios(app):
-        """Run all scheduling scenarios and store the results in the app context."""
+    def publish_heuristic(app):
+        """Publish the best priority-rule list schedule so the dashboard has data within seconds."""
         scheduler = app.scheduler
-        scenario_results = {}
+        missing = [s for s in ('baseline', 'scenario1') if s not in app.restored_scenarios]
 
+        if missing:
+            print("\n" + "-" * 40)
+            print("Publishing heuristic schedule...")
+
+            scheduler.generate_global_priority_list(allow_late_delivery=True, silent_mode=True, method='portfolio',
+                                                    improve_seconds=2.0)
+            heuristic_schedule = dict(scheduler.task_schedule)
+            heuristic_result = export_scenario_with_capacities(scheduler, 'baseline')
+            heuristic_result['solverStatus'] = 'HEURISTIC'
+            heuristic_result['objective'] = scheduler.calculate_total_lateness_minutes()
+            # Scenario 1 uses the same CSV headcount, so the heuristic is a valid first answer there too
+            for scenario_id in missing:
+                publish_scenario_result(app, scenario_id, {**heuristic_result, 'scenarioId': scenario_id},
+                                        heuristic_schedule)
+            print(f"✓ Heuristic published for {', '.join(missing)}: {heuristic_result['makespan']} days makespan")
+
+        if 'baseline' in app.restored_scenarios:
+            # The shared scheduler carries the baseline plan for the other dashboard views
+            scheduler.task_schedule = app.scenario_schedules['baseline']
+            scheduler.build_global_priority_list()
+
+    def start_scenario_solves(app):
+        """Snapshot the loaded problem and start every CP-SAT scenario solve not restored from the store."""
+        missing = [s for s in scenario_runner.SCENARIOS if s not in app.restored_scenarios]
+        if not missing:
+            print("[INFO] Every scenario was restored from the result store; nothing to solve.")
+            return
         print("\n" + "-" * 40)
-        print("Running ALL scenarios...")
-
-        # Baseline
-        scheduler.generate_global_priority_list(allow_late_delivery=True, silent_mode=True)
-        scenario_results['baseline'] = export_scenario_with_capacities(scheduler, 'baseline')
-        print(f"✓ Baseline complete: {scenario_results['baseline']['makespan']} days makespan")
-
-        # Scenario 1
-        result1 = scheduler.scenario_1_csv_headcount()
-        scenario_results['scenario1'] = export_scenario_with_capacities(scheduler, 'scenario1')
-        print(f"✓ Scenario 1 complete: {scenario_results['scenario1']['makespan']} days makespan")
-
-        # Scenario 3
-        result3 = scheduler.scenario_3_optimal_schedule()
-        if result3 and result3.get('status') == 'SUCCESS':
-            # The new scenario will directly modify the scheduler's state
-            scenario_results['scenario3'] = export_scenario_with_capacities(scheduler, 'scenario3')
-            print(f"✓ Scenario 3 complete: {scenario_results.get('scenario3', {}).get('makespan', 'N/A')} days makespan")
+        print(f"Refining {', '.join(missing)} with CP-SAT...")
+        hints = {'baseline': app.scenario_schedules['baseline']} if 'baseline' in missing else {}
+        app.scenario_solves, app.scenario_progress = scenario_runner.start_scenario_solves(
+            app.scheduler, missing, hint_schedules=hints)
+
+    def publish_solved_scenario(app, scenario_id, outcome):
+        """Export a finished scenario in this process, on a view of the scheduler carrying its result."""
+        view = scenario_runner.scenario_view(app.scheduler, outcome)
+        result = export_scenario_with_capacities(view, scenario_id)
+        result['solverStatus'] = 'SOLVED'
+        result['objective'] = outcome['objective']
+        publish_scenario_result(app, scenario_id, result, outcome['task_schedule'])
+        if app.result_store:
+            app.result_store.save('scenario', scenario_id, {'result': result, 'schedule': outcome['task_schedule']},
+                                  scenario_runner.scenario_params(scenario_id, LATE_PART_DELAY_DAYS))
+        return result
+
+    def refine_baseline(app):
+        """Wait for the baseline CP-SAT solve, warm-started from the heuristic, publishing each improvement."""
+        if 'baseline' in app.restored_scenarios:
+            app.jobs.report('baseline', 'restored from the result store')
+            return
+        scheduler = app.scheduler
+        future = app.scenario_solves['baseline']
+        best_objective = {'baseline': app.scenario_results['baseline']['objective']}
+
+        def publish_baseline_solution(schedule, objective):
+            # Early solutions can be worse than the heuristic already on screen
+            improving = objective < best_objective['baseline']
+            events.publish('solve.incumbent', scenarioId='baseline', objective=objective,
+                           bestObjective=min(objective, best_objective['baseline']), published=improving)
+            if not improving:
+                return
+            best_objective['baseline'] = objective
+            app.jobs.report('baseline', f'improving solution with objective {objective}')
+            view = scheduler.scenario_view(task_schedule=schedule)
+            view.build_global_priority_list()
+            result = export_scenario_with_capacities(view, 'baseline')
+            result['solverStatus'] = 'IMPROVING'
+            result['objective'] = objective
+            publish_scenario_result(app, 'baseline', result, schedule)
+
+        while True:
+            try:
+                _, schedule, objective = app.scenario_progress.get(timeout=0.5)
+            except queue.Empty:
+                if future.done() and future.exception() is not None:
+                    break
+                continue
+            if schedule is scenario_runner.PROGRESS_DONE:
+                break
+            publish_baseline_solution(schedule, objective)
+
+        outcome = future.result()
+        if outcome['status'] == 'SOLVED' and outcome['objective'] <= best_objective['baseline']:
+            baseline_result = publish_solved_scenario(app, 'baseline', outcome)
+            # The shared scheduler carries the baseline plan for the other dashboard views
+            scheduler.task_schedule = outcome['task_schedule']
+            scheduler.global_priority_list = outcome['global_priority_list']
+            print(f"✓ Baseline complete: {baseline_result['makespan']} days makespan")
+        else:
+            print("✗ Baseline solve did not beat the heuristic; keeping the heuristic schedule.")
+
+    def solve_scenario1(app):
+        if 'scenario1' in app.restored_scenarios:
+            app.jobs.report('scenario1', 'restored from the result store')
+            return
+        outcome = app.scenario_solves['scenario1'].result()
+        if outcome['status'] != 'SOLVED':
+            raise RuntimeError('Scenario 1 solver found no solution')
+        scenario1_result = publish_solved_scenario(app, 'scenario1', outcome)
+        print(f"✓ Scenario 1 complete: {scenario1_result['makespan']} days makespan "
+              f"({outcome['elapsed_seconds']}s on {outcome['num_workers']} search threads)")
+
+    def solve_scenario3(app):
+        if 'scenario3' in app.restored_scenarios:
+            app.jobs.report('scenario3', 'restored from the result store')
+            return
+        outcome = app.scenario_solves['scenario3'].result()
+        if outcome['status'] == 'SOLVED':
+            scenario3_result = publish_solved_scenario(app, 'scenario3', outcome)
+            print(f"✓ Scenario 3 complete: {scenario3_result.get('makespan', 'N/A')} days makespan "
+                  f"({outcome['elapsed_seconds']}s on {outcome['num_workers']} search threads)")
         else:
             print("✗ Scenario 3 failed to find a valid solution.")
             # Optionally, create a placeholder result for the UI
-            scenario_results['scenario3'] = {
+            publish_scenario_result(app, 'scenario3', {
                 'scenarioId': 'scenario3', 'status': 'FAILED', 'tasks': [], 'products': [],
                 'teamCapacities': {}, 'teamShifts': {}, 'utilization': {}, 'totalWorkforce': 0,
                 'makespan': 'N/A', 'onTimeRate': 0, 'maxLateness': 'N/A'
-            }
+            })
 
-        # Restore original capacities
-        for team, capacity in scheduler._original_team_capacity.items(): scheduler.team_capacity[team] = capacity
-        for team, capacity in scheduler._original_quality_capacity.items(): scheduler.quality_team_capacity[team] = capacity
+    def refresh_data(app):
+        """
+        Pick up a changed data file: parse it into a new scheduler, diff it against the current
+        one, re-solve only the scenarios the changes affect (warm-started from their current
+        schedules) and publish the new data and results together. Nothing is published if a
+        re-solve fails, so readers keep a consistent set of old results.
+        """
+        started = time.time()
+        new_hash = file_hash(app.data_path)
+        refresh = {'startedAt': datetime.now().isoformat(), 'previousHash': app.data_hash, 'inputHash': new_hash}
+        if new_hash == app.data_hash:
+            app.jobs.report('refresh', 'input unchanged')
+            app.last_refresh = {**refresh, 'changed': False, 'resolved': [], 'elapsedSeconds': 0}
+            return
 
-        app.scenario_results = scenario_results
-        print("\n" + "=" * 80)
-        print("All scenarios completed successfully!")
-        print("=" * 80)
+        app.jobs.report('refresh', 'parsing the new data')
+        current = app.scheduler
+        scheduler = ProductionScheduler(DATA_FILE, debug=False, late_part_delay_days=LATE_PART_DELAY_DAYS)
+        scheduler.load_data_from_csv(use_snapshot=True)
+        scheduler.solve_cache = current.solve_cache
+
+        app.jobs.report('refresh', 'comparing with the current data')
+        diff = data_refresh.diff_problems(current, scheduler)
+        affected = data_refresh.affected_scenarios(diff, scenario_runner.SCENARIOS)
+        carried = data_refresh.carry_over_caches(current, scheduler, diff)
+        refresh.update(changes=data_refresh.summarize(diff), resolved=affected, carriedCaches=carried)
+        print(f"[INFO] Data refresh: changes {refresh['changes'] or 'none'}; re-solving {affected or 'nothing'}")
 
+        results, schedules = {}, {}
+        if affected:
+            hints = {s: app.scenario_schedules[s] for s in affected if s in app.scenario_schedules}
+            futures, progress = scenario_runner.start_scenario_solves(scheduler, affected, hint_schedules=hints)
+            if 'baseline' in affected:
+                # Drain the baseline's improving solutions so its worker can exit
+                while True:
+                    try:
+                        _, schedule, objective = progress.get(timeout=0.5)
+                    except queue.Empty:
+                        # A worker that died never sends PROGRESS_DONE; its future fails instead
+                        if futures['baseline'].done() and futures['baseline'].exception() is not None:
+                            break
+                        continue
+                    if schedule is scenario_runner.PROGRESS_DONE:
+                        break
+                    app.jobs.report('refresh', f'baseline: improving solution with objective {objective}')
+                    events.publish('solve.incumbent', scenarioId='baseline', objective=objective, published=False)
+            for done, scenario_id in enumerate(affected, 1):
+                outcome = futures[scenario_id].result()
+                if outcome['status'] != 'SOLVED':
+                    raise RuntimeError(f'{scenario_id} found no solution on the new data; nothing was published')
+                view = scenario_runner.scenario_view(scheduler, outcome)
+                results[scenario_id] = {**export_scenario_with_capacities(view, scenario_id),
+                                        'solverStatus': 'SOLVED', 'objective': outcome['objective']}
+                schedules[scenario_id] = outcome['task_schedule']
+                app.jobs.report('refresh', f'solved {scenario_id} ({done}/{len(affected)})')
+
+        # The shared scheduler carries the baseline plan for the other dashboard views
+        if 'baseline' in schedules:
+            scheduler.task_schedule = schedules['baseline']
+            scheduler.build_global_priority_list()
+        else:
+            scheduler.task_schedule = current.task_schedule
+            scheduler.global_priority_list = current.global_priority_list
 
-    # Initialize the scheduler
-    initialize_scheduler_with_context()
+        with app.scenario_results_lock:
+            # What-if results were computed on the old data, whichever scenarios it affects
+            app.scenario_results = {scenario_id: result for scenario_id, result in
+                                    {**app.scenario_results, **results}.items()
+                                    if not scenario_id.startswith('what_if_')}
+            app.scenario_schedules = {**app.scenario_schedules, **schedules}
+            app.scheduler = scheduler
+            app.data_hash = new_hash
+            app.saved_scenarios = {}
+        # Queued and running what-ifs solve the old data; their results would be dropped anyway
+        cancelled = app.solver_pool.cancel_where(lambda key: key[0] == 'what_if' and key[-1] != new_hash)
+        if cancelled:
+            print(f"[INFO] Data refresh: cancelled {len(cancelled)} what-if job(s) on the old data")
+        refresh['cancelledWhatIfJobs'] = cancelled
+        for scenario_id in app.scenario_results:
+            announce_published(app, scenario_id)
+
+        if app.result_store:
+            app.result_store.input_hash = new_hash
+            for scenario_id in scenario_runner.SCENARIOS:
+                if scenario_id in app.scenario_results and scenario_id in app.scenario_schedules:
+                    app.result_store.save('scenario', scenario_id,
+                                          {'result': app.scenario_results[scenario_id],
+                                           'schedule': app.scenario_schedules[scenario_id]},
+                                          scenario_runner.scenario_params(scenario_id, LATE_PART_DELAY_DAYS))
+        app.last_refresh = {**refresh, 'changed': True, 'finishedAt': datetime.now().isoformat(),
+                            'elapsedSeconds': round(time.time() - started, 2)}
+        app.jobs.report('refresh', f"published {', '.join(affected) or 'the new data'}")
+
+    def start_refresh():
+        """Queue refresh_data as the 'refresh' background job; None if a refresh is already queued or running."""
+        return app.jobs.submit('refresh', refresh_data, app, description='Reload the data file and re-solve',
+                               if_idle=True)
+
+    app.start_refresh = start_refresh
+
+    def start_background_jobs(app):
+        """
+        Queue data loading and every scenario solve as background jobs so the server
+        answers requests right away. Scenarios found in the result store are published at once;
+        the rest are solved at the same time in separate processes on a snapshot of the loaded
+        data, and each job publishes (and stores) its scenario as it finishes.
+        """
+        jobs = app.jobs
+        jobs.submit('restore_results', restore_results, app, description='Restore stored scenario results')
+        jobs.submit('load_data', load_scheduler, app, description='Load scheduling_data.csv')
+        jobs.submit('heuristic', publish_heuristic, app, depends_on=['restore_results', 'load_data'],
+                    description='Publish the priority-rule schedule for baseline and scenario 1')
+        jobs.submit('solvers', start_scenario_solves, app, depends_on=['heuristic'],
+                    description='Start the CP-SAT scenario solves in worker processes')
+        jobs.submit('baseline', refine_baseline, app, depends_on=['solvers'],
+                    description='Refine the baseline with CP-SAT')
+        jobs.submit('scenario1', solve_scenario1, app, depends_on=['solvers'],
+                    description='Scenario 1: CSV headcount')
+        jobs.submit('scenario3', solve_scenario3, app, depends_on=['solvers'],
+                    description='Scenario 3: optimal headcount')
+
+
+    if mode == 'worker':
+        # Workers never solve: the data comes from the loader snapshot, results from the supervisor
+        from src import serving
+        load_scheduler(app)
+        serving.install_worker_hooks(app, snapshot_dir, supervisor_url, reload_data=lambda: load_scheduler(app))
+    else:
+        governor.on_grant(announce_solve_started)
+        # Start loading and solving in the background
+        start_background_jobs(app)
+        if mode == 'supervisor':
+            from src import serving
+            serving.start_snapshot_publisher(app, snapshot_dir)
 
     # Register blueprints
     app.register_blueprint(main_bp)
@@ -119,6 +427,24 @@ def create_app():
     app.register_blueprint(assignments_bp, url_prefix='/api')
     app.register_blueprint(supply_chain_bp)
     app.register_blueprint(ie_bp)
+    app.register_blueprint(health_bp)
+    app.register_blueprint(results_bp, url_prefix='/api')
+    app.register_blueprint(refresh_bp, url_prefix='/api')
+    app.register_blueprint(events_bp, url_prefix='/api')
+
+    # Endpoints that answer on their own while the scheduler is still loading
+    loading_safe_endpoints = {'main.landing_page', 'main.index', 'static', 'health.health', 'health.ready',
+                              'results.list_results', 'health.get_solver_allocations',
+                              'health.get_jobs', 'scenarios.get_scenarios', 'scenarios.get_scenario_data',
+                              'scenarios.get_scenario_summary', 'scenarios.get_scenario_progress',
+                              'events.stream_events'}
+
+    @app.before_request
+    def wait_for_scheduler():
+        """Other API calls get a 503 'computing' answer until the data is loaded."""
+        if app.scheduler is None and request.endpoint and request.endpoint not in loading_safe_endpoints:
+            return jsonify({'status': 'computing', 'error': 'Scheduler is still loading',
+                            'jobs': app.jobs.status()}), 503, {'Retry-After': '5'}
 
     @app.errorhandler(404)
     def not_found(error):
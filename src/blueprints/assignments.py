@@ -239,6 +239,9 @@ def auto_assign_tasks():
     partial_assigned = len([a for a in assignments if a.get('partial', False)])
     total_conflicts = len(conflicts)
 
+    if current_app.result_store:
+        current_app.result_store.save('assignments', scenario_id, mechanic_assignments[scenario_id])
+
     # Build mechanic summary
     mechanic_summary = []
     for mech in available_mechanics:
@@ -0,0 +1,47 @@
+# src/blueprints/events.py
+
+from flask import Blueprint, Response, current_app, request
+from src.event_bus import events
+
+events_bp = Blueprint('events', __name__)
+
+# An idle stream gets a comment line this often, so proxies keep it open and dead clients are noticed
+HEARTBEAT_SECONDS = 15
+# Reconnect delay suggested to the browser's EventSource, in milliseconds
+RETRY_MS = 3000
+
+
+@events_bp.route('/events')
+def stream_events():
+    """
+    Server-sent events: job.* (queued, running, progress, done, failed), whatif.*, solve.started,
+    solve.incumbent, scenario.published (with the version now served) and ie.queue.
+    types=job,scenario limits the stream to those types (a prefix matches its subtypes).
+    A reconnecting EventSource sends Last-Event-ID and receives the recent events it missed.
+    """
+    types = [t for t in request.args.get('types', '').split(',') if t]
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+    subscription = events.subscribe(types, last_event_id)
+    encode = current_app.json.dumps
+
+    def stream():
+        try:
+            yield f'retry: {RETRY_MS}\n\n'
+            while True:
+                event = subscription.get(timeout=HEARTBEAT_SECONDS)
+                if event is None:
+                    if subscription.closed:
+                        return
+                    yield ': keep-alive\n\n'
+                    continue
+                data = encode({'time': event['time'], **event['data']})
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+        finally:
+            subscription.close()
+
+    return Response(stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
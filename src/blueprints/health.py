@@ -0,0 +1,37 @@
+# src/blueprints/health.py
+
+from flask import Blueprint, jsonify, current_app
+from src.scheduler.solver_governor import governor
+
+health_bp = Blueprint('health', __name__)
+
+@health_bp.route('/healthz')
+def health():
+    """Liveness: the process is up and serving requests, whatever the background jobs are doing."""
+    jobs = current_app.jobs.status()
+    return jsonify({
+        'status': 'ok',
+        'startedAt': current_app.jobs.started_at.isoformat(),
+        'failedJobs': [name for name, job in jobs.items() if job['status'] == 'failed']
+    })
+
+@health_bp.route('/readyz')
+def ready():
+    """Readiness: data is loaded and a baseline schedule is published (503 until then)."""
+    is_ready = current_app.scheduler is not None and 'baseline' in current_app.scenario_results
+    return jsonify({
+        'ready': is_ready,
+        'computing': current_app.jobs.any_active(),
+        'scenarios': sorted(current_app.scenario_results),
+        'jobs': current_app.jobs.status()
+    }), 200 if is_ready else 503
+
+@health_bp.route('/api/jobs')
+def get_jobs():
+    """Status of every background job."""
+    return jsonify(current_app.jobs.status())
+
+@health_bp.route('/api/solvers')
+def get_solver_allocations():
+    """Solver threads granted from the core budget, solves waiting for threads, and the what-if queue."""
+    return jsonify({**governor.allocations(), 'whatIfJobs': current_app.solver_pool.load()})
@@ -4,6 +4,8 @@ from flask import Blueprint, jsonify, request, current_app
 from datetime import datetime
 import os
 import json
+from src import task_query
+from src.event_bus import events
 
 ie_bp = Blueprint('industrial_engineering', __name__, url_prefix='/api/ie')
 
@@ -64,7 +66,7 @@ def flag_task_for_review():
     # Get additional task details from the main data source
     task_details = {}
     scenario_data = current_app.scenario_results.get(scenario, {})
-    task_info = next((task for task in scenario_data.get('tasks', []) if task['taskId'] == task_id), None)
+    task_info = next((task for task in task_query.result_tasks(scenario_data) if task['taskId'] == task_id), None)
     if task_info:
         task_details = {
             'product': task_info.get('product'),
@@ -94,6 +96,7 @@ def flag_task_for_review():
 
     queue.append(review_item)
     write_queue(queue)
+    events.publish('ie.queue', action='flagged', taskId=task_id, feedbackId=flagged_at, queueLength=len(queue))
 
     return jsonify({
         'success': True,
@@ -181,6 +184,8 @@ def resolve_task():
 
     if task_found:
         write_queue(new_queue)
+        events.publish('ie.queue', action='resolved', taskId=resolved_task_id, feedbackId=item_id,
+                       queueLength=len(new_queue))
         return jsonify({'success': True, 'message': message})
     else:
         current_app.logger.error(f"Could not find IE Queue item with ID {item_id} to resolve.")
@@ -0,0 +1,43 @@
+# src/blueprints/refresh.py
+
+from flask import Blueprint, jsonify, current_app
+from src.result_store import file_hash
+
+refresh_bp = Blueprint('refresh', __name__)
+
+# Startup jobs that must finish before the data can be swapped underneath them
+STARTUP_SOLVE_JOBS = ('load_data', 'heuristic', 'solvers', 'baseline', 'scenario1', 'scenario3')
+
+
+@refresh_bp.route('/refresh', methods=['POST'])
+def start_refresh():
+    """
+    Reload the data file if its content changed and re-solve the scenarios the change affects,
+    as the 'refresh' background job (202); poll GET /api/refresh for progress. An unchanged
+    file answers 200 with "changed": false.
+    """
+    jobs = current_app.jobs
+    busy = [name for name in STARTUP_SOLVE_JOBS if jobs.is_active(name)]
+    if busy:
+        return jsonify({'success': False, 'error': 'Scenarios are still being computed; try again later',
+                        'jobs': busy}), 409, {'Retry-After': '30'}
+    if jobs.is_active('refresh'):
+        return _refresh_started(already_running=True)
+
+    input_hash = file_hash(current_app.data_path)
+    if input_hash == current_app.data_hash:
+        return jsonify({'success': True, 'changed': False, 'inputHash': input_hash})
+    # Another request may have started one since the check above; only one is ever queued
+    return _refresh_started(already_running=current_app.start_refresh() is None)
+
+
+def _refresh_started(already_running):
+    return jsonify({'success': True, 'changed': True, 'alreadyRunning': already_running, 'statusUrl': '/api/refresh',
+                    'job': current_app.jobs.status('refresh')}), 202
+
+
+@refresh_bp.route('/refresh')
+def get_refresh_status():
+    """Status of the current or last refresh job and what the last completed refresh changed."""
+    return jsonify({'inputHash': current_app.data_hash, 'job': current_app.jobs.status('refresh'),
+                    'lastRefresh': current_app.last_refresh})
@@ -0,0 +1,67 @@
+# src/blueprints/results.py
+
+from flask import Blueprint, jsonify, current_app, request
+
+results_bp = Blueprint('results', __name__)
+
+
+def _store():
+    return current_app.result_store
+
+
+@results_bp.route('/results')
+def list_results():
+    """Stored results (metadata only), newest first; ?kind= filters, ?current=1 keeps only the current inputs."""
+    store = _store()
+    if store is None:
+        return jsonify({'error': 'Result store is not available'}), 503
+    entries = store.list(kind=request.args.get('kind'), current_only=request.args.get('current') in ('1', 'true'))
+    return jsonify({'inputHash': store.input_hash, 'solverProfile': store.solver_profile,
+                    'count': len(entries), 'results': entries})
+
+
+@results_bp.route('/results/prune', methods=['POST'])
+def prune_results():
+    """Drop old versions, and optionally results for other inputs or older than a number of days."""
+    store = _store()
+    if store is None:
+        return jsonify({'error': 'Result store is not available'}), 503
+    data = request.get_json(silent=True) or {}
+    try:
+        keep_versions = int(data.get('keep_versions', 5))
+        older_than_days = float(data['older_than_days']) if data.get('older_than_days') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'keep_versions and older_than_days must be numbers'}), 400
+    if keep_versions < 1:
+        return jsonify({'error': 'keep_versions must be at least 1'}), 400
+    removed = store.prune(keep_versions=keep_versions, drop_stale=bool(data.get('drop_stale')),
+                          older_than_days=older_than_days)
+    return jsonify({'removed': removed, 'remaining': len(store.list())})
+
+
+@results_bp.route('/results/<int:entry_id>', methods=['DELETE'])
+def delete_result(entry_id):
+    store = _store()
+    if store is None:
+        return jsonify({'error': 'Result store is not available'}), 503
+    if not store.delete(entry_id):
+        return jsonify({'error': f'Result {entry_id} not found'}), 404
+    return jsonify({'deleted': entry_id})
+
+
+@results_bp.route('/solve_cache')
+def get_solve_cache_stats():
+    """Hit, miss and near-hit counts of the solve cache, per kind of solve."""
+    cache = current_app.scheduler.solve_cache if current_app.scheduler else None
+    if cache is None:
+        return jsonify({'error': 'Solve cache is not enabled'}), 503
+    return jsonify({'path': cache.path, 'maxEntries': cache.max_entries, 'stats': cache.stats()})
+
+
+@results_bp.route('/solve_cache', methods=['DELETE'])
+def clear_solve_cache():
+    cache = current_app.scheduler.solve_cache if current_app.scheduler else None
+    if cache is None:
+        return jsonify({'error': 'Solve cache is not enabled'}), 503
+    cache.clear()
+    return jsonify({'cleared': True})
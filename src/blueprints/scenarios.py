@@ -1,19 +1,45 @@
 # src/blueprints/scenarios.py
 
+import threading
 from flask import Blueprint, jsonify, current_app, request
-from src.scheduler.scenarios import run_what_if_scenario
-from src.server_utils import export_scenario_with_capacities
+from src.server_utils import export_scenario_with_capacities, scenario_payload
+from src import task_query, payload_codec, scenario_history
+from src.event_bus import events
 from datetime import datetime, timedelta
-from src.scheduler import constraints
+from src.scheduler import scenario_runner
 
 
 scenarios_bp = Blueprint('scenarios', __name__, url_prefix='/api')
 
+
+def _cached_json(key, sources, build):
+    """
+    A JSON response served from the app's body cache: build() returns the data and only
+    runs when one of sources (the objects the data is derived from) has been replaced.
+    Answers 304 when the client already holds this version (If-None-Match), and compresses
+    the body when the client accepts it.
+    """
+    encoding = payload_codec.negotiate_encoding(request.headers.get('Accept-Encoding'))
+    body, etag = current_app.encoded_bodies.get(key, sources, lambda: current_app.json.dumps_bytes(build()), encoding)
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(body, mimetype='application/json')
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    # Weak: the compressed and identity bodies are the same version
+    response.set_etag(etag, weak=True)
+    # Browsers keep the body but check back with If-None-Match on every request
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
+
+
 @scenarios_bp.route('/scenarios')
 def get_scenarios():
     """Get list of available scenarios with descriptions"""
     scheduler = current_app.scheduler
-    return jsonify({
+    return _cached_json(('scenarios',), (scheduler,), lambda: {
         'scenarios': [
             {
                 'id': 'baseline',
@@ -44,45 +70,150 @@ def get_scenarios():
         }
     })
 
+def _scenario_job(scenario_id):
+    """Status of the background job producing a scenario, or None if there is none."""
+    job_name = current_app.scenario_jobs.get(scenario_id)
+    return current_app.jobs.status(job_name) if job_name else None
+
+
+def _computing_response(scenario_id):
+    """202 'computing' placeholder while a scenario's job has not published anything yet."""
+    job = _scenario_job(scenario_id)
+    if job is None or job['status'] not in ('pending', 'running'):
+        return None
+    return jsonify({'scenarioId': scenario_id, 'status': 'computing', 'job': job,
+                    'tasks': [], 'products': []}), 202
+
+
 @scenarios_bp.route('/scenario_progress/<scenario_id>')
 def get_scenario_progress(scenario_id):
-    # This logic for progress tracking might need to be re-evaluated
-    # as computation_progress is not defined here.
-    # For now, returning a placeholder.
-    computation_progress = {}
+    """Job status of a scenario with its latest incumbent and published version; /api/events pushes the same."""
+    incumbent = events.last('solve.incumbent', scenarioId=scenario_id)
+    published = events.last('scenario.published', scenarioId=scenario_id)
+    latest = {'incumbent': incumbent['data'] if incumbent else None,
+              'version': published['data']['version'] if published else None}
+    job = _scenario_job(scenario_id)
+    if job is None:
+        return jsonify({'progress': 100 if scenario_id in current_app.scenario_results else 0, 'status': 'idle',
+                        **latest})
     return jsonify({
-        'progress': computation_progress.get(scenario_id, 0),
-        'status': 'computing' if scenario_id in computation_progress else 'idle'
+        'progress': 100 if job['status'] == 'done' else 0,
+        'status': 'computing' if job['status'] in ('pending', 'running') else job['status'],
+        'hasPartialResult': scenario_id in current_app.scenario_results,
+        'job': job,
+        **latest
     })
 
 @scenarios_bp.route('/scenario/<scenario_id>')
 def get_scenario_data(scenario_id):
-    scenario_results = current_app.scenario_results
-    if scenario_id not in scenario_results:
-        return jsonify({'error': f'Scenario {scenario_id} not found'}), 404
+    """
+    A scenario result with the current dependency maps. format=columnar sends the compact
+    columnar form (see src/payload_codec.py). The body is serialized once per published
+    result, compressed when the client accepts gzip (or br) and tagged with an ETag.
+    """
+    result = current_app.scenario_results.get(scenario_id)
+    if result is None:
+        return _computing_response(scenario_id) or (jsonify({'error': f'Scenario {scenario_id} not found'}), 404)
+
+    columnar = request.args.get('format') == 'columnar'
+    # Results published before their job finishes (e.g. the heuristic baseline) are partial
+    job = _scenario_job(scenario_id)
+    computing = bool(job and job['status'] in ('pending', 'running'))
+    scheduler = current_app.scheduler
+
+    def build():
+        # The served payload (a copy without allTasks, which is served by /tasks) with the dependency maps
+        entry = current_app.scenario_history.current(scenario_id, result, scheduler)
+        scenario_data = {**entry['payload'], 'computing': computing, 'version': entry['version']}
+        if columnar:
+            scenario_data = payload_codec.columnar_scenario(scenario_data)
+        return scenario_data
 
-    # Make a copy to avoid modifying the cached results
-    scenario_data = scenario_results[scenario_id].copy()
+    return _cached_json(('scenario', scenario_id, columnar), (result, scheduler, computing), build)
 
-    # Get the scheduler instance from the app context
+@scenarios_bp.route('/scenario/<scenario_id>/delta')
+def get_scenario_delta(scenario_id):
+    """
+    Catch up from the version a client holds (since=<version> from an earlier scenario or
+    delta response) to the current one: task rows added, removed and changed (changed
+    fields only), changed top-level values and changed dependency entries. When that
+    version is no longer in the history, answers with full=true and the whole scenario.
+    """
+    result = current_app.scenario_results.get(scenario_id)
+    if result is None:
+        return _computing_response(scenario_id) or (jsonify({'error': f'Scenario {scenario_id} not found'}), 404)
+    since = request.args.get('since', '')
+    job = _scenario_job(scenario_id)
+    computing = bool(job and job['status'] in ('pending', 'running'))
     scheduler = current_app.scheduler
-    if scheduler:
-        # Build and add the dependency maps
-        predecessors_map, successors_map = constraints.get_dependency_maps(scheduler)
-        scenario_data['predecessors_map'] = predecessors_map
-        scenario_data['successors_map'] = successors_map
+    history = current_app.scenario_history
+    entry = history.current(scenario_id, result, scheduler)
+    held = history.find(scenario_id, since)
+    # Bodies are cached per held version still in the history; others share one full snapshot
+    versions = set(history.versions(scenario_id))
+    current_app.encoded_bodies.evict(
+        lambda key: key[:2] == ('delta', scenario_id) and key[2] not in versions)
+
+    delta = {'scenarioId': scenario_id, 'version': entry['version'], 'computing': computing}
+    if held is None:
+        return _cached_json(('delta_full', scenario_id), (result, scheduler, computing), lambda: {
+            **delta, 'full': True, 'scenario': {**entry['payload'], 'computing': computing, 'version': entry['version']}})
+    return _cached_json(('delta', scenario_id, since), (result, scheduler, computing), lambda: {
+        **delta, 'since': since, 'full': False, **scenario_history.diff_payloads(held['payload'], entry['payload'])})
+
+@scenarios_bp.route('/scenario/<scenario_id>/tasks')
+def query_scenario_tasks(scenario_id):
+    """
+    One page of a scenario's tasks, across all of them rather than the dashboard's top 1000.
+    Filters: team, teamSkill, skill, product, type, criticality, critical (repeat one for
+    several values), from/to (ISO times, local unless they carry an offset or Z; tasks
+    overlapping the window). sort is one of priority, start, end, slack, duration, taskId,
+    product, team, with order=asc|desc.
+    limit (at most 1000) sets the page size; pass nextCursor back as cursor for the next page.
+    """
+    result = current_app.scenario_results.get(scenario_id)
+    if result is None:
+        return _computing_response(scenario_id) or (jsonify({'error': f'Scenario {scenario_id} not found'}), 404)
+    index = task_query.index_for(current_app.task_indexes, scenario_id, result)
 
-    return jsonify(scenario_data)
+    args = request.args
+    filters = {name: args.getlist(name) for name in task_query.FILTER_FIELDS if args.getlist(name)}
+    try:
+        window_start = datetime.fromisoformat(args['from']) if args.get('from') else None
+        window_end = datetime.fromisoformat(args['to']) if args.get('to') else None
+        page = index.query(filters, window_start, window_end, sort=args.get('sort', 'priority'),
+                           descending=args.get('order') == 'desc',
+                           limit=args.get('limit', task_query.DEFAULT_LIMIT), cursor=args.get('cursor'))
+    except task_query.CursorError as e:
+        return jsonify({'error': str(e)}), 409
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({'scenarioId': scenario_id, 'version': index.version, 'count': len(page['tasks']), **page})
+
+
+@scenarios_bp.route('/scenario/<scenario_id>/tasks/facets')
+def get_scenario_task_facets(scenario_id):
+    """Distinct values, with task counts, of every task filter of a scenario."""
+    result = current_app.scenario_results.get(scenario_id)
+    if result is None:
+        return _computing_response(scenario_id) or (jsonify({'error': f'Scenario {scenario_id} not found'}), 404)
+    index = task_query.index_for(current_app.task_indexes, scenario_id, result)
+    return jsonify({'scenarioId': scenario_id, 'version': index.version, 'totalTasks': len(index.rows),
+                    'facets': index.facets()})
 
 @scenarios_bp.route('/scenario/<scenario_id>/summary')
 def get_scenario_summary(scenario_id):
     """Get summary statistics for a scenario"""
     scenario_results = current_app.scenario_results
     if scenario_id not in scenario_results:
-        return jsonify({'error': 'Scenario not found'}), 404
+        return _computing_response(scenario_id) or (jsonify({'error': 'Scenario not found'}), 404)
 
     data = scenario_results[scenario_id]
+    return _cached_json(('summary', scenario_id), (data,), lambda: _scenario_summary(data))
+
 
+def _scenario_summary(data):
     product_summaries = []
     for product in data.get('products', []):
         product_summaries.append({
@@ -109,60 +240,182 @@ def get_scenario_summary(scenario_id):
         'productSummaries': product_summaries,
         'instanceBased': True
     }
+    return summary
 
-    return jsonify(summary)
 
+def _repair_and_publish(scenario_id, result, schedule, parsed, allow_pull_in):
+    """
+    Repair a scenario's result with the parsed floor updates and publish it, unless another
+    result was published since result was read. Returns the repair delta, or None on a conflict.
+    """
+    # Repair a view carrying the scenario's schedule and headcount
+    base = current_app.scheduler
+    capacities = result.get('teamCapacities', {})
+    scenario_scheduler = base.scenario_view(
+        task_schedule=schedule,
+        team_capacity={t: capacities.get(t, c) for t, c in base.team_capacity.items()},
+        quality_team_capacity={t: capacities.get(t, c) for t, c in base.quality_team_capacity.items()},
+        customer_team_capacity={t: capacities.get(t, c) for t, c in base.customer_team_capacity.items()})
+
+    delta = scenario_scheduler.repair_schedule(parsed, allow_pull_in=allow_pull_in)
+
+    if delta['changed']:
+        scenario_scheduler.build_global_priority_list()
+        repaired = export_scenario_with_capacities(scenario_scheduler, scenario_id)
+        for key in ('solverStatus', 'objective'):
+            if key in result:
+                repaired[key] = result[key]
+        repaired['repaired'] = True
+        with current_app.scenario_results_lock:
+            # A solve may have published a newer result meanwhile; never overwrite it
+            if current_app.scenario_results.get(scenario_id) is not result:
+                return None
+            current_app.scenario_results = {**current_app.scenario_results, scenario_id: repaired}
+            current_app.scenario_schedules = {**current_app.scenario_schedules,
+                                              scenario_id: scenario_scheduler.task_schedule}
+        current_app.announce_published(scenario_id)
+        if current_app.result_store and scenario_id in scenario_runner.SCENARIOS:
+            # Stored as a new version of the scenario, so a restart keeps the repaired plan
+            current_app.result_store.save('scenario', scenario_id,
+                                          {'result': repaired, 'schedule': scenario_scheduler.task_schedule},
+                                          scenario_runner.scenario_params(scenario_id, scenario_scheduler.late_part_delay_days))
+
+    return delta
+
+
+@scenarios_bp.route('/scenario/<scenario_id>/repair', methods=['POST'])
+def repair_scenario(scenario_id):
+    """
+    Apply floor updates to a scenario and re-time only the tasks downstream of them.
+    Body: {"updates": {"<task id>": {"actual_start": iso, "actual_finish": iso, "delay_minutes": n}},
+           "allow_pull_in": false}
+    Returns the changed tasks and product finishes; the scenario is republished with the repair.
+    """
+    data = request.get_json(silent=True) or {}
+    updates = data.get('updates')
+    if not isinstance(updates, dict) or not updates:
+        return jsonify({'error': 'updates must map task ids to actual_start/actual_finish/delay_minutes'}), 400
 
-@scenarios_bp.route('/scenarios/run_what_if', methods=['POST'])
-def run_what_if():
-    """Run a what-if scenario by prioritizing a specific product."""
+    parsed = {}
     try:
-        data = request.get_json()
-        if not data:
-            return jsonify({'error': 'Invalid JSON body'}), 400
-        product_to_prioritize = data.get('product_to_prioritize')
-
-        if not product_to_prioritize:
-            return jsonify({'error': 'product_to_prioritize is required'}), 400
-
-        scheduler = current_app.scheduler
-        if not scheduler:
-            return jsonify({'error': 'Scheduler not initialized'}), 500
-
-        # Run the what-if scenario
-        what_if_scheduler = run_what_if_scenario(scheduler, product_to_prioritize)
-
-        if not what_if_scheduler:
-            return jsonify({'error': 'Failed to run what-if scenario. The solver might not have found a feasible solution.'}), 500
-
-        # Export the results of the new scenario
-        what_if_results = export_scenario_with_capacities(what_if_scheduler, f"what_if_{product_to_prioritize}")
-
-        # Get the baseline results for comparison
-        baseline_scenario_id = data.get('baseline_scenario_id', 'baseline')
-        baseline_results = current_app.scenario_results.get(baseline_scenario_id)
+        for task_id, update in updates.items():
+            parsed[task_id] = {
+                'actual_start': datetime.fromisoformat(update['actual_start']) if update.get('actual_start') else None,
+                'actual_finish': datetime.fromisoformat(update['actual_finish']) if update.get('actual_finish') else None,
+                'delay_minutes': int(update.get('delay_minutes') or 0),
+            }
+    except (TypeError, ValueError, AttributeError) as e:
+        return jsonify({'error': f'Invalid update: {e}'}), 400
+
+    with current_app.scenario_results_lock:
+        repair_lock = current_app.repair_locks.setdefault(scenario_id, threading.Lock())
+    # Repairs of one scenario run one after the other, each on the result the previous one published
+    with repair_lock:
+        with current_app.scenario_results_lock:
+            schedule = current_app.scenario_schedules.get(scenario_id)
+            result = current_app.scenario_results.get(scenario_id)
+        if schedule is None or result is None:
+            return jsonify({'error': f'Scenario {scenario_id} not found'}), 404
+        delta = _repair_and_publish(scenario_id, result, schedule, parsed, bool(data.get('allow_pull_in')))
+        if delta is None:
+            return jsonify({'error': f'Scenario {scenario_id} was republished during the repair; retry it'}), 409
+
+    for change in delta['changed']:
+        for key in ('previous_start', 'previous_end', 'start_time', 'end_time'):
+            change[key] = change[key].isoformat()
+    for product in delta['products'].values():
+        product['previous_finish'] = product['previous_finish'].isoformat()
+        product['finish'] = product['finish'].isoformat()
+
+    return jsonify({'scenarioId': scenario_id, **delta})
 
-        if not baseline_results:
-            return jsonify({'error': f'Baseline scenario "{baseline_scenario_id}" not found.'}), 404
 
-        # Structure for side-by-side comparison
-        comparison_data = {
-            'baseline': baseline_results,
-            'what_if': what_if_results,
-            'prioritized_product': product_to_prioritize,
-            'created_at': datetime.utcnow().isoformat()
-        }
+@scenarios_bp.route('/scenarios/run_what_if', methods=['POST'])
+def run_what_if():
+    """
+    Queue a what-if run that prioritizes one product. Answers 202 with a job id right away;
+    poll /api/scenarios/jobs/<job_id> for the status and, once done, the comparison.
+    An identical request that is still queued or running returns the existing job.
+    """
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({'error': 'Invalid JSON body'}), 400
+    product_to_prioritize = data.get('product_to_prioritize')
 
-        # Save the scenario
-        scenario_id = f"whatif_{product_to_prioritize}_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
-        current_app.saved_scenarios[scenario_id] = comparison_data
+    if not product_to_prioritize:
+        return jsonify({'error': 'product_to_prioritize is required'}), 400
 
-        return jsonify(comparison_data)
-    except Exception as e:
-        # Log the full exception for debugging
-        current_app.logger.error(f"Error in /run_what_if: {e}", exc_info=True)
-        # Return a generic but informative JSON error to the frontend
-        return jsonify({'error': f'An unexpected server error occurred: {str(e)}'}), 500
+    scheduler = current_app.scheduler
+    if not scheduler:
+        return jsonify({'error': 'Scheduler not initialized'}), 500
+
+    baseline_scenario_id = data.get('baseline_scenario_id', 'baseline')
+    if baseline_scenario_id not in current_app.scenario_results:
+        return jsonify({'error': f'Baseline scenario "{baseline_scenario_id}" not found.'}), 404
+
+    app = current_app._get_current_object()
+    # The job solves the data as it is now; a refresh before it finishes makes its result stale
+    data_hash = app.data_hash
+
+    def save_comparison(outcome):
+        # Runs in this process once the solver process has answered
+        what_if_results = export_scenario_with_capacities(scenario_runner.scenario_view(scheduler, outcome),
+                                                          f"what_if_{product_to_prioritize}")
+        with app.scenario_results_lock:
+            if app.data_hash != data_hash:
+                raise RuntimeError('The data file was reloaded while this what-if ran; its result was dropped')
+            comparison_data = {
+                'baseline': scenario_payload(app.scenario_results[baseline_scenario_id]),
+                'what_if': scenario_payload(what_if_results),
+                'prioritized_product': product_to_prioritize,
+                'created_at': datetime.utcnow().isoformat()
+            }
+            scenario_id = f"whatif_{product_to_prioritize}_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
+            app.saved_scenarios[scenario_id] = comparison_data
+            # Under the lock, so a refresh cannot move the store to the new data hash meanwhile
+            if app.result_store:
+                app.result_store.save('what_if', scenario_id, comparison_data,
+                                      {'product': product_to_prioritize, 'baseline': baseline_scenario_id})
+        return comparison_data
+
+    pool = current_app.solver_pool
+    job_id, deduplicated = pool.submit(
+        ('what_if', product_to_prioritize, baseline_scenario_id, data_hash),
+        scenario_runner.solve_what_if,
+        lambda: (scenario_runner.shared_snapshot(scheduler), product_to_prioritize),
+        on_done=save_comparison,
+        description=f'What-if: prioritize {product_to_prioritize}')
+
+    return jsonify({'jobId': job_id, 'deduplicated': deduplicated,
+                    'statusUrl': f'/api/scenarios/jobs/{job_id}',
+                    **pool.status(job_id, include_result=False)}), 202
+
+
+@scenarios_bp.route('/scenarios/jobs')
+def list_what_if_jobs():
+    """Queued, running and recently finished what-if jobs, without their results."""
+    pool = current_app.solver_pool
+    return jsonify({'jobs': pool.status(include_result=False), **pool.load()})
+
+
+@scenarios_bp.route('/scenarios/jobs/<job_id>')
+def get_what_if_job(job_id):
+    """Status of one what-if job; 'result' holds the comparison once the status is 'done'."""
+    job = current_app.solver_pool.status(job_id)
+    if job is None:
+        return jsonify({'error': f'Job {job_id} not found'}), 404
+    return jsonify(job)
+
+
+@scenarios_bp.route('/scenarios/jobs/<job_id>', methods=['DELETE'])
+def cancel_what_if_job(job_id):
+    """Cancel a queued or running what-if job."""
+    if not current_app.solver_pool.cancel(job_id):
+        job = current_app.solver_pool.status(job_id, include_result=False)
+        if job is None:
+            return jsonify({'error': f'Job {job_id} not found'}), 404
+        return jsonify({'error': f"Job {job_id} already {job['status']}", 'job': job}), 409
+    return jsonify(current_app.solver_pool.status(job_id, include_result=False))
 
 
 @scenarios_bp.route('/products')
@@ -172,15 +425,17 @@ def get_products():
     # Instead, we source the product list from the 'baseline' scenario results,
     # which are computed and stored at startup. This ensures consistency with other
     # dashboard views.
-    if 'baseline' in current_app.scenario_results:
-        baseline_results = current_app.scenario_results['baseline']
-        if 'products' in baseline_results and baseline_results['products']:
-            # Extract unique product names from the list of product objects
-            product_names = sorted(list(set(p['name'] for p in baseline_results['products'])))
-            return jsonify(product_names)
+    baseline_results = current_app.scenario_results.get('baseline')
+    return _cached_json(('products',), (baseline_results,), lambda: _product_names(baseline_results))
+
+
+def _product_names(baseline_results):
+    if baseline_results and baseline_results.get('products'):
+        # Extract unique product names from the list of product objects
+        return sorted(list(set(p['name'] for p in baseline_results['products'])))
 
     # Fallback if baseline or products are not available
-    return jsonify([])
+    return []
 
 
 @scenarios_bp.route('/scenarios/saved')
@@ -202,7 +457,7 @@ def get_task_chain(scenario_id, task_id):
     # Use the comprehensive dependency maps from the scenario data
     predecessors_map = scenario_data.get('predecessors_map', {})
     successors_map = scenario_data.get('successors_map', {})
-    task_map = {t['taskId']: t for t in scenario_data.get('tasks', [])}
+    task_map = {t['taskId']: t for t in task_query.result_tasks(scenario_data)}
 
     target_task = task_map.get(task_id)
     if not target_task:
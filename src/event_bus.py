@@ -0,0 +1,113 @@
+# src/event_bus.py
+# In-process publish/subscribe for dashboard events (jobs queued and finished, solves
+# started, new incumbents, scenarios published, IE queue changes). Publishers never block:
+# each subscriber has a bounded queue, and one that falls too far behind is dropped and
+# catches up from the recent-event buffer when it reconnects.
+
+import itertools
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+
+# Recent events kept for subscribers reconnecting with the last id they saw
+KEEP_EVENTS = 500
+# Events a subscriber may have waiting before it is dropped
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+
+class Subscription:
+    """Events for one subscriber, read with get(); closed when it lags or unsubscribes."""
+
+    def __init__(self, bus, types):
+        self.bus = bus
+        self.types = types
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.closed = False
+
+    def wants(self, event):
+        return not self.types or event['type'] in self.types or event['type'].split('.')[0] in self.types
+
+    def get(self, timeout=None):
+        """The next event, or None on timeout or once the subscription is closed."""
+        if self.closed:
+            return None
+        try:
+            # None is put by close()
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+
+class EventBus:
+    """
+    Fan-out of published events to every subscription. Each event gets an increasing id, so
+    a subscriber that reconnects with the last id it saw receives what it missed (as long
+    as it is still among the last KEEP_EVENTS).
+    """
+
+    def __init__(self, keep=KEEP_EVENTS):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._recent = deque(maxlen=keep)
+        self._subscriptions = set()
+
+    def publish(self, event_type, **data):
+        with self._lock:
+            event = {'id': next(self._ids), 'type': event_type, 'time': datetime.now().isoformat(), 'data': data}
+            self._recent.append(event)
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if not subscription.wants(event):
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except queue.Full:
+                print(f"[WARNING] Dropping an event subscriber {SUBSCRIBER_QUEUE_SIZE} events behind")
+                self.unsubscribe(subscription)
+        return event
+
+    def subscribe(self, types=(), last_event_id=None):
+        """
+        A Subscription to events of the given types (a type like 'job' also matches 'job.*';
+        none means all), starting with the recent events after last_event_id when given.
+        """
+        subscription = Subscription(self, set(types))
+        with self._lock:
+            if last_event_id is not None:
+                for event in self._recent:
+                    if event['id'] > last_event_id and subscription.wants(event):
+                        subscription.queue.put_nowait(event)
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+        if not subscription.closed:
+            subscription.closed = True
+            try:
+                # Wakes a reader blocked in get()
+                subscription.queue.put_nowait(None)
+            except queue.Full:
+                pass
+
+    def last(self, event_type, **match):
+        """The most recent event of event_type whose data matches every given field, or None."""
+        with self._lock:
+            recent = list(self._recent)
+        for event in reversed(recent):
+            if event['type'] == event_type and all(event['data'].get(k) == v for k, v in match.items()):
+                return event
+        return None
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscriptions)
+
+
+# The event bus of this process
+events = EventBus()
@@ -0,0 +1,103 @@
+# src/job_runner.py
+# Small background job runner for startup work: named jobs run in daemon threads,
+# optionally after other jobs, and report their status for the health endpoints and as
+# job.* events on the event bus.
+
+import threading
+import time
+import traceback
+from datetime import datetime
+from src import event_bus
+
+PENDING, RUNNING, DONE, FAILED, SKIPPED = 'pending', 'running', 'done', 'failed', 'skipped'
+
+
+class JobRunner:
+    """
+    Runs each submitted job in its own daemon thread once the jobs it depends on are done.
+    A job whose dependency failed is skipped. Status is kept per job name.
+    """
+
+    def __init__(self, events=None):
+        self.events = events or event_bus.events
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._events = {}
+        self.started_at = datetime.now()
+
+    def submit(self, name, fn, *args, depends_on=(), description='', if_idle=False):
+        """
+        Queue fn(*args) under name; it starts when every job in depends_on is done. Every
+        dependency must have been submitted already (ValueError otherwise). With if_idle,
+        nothing is queued while a job of the same name is pending or running, and None is
+        returned; the check and the submit are one atomic step.
+        """
+        with self._lock:
+            unknown = [dependency for dependency in depends_on if dependency not in self._jobs]
+            if unknown:
+                raise ValueError(f"Job '{name}' depends on jobs that were never submitted: {', '.join(unknown)}")
+            if if_idle and name in self._jobs and self._jobs[name]['status'] in (PENDING, RUNNING):
+                return None
+            self._jobs[name] = {'name': name, 'description': description, 'status': PENDING,
+                                'depends_on': list(depends_on), 'message': '', 'started_at': None,
+                                'finished_at': None, 'elapsed_seconds': None, 'error': None}
+            self._events[name] = threading.Event()
+            job = self._jobs[name]
+        self._announce(job, 'queued')
+        thread = threading.Thread(target=self._run, args=(name, fn, args, tuple(depends_on)),
+                                  name=f'job-{name}', daemon=True)
+        thread.start()
+        return name
+
+    def _update(self, name, **fields):
+        with self._lock:
+            self._jobs[name] = job = {**self._jobs[name], **fields}
+        self._announce(job, 'progress' if set(fields) == {'message'} else job['status'])
+
+    def _announce(self, job, what):
+        self.events.publish(f'job.{what}', name=job['name'], status=job['status'], message=job['message'],
+                            error=job['error'], elapsedSeconds=job['elapsed_seconds'])
+
+    def _run(self, name, fn, args, depends_on):
+        for dependency in depends_on:
+            self._events[dependency].wait()
+            if self._jobs[dependency]['status'] != DONE:
+                self._update(name, status=SKIPPED, message=f"dependency '{dependency}' did not complete")
+                self._events[name].set()
+                return
+
+        started = time.time()
+        self._update(name, status=RUNNING, started_at=datetime.now().isoformat())
+        try:
+            fn(*args)
+            self._update(name, status=DONE, finished_at=datetime.now().isoformat(),
+                         elapsed_seconds=round(time.time() - started, 2))
+        except Exception as e:
+            print(f"\n✗ ERROR in background job '{name}': {str(e)}")
+            traceback.print_exc()
+            self._update(name, status=FAILED, error=str(e), finished_at=datetime.now().isoformat(),
+                         elapsed_seconds=round(time.time() - started, 2))
+        finally:
+            self._events[name].set()
+
+    def report(self, name, message):
+        """Progress note from inside a running job."""
+        if name in self._jobs:
+            self._update(name, message=message)
+
+    def status(self, name=None):
+        with self._lock:
+            if name is not None:
+                return dict(self._jobs[name]) if name in self._jobs else None
+            return {job_name: dict(job) for job_name, job in self._jobs.items()}
+
+    def is_active(self, name):
+        job = self.status(name)
+        return job is not None and job['status'] in (PENDING, RUNNING)
+
+    def any_active(self):
+        return any(job['status'] in (PENDING, RUNNING) for job in self.status().values())
+
+    def wait(self, name, timeout=None):
+        event = self._events.get(name)
+        return event.wait(timeout) if event else True
@@ -0,0 +1,182 @@
+# src/json_provider.py
+# JSON provider for the Flask app: encodes with orjson when it is installed (several times
+# faster than the standard library on scenario payloads), writes datetimes as ISO strings,
+# NumPy values as plain numbers and lists, NaN/inf as null, and streams very large
+# responses in chunks instead of building one string. Falls back to the json module.
+
+import dataclasses
+import decimal
+import json
+import math
+import time
+import uuid
+from datetime import date, datetime, time as day_time
+
+import numpy as np
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional: without it, the standard library encodes
+    orjson = None
+
+# Responses with a list longer than this (top level, or a top-level dict's value) are streamed
+STREAM_MIN_ITEMS = 5000
+# List items encoded per streamed chunk
+STREAM_CHUNK_ITEMS = 1000
+
+
+def _default(o):
+    """Values neither encoder handles natively."""
+    if isinstance(o, (datetime, date, day_time)):
+        return o.isoformat()
+    if isinstance(o, np.ndarray):
+        return o.tolist()
+    if isinstance(o, np.generic):
+        return o.item()
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+
+def _finite(o):
+    """o with NaN and infinities replaced by None, for the standard library encoder."""
+    if isinstance(o, float):
+        return o if math.isfinite(o) else None
+    if isinstance(o, dict):
+        return {k: _finite(v) for k, v in o.items()}
+    if isinstance(o, (list, tuple)):
+        return [_finite(v) for v in o]
+    if isinstance(o, (np.ndarray, np.generic)):
+        return _finite(o.tolist())
+    return o
+
+
+def encode(obj, sort_keys=True, indent=False):
+    """obj as compact (or indented) UTF-8 JSON bytes."""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_default, option=option)
+    kwargs = {'default': _default, 'sort_keys': sort_keys, 'ensure_ascii': False,
+              'indent': 2 if indent else None, 'separators': (',', ': ') if indent else (',', ':')}
+    try:
+        text = json.dumps(obj, allow_nan=False, **kwargs)
+    except ValueError:
+        text = json.dumps(_finite(obj), allow_nan=False, **kwargs)
+    return text.encode('utf-8')
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    Compact JSON for every jsonify/Response, sorted keys like Flask's default provider.
+    Non-finite floats become null rather than the invalid NaN/Infinity tokens.
+    """
+
+    sort_keys = True
+    mimetype = 'application/json'
+
+    def dumps_bytes(self, obj, sort_keys=None, indent=False):
+        """obj as UTF-8 JSON bytes, without the str round trip dumps() makes."""
+        return encode(obj, self.sort_keys if sort_keys is None else sort_keys, indent)
+
+    def dumps(self, obj, **kwargs):
+        # Output is always compact; only indent and sort_keys are honoured
+        return self.dumps_bytes(obj, sort_keys=kwargs.get('sort_keys'), indent=bool(kwargs.get('indent'))).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def iter_encode(self, obj):
+        """obj's JSON as a sequence of byte chunks; long lists are encoded STREAM_CHUNK_ITEMS items at a time."""
+        if isinstance(obj, dict):
+            items = sorted(obj.items(), key=lambda kv: str(kv[0])) if self.sort_keys else obj.items()
+            yield b'{'
+            for i, (key, value) in enumerate(items):
+                yield (b',' if i else b'') + self.dumps_bytes(str(key)) + b':'
+                if isinstance(value, (list, tuple)) and len(value) > STREAM_CHUNK_ITEMS:
+                    yield from self._iter_list(value)
+                else:
+                    yield self.dumps_bytes(value)
+            yield b'}'
+        elif isinstance(obj, (list, tuple)):
+            yield from self._iter_list(obj)
+        else:
+            yield self.dumps_bytes(obj)
+
+    def _iter_list(self, items):
+        yield b'['
+        for start in range(0, len(items), STREAM_CHUNK_ITEMS):
+            chunk = self.dumps_bytes(list(items[start:start + STREAM_CHUNK_ITEMS]))
+            # Drop the chunk's own brackets
+            yield (b',' if start else b'') + chunk[1:-1]
+        yield b']'
+
+    def _is_large(self, obj):
+        if isinstance(obj, (list, tuple)):
+            return len(obj) > STREAM_MIN_ITEMS
+        if isinstance(obj, dict):
+            return any(isinstance(v, (list, tuple)) and len(v) > STREAM_MIN_ITEMS for v in obj.values())
+        return False
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        if self._is_large(obj):
+            return self._app.response_class(self.iter_encode(obj), mimetype=self.mimetype)
+        return self._app.response_class(self.dumps_bytes(obj, indent=self._app.debug), mimetype=self.mimetype)
+
+
+def benchmark(payloads, repeat=20):
+    """
+    Mean milliseconds to encode each payload with the standard library (as Flask's default
+    provider does) and with this provider, plus the output sizes.
+    """
+    rows = []
+    for name, payload in payloads.items():
+        started = time.perf_counter()
+        for _ in range(repeat):
+            baseline = json.dumps(payload, default=_default, sort_keys=True, separators=(',', ':'))
+        baseline_ms = (time.perf_counter() - started) / repeat * 1000
+        started = time.perf_counter()
+        for _ in range(repeat):
+            fast = encode(payload)
+        fast_ms = (time.perf_counter() - started) / repeat * 1000
+        rows.append({'payload': name, 'bytes': len(fast), 'stdlibMs': round(baseline_ms, 2),
+                     'fastMs': round(fast_ms, 2), 'speedup': round(baseline_ms / fast_ms, 1) if fast_ms else None,
+                     'encoder': 'orjson' if orjson is not None else 'json', 'stdlibBytes': len(baseline.encode('utf-8'))})
+    return rows
+
+
+if __name__ == '__main__':
+    # python -m src.json_provider: benchmark both encoders on the stored scenario results
+    import os
+    from src.result_store import ResultStore, file_hash
+    from src.scheduler import scenario_runner, utils
+    from src.server_utils import scenario_payload
+
+    data_path = utils.resource_path('scheduling_data.csv')
+    store = ResultStore(os.environ.get('SCHEDULER_RESULT_STORE',
+                                       os.path.join(os.path.dirname(data_path), 'scenario_results.sqlite3')),
+                        file_hash(data_path), scenario_runner.solver_profile())
+    results = {name: stored['result'] for name, stored in store.load_all('scenario').items()}
+    if not results:
+        print('[WARNING] No stored scenario results for the current data; start the server once first')
+    payloads = {}
+    for name, result in results.items():
+        payloads[name] = scenario_payload(result)
+        if 'allTasks' in result:
+            payloads[f'{name} (all tasks)'] = result
+    for row in benchmark(payloads):
+        print(f"{row['payload']:<28} {row['bytes']:>9} bytes  json {row['stdlibMs']:>7} ms  "
+              f"{row['encoder']} {row['fastMs']:>6} ms  x{row['speedup']}")
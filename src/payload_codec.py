@@ -0,0 +1,176 @@
+# src/payload_codec.py
+# Compact wire format for scenario payloads and Accept-Encoding negotiation. The columnar
+# form replaces the per-task dicts with one array per field, dictionary-encodes the
+# repeated strings, sends times as epoch minutes and the dependency maps as index lists.
+# Encoded and compressed bodies are built once per published result and then reused.
+
+import gzip
+import hashlib
+import threading
+from datetime import datetime
+
+try:
+    import brotli
+except ImportError:  # Optional: without it, clients get gzip
+    brotli = None
+
+COLUMNAR_FORMAT = 'columnar-v1'
+
+# Task row fields sent as an index into a per-field table of distinct values
+DICTIONARY_FIELDS = ('type', 'product', 'team', 'teamSkill', 'skill', 'shift', 'criticality')
+# Task row fields sent as whole minutes since the payload's epoch
+TIME_FIELDS = ('startTime', 'endTime')
+# Task row fields the client rebuilds: originalTaskId from taskId, the dependency lists from the task graph
+DERIVED_FIELDS = ('originalTaskId', 'dependencies', 'dynamic_predecessors', 'dynamic_successors')
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def _graph(nodes, node_index, adjacency):
+    """A {node: [nodes]} map as CSR lists over the node table: node i's entries are targets[offsets[i]:offsets[i + 1]]."""
+    offsets, targets = [0], []
+    for node in nodes:
+        targets.extend(node_index[target] for target in adjacency.get(node, ()))
+        offsets.append(len(targets))
+    return {'offsets': offsets, 'targets': targets}
+
+
+def columnar_scenario(payload):
+    """
+    The columnar form of a scenario payload (as built by get_scenario_data). Fields other
+    than tasks and the dependency maps are passed through unchanged. decodeColumnarScenario
+    in the dashboard script turns it back into the row form.
+    """
+    rows = payload.get('tasks', [])
+    encoded = {key: value for key, value in payload.items()
+               if key not in ('tasks', 'predecessors_map', 'successors_map')}
+    encoded['format'] = COLUMNAR_FORMAT
+
+    times = [datetime.fromisoformat(row[field]) for row in rows for field in TIME_FIELDS]
+    epoch = min(times).replace(second=0, microsecond=0) if times else datetime(2000, 1, 1)
+
+    fields = [field for field in (rows[0] if rows else {}) if field not in DERIVED_FIELDS]
+    dictionaries, columns, boolean_fields = {}, {}, []
+    for field in fields:
+        values = [row.get(field) for row in rows]
+        if field in DICTIONARY_FIELDS:
+            table = {}
+            columns[field] = [table.setdefault(value, len(table)) for value in values]
+            dictionaries[field] = list(table)
+        elif field in TIME_FIELDS:
+            columns[field] = [int((datetime.fromisoformat(value) - epoch).total_seconds() // 60) for value in values]
+        elif all(isinstance(value, bool) for value in values):
+            columns[field] = [int(value) for value in values]
+            boolean_fields.append(field)
+        else:
+            columns[field] = values
+
+    # Row dependency lists come from the result's own graph, the top-level maps from the current scheduler
+    row_predecessors = {row['originalTaskId']: row.get('dynamic_predecessors', []) for row in rows}
+    row_successors = {row['originalTaskId']: row.get('dynamic_successors', []) for row in rows}
+    served_predecessors = payload.get('predecessors_map', {})
+    served_successors = payload.get('successors_map', {})
+    nodes = {}
+    for adjacency in (row_predecessors, row_successors, served_predecessors, served_successors):
+        for node, targets in adjacency.items():
+            nodes.setdefault(node, None)
+            for target in targets:
+                nodes.setdefault(target, None)
+    nodes = list(nodes)
+    node_index = {node: i for i, node in enumerate(nodes)}
+
+    encoded['tasks'] = {
+        'count': len(rows),
+        'epoch': epoch.isoformat(),
+        'booleanFields': boolean_fields,
+        'dictionaries': dictionaries,
+        'columns': columns,
+    }
+    encoded['graph'] = {
+        'nodes': nodes,
+        'taskPredecessors': _graph(nodes, node_index, row_predecessors),
+        'taskSuccessors': _graph(nodes, node_index, row_successors),
+        'predecessors': _graph(nodes, node_index, served_predecessors),
+        'successors': _graph(nodes, node_index, served_successors),
+    }
+    return encoded
+
+
+def negotiate_encoding(accept_encoding):
+    """The best content coding a client accepts: br (when brotli is installed), then gzip, else identity."""
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    def acceptable(coding):
+        return accepted.get(coding, accepted.get('*', 0.0)) > 0
+
+    if brotli is not None and acceptable('br'):
+        return 'br'
+    if acceptable('gzip'):
+        return 'gzip'
+    return 'identity'
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=GZIP_LEVEL)
+    return body
+
+
+class EncodedBodyCache:
+    """
+    Serialized response bodies, per key, for one version of their source objects, with
+    each content coding compressed the first time a client asks for it. A body is rebuilt
+    when any source object is replaced (e.g. a scenario result republished). Each body
+    carries an ETag hashed from its content, so every process serving the same result
+    hands out the same tag.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key, sources, build, encoding='identity'):
+        """(body, etag) for key in the given encoding; build() returns the uncompressed bytes."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or len(entry['sources']) != len(sources) or any(
+                old is not new for old, new in zip(entry['sources'], sources)):
+            body = build()
+            entry = {'sources': tuple(sources), 'etag': hashlib.sha1(body).hexdigest()[:20],
+                     'bodies': {'identity': body}}
+            with self._lock:
+                self._entries[key] = entry
+        body = entry['bodies'].get(encoding)
+        if body is None:
+            body = compress(entry['bodies']['identity'], encoding)
+            entry['bodies'][encoding] = body
+        return body, entry['etag']
+
+    def evict(self, predicate):
+        """Drops the bodies whose key matches predicate(key)."""
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
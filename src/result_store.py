@@ -0,0 +1,142 @@
+# src/result_store.py
+# Persistent store for solved scenarios, saved what-if comparisons and mechanic assignments.
+# Entries are keyed by the input data hash, the solver profile and the scenario parameters,
+# so a restart on unchanged inputs reuses them instead of solving again.
+
+import hashlib
+import json
+import pickle
+import sqlite3
+import threading
+import zlib
+from datetime import datetime, timedelta
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    input_hash TEXT NOT NULL,
+    solver_profile TEXT NOT NULL,
+    params TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_key ON results (kind, name, input_hash, solver_profile, params, version);
+"""
+
+METADATA_COLUMNS = 'id, kind, name, input_hash, solver_profile, params, version, created_at, size_bytes'
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _params_key(params):
+    return json.dumps(params or {}, sort_keys=True, default=str)
+
+
+class ResultStore:
+    """
+    SQLite-backed store bound to one input hash and solver profile. Every save of the same
+    (kind, name, params) adds a new version; loads return the latest version for the
+    current inputs, so results computed from other data or another solver are never served.
+    """
+
+    def __init__(self, path, input_hash, solver_profile):
+        self.path = path
+        self.input_hash = input_hash
+        self.solver_profile = solver_profile
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript(SCHEMA)
+
+    def save(self, kind, name, payload, params=None):
+        """Store payload as the next version of (kind, name, params); returns the version."""
+        blob = zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+        key = (kind, name, self.input_hash, self.solver_profile, _params_key(params))
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                'SELECT MAX(version) FROM results WHERE kind=? AND name=? AND input_hash=? '
+                'AND solver_profile=? AND params=?', key).fetchone()
+            version = (row[0] or 0) + 1
+            self._conn.execute(
+                'INSERT INTO results (kind, name, input_hash, solver_profile, params, version, created_at, '
+                'size_bytes, payload) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                key + (version, datetime.now().isoformat(), len(blob), blob))
+        return version
+
+    def load(self, kind, name, params=None, version=None):
+        """Latest (or the given) version of (kind, name, params) for the current inputs, or None."""
+        query = ('SELECT payload FROM results WHERE kind=? AND name=? AND input_hash=? '
+                 'AND solver_profile=? AND params=?')
+        args = [kind, name, self.input_hash, self.solver_profile, _params_key(params)]
+        if version is not None:
+            query += ' AND version=?'
+            args.append(version)
+        with self._lock:
+            row = self._conn.execute(query + ' ORDER BY version DESC LIMIT 1', args).fetchone()
+        return pickle.loads(zlib.decompress(row[0])) if row else None
+
+    def load_all(self, kind):
+        """{name: payload} with the latest version of every entry of kind for the current inputs."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT name, payload FROM results WHERE kind=? AND input_hash=? AND solver_profile=? '
+                'ORDER BY version', (kind, self.input_hash, self.solver_profile)).fetchall()
+        return {name: pickle.loads(zlib.decompress(blob)) for name, blob in rows}
+
+    def list(self, kind=None, current_only=False):
+        """Metadata of the stored entries (no payloads), newest first."""
+        query, args = f'SELECT {METADATA_COLUMNS} FROM results WHERE 1=1', []
+        if kind:
+            query += ' AND kind=?'
+            args.append(kind)
+        if current_only:
+            query += ' AND input_hash=? AND solver_profile=?'
+            args += [self.input_hash, self.solver_profile]
+        with self._lock:
+            rows = self._conn.execute(query + ' ORDER BY created_at DESC', args).fetchall()
+        columns = [c.strip() for c in METADATA_COLUMNS.split(',')]
+        entries = [dict(zip(columns, row)) for row in rows]
+        for entry in entries:
+            entry['params'] = json.loads(entry['params'])
+            entry['current'] = (entry['input_hash'] == self.input_hash and
+                                entry['solver_profile'] == self.solver_profile)
+        return entries
+
+    def delete(self, entry_id):
+        with self._lock, self._conn:
+            return self._conn.execute('DELETE FROM results WHERE id=?', (entry_id,)).rowcount > 0
+
+    def prune(self, keep_versions=5, drop_stale=False, older_than_days=None):
+        """
+        Delete all but the newest keep_versions of every key; with drop_stale, everything
+        computed from other inputs or another solver profile; with older_than_days, anything older.
+        Returns the number of entries removed.
+        """
+        removed = 0
+        with self._lock, self._conn:
+            removed += self._conn.execute(
+                'DELETE FROM results WHERE id IN (SELECT id FROM (SELECT id, ROW_NUMBER() OVER ('
+                'PARTITION BY kind, name, input_hash, solver_profile, params ORDER BY version DESC) AS rank '
+                'FROM results) WHERE rank > ?)', (keep_versions,)).rowcount
+            if drop_stale:
+                removed += self._conn.execute(
+                    'DELETE FROM results WHERE input_hash != ? OR solver_profile != ?',
+                    (self.input_hash, self.solver_profile)).rowcount
+            if older_than_days is not None:
+                cutoff = (datetime.now() - timedelta(days=older_than_days)).isoformat()
+                removed += self._conn.execute('DELETE FROM results WHERE created_at < ?', (cutoff,)).rowcount
+        if removed:
+            with self._lock:
+                self._conn.execute('VACUUM')
+        return removed
@@ -0,0 +1,106 @@
+# src/scenario_history.py
+# Recent versions of each scenario as clients received them, and the differences between
+# two versions, so a dashboard holding an older version can catch up with a small delta
+# instead of downloading the whole scenario again.
+
+import hashlib
+import threading
+from collections import deque
+
+from src.json_provider import encode
+from src.scheduler import constraints
+from src.server_utils import scenario_payload
+
+# Versions kept per scenario; clients further behind get a full snapshot
+HISTORY_VERSIONS = 5
+MAP_KEYS = ('predecessors_map', 'successors_map')
+
+
+def scenario_version(payload):
+    """Content hash of a served payload, the same in every process serving it."""
+    return hashlib.sha1(encode(payload)).hexdigest()[:16]
+
+
+class ScenarioHistory:
+    """
+    The last HISTORY_VERSIONS served versions of each scenario: the payload sent to clients
+    (the result with the current scheduler's dependency maps) and its version. A version is
+    recorded the first time a result is served, so every version a client can hold is here
+    until it ages out.
+    """
+
+    def __init__(self, keep=HISTORY_VERSIONS):
+        self.keep = keep
+        self._lock = threading.Lock()
+        self._versions = {}
+
+    def current(self, scenario_id, result, scheduler):
+        """The entry ({'version', 'payload'}) for result as served with scheduler, recording it if new."""
+        with self._lock:
+            versions = self._versions.get(scenario_id)
+            last = versions[-1] if versions else None
+        if last is not None and last['result'] is result and last['scheduler'] is scheduler:
+            return last
+
+        payload = scenario_payload(result)
+        if scheduler:
+            payload['predecessors_map'], payload['successors_map'] = constraints.get_dependency_maps(scheduler)
+        entry = {'version': scenario_version(payload), 'payload': payload, 'result': result, 'scheduler': scheduler}
+        with self._lock:
+            versions = self._versions.setdefault(scenario_id, deque(maxlen=self.keep))
+            if versions and versions[-1]['version'] == entry['version']:
+                # Republished with the same content: same version, newer objects
+                versions[-1] = entry
+            else:
+                if versions:
+                    # Only the newest entry is matched by identity; older ones need not pin their result
+                    versions[-1] = {**versions[-1], 'result': None, 'scheduler': None}
+                versions.append(entry)
+        return entry
+
+    def find(self, scenario_id, version):
+        """The recorded entry of a version, or None once it has aged out (or was never served)."""
+        with self._lock:
+            for entry in self._versions.get(scenario_id, ()):
+                if entry['version'] == version:
+                    return entry
+        return None
+
+    def versions(self, scenario_id):
+        with self._lock:
+            return [entry['version'] for entry in self._versions.get(scenario_id, ())]
+
+
+def _map_delta(old, new):
+    """{node: new list} for every node whose list changed, None for nodes no longer in the map."""
+    delta = {node: targets for node, targets in new.items() if old.get(node) != targets}
+    delta.update({node: None for node in old.keys() - new.keys()})
+    return delta
+
+
+def diff_payloads(old, new):
+    """
+    What changed from one served payload to another: task rows added (whole rows), removed
+    (task ids) and changed (task id plus the changed fields only), the other top-level
+    values that changed (KPIs, products, capacities...) and the changed dependency entries.
+    """
+    old_rows = {row['taskId']: row for row in old.get('tasks', [])}
+    new_rows = {row['taskId']: row for row in new.get('tasks', [])}
+    changed = []
+    for task_id, row in new_rows.items():
+        previous = old_rows.get(task_id)
+        if previous is None or previous is row:
+            continue
+        fields = {field: value for field, value in row.items() if previous.get(field) != value}
+        if fields:
+            changed.append({'taskId': task_id, **fields})
+
+    skipped = ('tasks',) + MAP_KEYS
+    return {
+        'tasks': {'added': [row for task_id, row in new_rows.items() if task_id not in old_rows],
+                  'removed': [task_id for task_id in old_rows if task_id not in new_rows],
+                  'changed': changed},
+        'values': {key: value for key, value in new.items() if key not in skipped and old.get(key) != value},
+        'removedValues': sorted(key for key in old.keys() - new.keys() if key not in skipped),
+        'dependencies': {key: _map_delta(old.get(key, {}), new.get(key, {})) for key in MAP_KEYS},
+    }
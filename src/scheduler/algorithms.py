@@ -3,10 +3,19 @@
 from datetime import datetime, timedelta
 from collections import defaultdict
 import heapq
-from . import metrics
+from . import constraints, metrics, timeline
 
-def schedule_tasks(scheduler, allow_late_delivery=False, silent_mode=False):
-    """Schedule all task instances with proper error handling including customer inspections"""
+def schedule_tasks(scheduler, allow_late_delivery=False, silent_mode=False, priority_fn=None,
+                   frozen_horizon=None):
+    """
+    Serial schedule-generation scheme over all task instances, including customer inspections.
+    Tasks become ready when all their predecessors are placed (in-degree counters), the
+    ready set is a heap ordered by priority, and each task is placed at the earliest
+    quarter hour inside a shift where its team's capacity timeline has room.
+    priority_fn(scheduler, task_id) overrides calculate_task_priority (lower goes first).
+    frozen_horizon (horizon.split_frozen_horizon) keeps completed and frozen tasks where
+    they are and places everything else no earlier than its 'now'.
+    """
     original_debug = scheduler.debug
     if silent_mode:
         scheduler.debug = False
@@ -17,304 +26,202 @@ def schedule_tasks(scheduler, allow_late_delivery=False, silent_mode=False):
     if not silent_mode and not scheduler.validate_dag():
         raise ValueError("DAG validation failed!")
 
+    priority_fn = priority_fn or calculate_task_priority
     dynamic_constraints = scheduler.build_dynamic_dependencies()
-    start_date = datetime(2025, 8, 22, 6, 0)
-
-    constraints_by_second = defaultdict(list)
-    constraints_by_first = defaultdict(list)
+    origin = scheduler.start_date
 
-    for constraint in dynamic_constraints:
-        constraints_by_second[constraint['Second']].append(constraint)
-        constraints_by_first[constraint['First']].append(constraint)
-
-    all_tasks = set(scheduler.tasks.keys())
+    all_tasks = scheduler.tasks
     total_tasks = len(all_tasks)
-    ready_tasks = []
 
     if not silent_mode:
         print(f"\nStarting scheduling for {total_tasks} task instances...")
 
-    # Find initially ready tasks
-    tasks_with_incoming_constraints = set()
-    tasks_with_outgoing_constraints = set()
+    constraints_by_second = defaultdict(list)
+    successors = defaultdict(list)
+    in_degree = dict.fromkeys(all_tasks, 0)
+    undefined_tasks = set()
 
     for constraint in dynamic_constraints:
-        tasks_with_incoming_constraints.add(constraint['Second'])
-        tasks_with_outgoing_constraints.add(constraint['First'])
-
-    orphaned_tasks = all_tasks - tasks_with_incoming_constraints - tasks_with_outgoing_constraints
-
-    if not silent_mode and orphaned_tasks:
-        print(f"[DEBUG] Found {len(orphaned_tasks)} orphaned tasks with no constraints")
-
-    for task in orphaned_tasks:
-        priority = calculate_task_priority(scheduler, task)
-        heapq.heappush(ready_tasks, (priority, task))
-
-    tasks_with_only_outgoing = tasks_with_outgoing_constraints - tasks_with_incoming_constraints
-    for task in tasks_with_only_outgoing:
-        priority = calculate_task_priority(scheduler, task)
-        heapq.heappush(ready_tasks, (priority, task))
-
-    for task in tasks_with_incoming_constraints:
-        constraints = constraints_by_second.get(task, [])
-        has_blocking_constraints = False
-        for c in constraints:
-            rel = c['Relationship']
-            if rel in ['Finish <= Start', 'Finish = Start', 'Finish <= Finish']:
-                has_blocking_constraints = True
-                break
-        if not has_blocking_constraints:
-            priority = calculate_task_priority(scheduler, task)
-            heapq.heappush(ready_tasks, (priority, task))
+        first, second = constraint['First'], constraint['Second']
+        if first not in all_tasks or second not in all_tasks:
+            undefined_tasks.update(t for t in (first, second) if t not in all_tasks)
+            continue
+        constraints_by_second[second].append(constraint)
+        successors[first].append(second)
+        in_degree[second] += 1
 
-    if not silent_mode:
-        print(f"[DEBUG] Initial ready queue has {len(ready_tasks)} tasks")
+    if undefined_tasks and not silent_mode:
+        print(f"[WARNING] Ignoring constraints on {len(undefined_tasks)} undefined tasks: {sorted(undefined_tasks)[:10]}")
 
+    # One pass over the graph instead of a recursive walk per task
+    compute_critical_path_lengths(scheduler, successors)
+
+    timelines = timeline.build_timelines(scheduler)
+    calendars = timeline.CalendarSet(scheduler, origin)
+
+    # Start/end minutes of placed tasks for constraint evaluation
+    placed = {}
     scheduled_count = 0
-    max_iterations = total_tasks * 10
-    iteration_count = 0
-    failed_tasks = set()
-    task_retry_counts = defaultdict(int)
+    not_before = 0
+
+    if frozen_horizon:
+        not_before = frozen_horizon['now']
+        for group in ('completed', 'frozen'):
+            for task_id, entries in frozen_horizon[group].items():
+                for entry_id, entry in entries:
+                    scheduler.task_schedule[entry_id] = entry
+                    if group == 'frozen':
+                        task_info = all_tasks[task_id]
+                        if task_info.get('is_customer', False):
+                            resources = [entry.get('team')]
+                        else:
+                            resources = timeline.task_resources(scheduler, task_info)
+                        for resource in resources:
+                            if resource in timelines:
+                                timelines[resource].reserve(timeline.to_minutes(origin, entry['start_time']),
+                                                            timeline.to_minutes(origin, entry['end_time']),
+                                                            entry.get('mechanics_required') or 1)
+                placed[task_id] = (timeline.to_minutes(origin, entries[0][1]['start_time']),
+                                   timeline.to_minutes(origin, entries[-1][1]['end_time']))
+                scheduled_count += 1
+        for task_id in placed:
+            for dependent in successors.get(task_id, []):
+                in_degree[dependent] -= 1
 
-    # Track scheduling failures
+    ready_tasks = []
+    sequence = 0
+    for task_id, degree in in_degree.items():
+        if degree == 0 and task_id not in placed:
+            heapq.heappush(ready_tasks, (priority_fn(scheduler, task_id), sequence, task_id))
+            sequence += 1
+
+    if not silent_mode:
+        print(f"[DEBUG] Initial ready queue has {len(ready_tasks)} tasks")
+    failed_tasks = set()
     cannot_schedule = []
     far_future_schedules = []
+    far_future_limit = timeline.to_minutes(origin, datetime(2031, 1, 1))
 
-    while ready_tasks and scheduled_count < total_tasks and iteration_count < max_iterations:
-        iteration_count += 1
-
-        if not ready_tasks:
-            for task in all_tasks:
-                if task in scheduler.task_schedule or task in failed_tasks:
-                    continue
-
-                all_predecessors_scheduled = True
-                for constraint in constraints_by_second.get(task, []):
-                    if constraint['First'] not in scheduler.task_schedule:
-                        all_predecessors_scheduled = False
-                        break
-
-                if all_predecessors_scheduled:
-                    priority = calculate_task_priority(scheduler, task)
-                    heapq.heappush(ready_tasks, (priority, task))
-
-            if not ready_tasks:
-                if not silent_mode:
-                    unscheduled = [t for t in all_tasks if t not in scheduler.task_schedule and t not in failed_tasks]
-                    print(f"[WARNING] No ready tasks but {len(unscheduled)} tasks remain unscheduled")
-                break
-
-        priority, task_instance_id = heapq.heappop(ready_tasks)
-
-        if task_retry_counts[task_instance_id] >= 3:
-            if task_instance_id not in failed_tasks:
-                failed_tasks.add(task_instance_id)
-                if not silent_mode:
-                    print(f"[ERROR] Task {task_instance_id} failed after 3 retries")
-            continue
+    while ready_tasks:
+        priority, _, task_instance_id = heapq.heappop(ready_tasks)
 
-        task_info = scheduler.tasks[task_instance_id]
-        duration = task_info['duration']
+        task_info = all_tasks[task_instance_id]
+        duration = int(task_info['duration'])
         mechanics_needed = task_info['mechanics_required']
         is_quality = task_info['is_quality']
         is_customer = task_info.get('is_customer', False)
-        task_type = task_info['task_type']
         product = task_info.get('product', 'Unknown')
 
-        earliest_start = start_date
-        latest_start_constraint = None
-
+        earliest_start = not_before
         if task_instance_id in scheduler.late_part_tasks:
-            earliest_start = get_earliest_start_for_late_part(scheduler, task_instance_id)
+            earliest_start = max(earliest_start, timeline.to_minutes(
+                origin, get_earliest_start_for_late_part(scheduler, task_instance_id)))
 
+        start_equal_to = None
         for constraint in constraints_by_second.get(task_instance_id, []):
-            first_task = constraint['First']
+            first_start, first_end = placed[constraint['First']]
             relationship = constraint['Relationship']
 
-            if first_task in scheduler.task_schedule:
-                first_schedule = scheduler.task_schedule[first_task]
+            if relationship in ('Start <= Start', 'Start = Start'):
+                constraint_time = first_start
+            elif relationship == 'Finish <= Finish':
+                constraint_time = first_end - duration
+            elif relationship == 'Start <= Finish':
+                constraint_time = first_start - duration
+            else:
+                constraint_time = first_end
 
-                if relationship == 'Finish <= Start':
-                    constraint_time = first_schedule['end_time']
-                elif relationship == 'Finish = Start':
-                    constraint_time = first_schedule['end_time']
-                elif relationship == 'Start <= Start' or relationship == 'Start = Start':
-                    constraint_time = first_schedule['start_time']
-                elif relationship == 'Finish <= Finish':
-                    constraint_time = first_schedule['end_time'] - timedelta(minutes=duration)
-                elif relationship == 'Start <= Finish':
-                    constraint_time = first_schedule['start_time'] - timedelta(minutes=duration)
-                else:
-                    constraint_time = first_schedule['end_time']
-
-                earliest_start = max(earliest_start, constraint_time)
-
-                if relationship == 'Start = Start':
-                    latest_start_constraint = first_schedule['start_time']
-
-        if latest_start_constraint:
-            earliest_start = latest_start_constraint
-
-        try:
-            if is_customer:
-                # Find any available customer team
-                best_team = None
-                best_start_time = None
-                best_shift = None
-                earliest_available = datetime.max
-
-                # Try each customer team to find the earliest available slot
-                for team, capacity in scheduler.customer_team_capacity.items():
-                    if capacity >= mechanics_needed:
-                        result = get_next_working_time_with_capacity(
-                            scheduler, earliest_start, product, team,
-                            mechanics_needed, duration, is_quality=False, is_customer=True
-                        )
-
-                        if result and result[0] and result[0] < earliest_available:
-                            earliest_available = result[0]
-                            best_team = team
-                            best_start_time = result[0]
-                            best_shift = result[1]
-
-                if not best_team or not best_start_time:
-                    cannot_schedule.append(task_instance_id)
-                    task_retry_counts[task_instance_id] += 1
-                    if task_retry_counts[task_instance_id] < 3:
-                        heapq.heappush(ready_tasks, (priority + 0.1, task_instance_id))
-                    else:
-                        failed_tasks.add(task_instance_id)
-                        if not silent_mode:
-                            print(f"[FAILED] Cannot find slot for customer task {task_instance_id}")
-                    continue
-
-                scheduled_start = best_start_time
-                shift = best_shift
-                team_for_schedule = best_team
-                base_team_for_schedule = best_team
-
-            elif is_quality:
-                base_mechanic_team = task_info.get('team', '')
-                quality_team = scheduler.map_mechanic_to_quality_team(base_mechanic_team)
-
-                if not quality_team:
-                    print(f"[ERROR] Quality task {task_instance_id} has no team assigned!")
-                    if task_instance_id in scheduler.quality_inspections:
-                        primary_task_id = scheduler.quality_inspections[task_instance_id].get('primary_task')
-                        if primary_task_id and primary_task_id in scheduler.tasks:
-                            primary_team = scheduler.tasks[primary_task_id].get('team')
-                            quality_team = scheduler.map_mechanic_to_quality_team(primary_team)
-                            if quality_team:
-                                task_info['team'] = primary_team
-                                print(f"[RECOVERY] Assigned {quality_team} to {task_instance_id}")
-
-                    if not quality_team:
-                        task_retry_counts[task_instance_id] += 1
-                        if task_retry_counts[task_instance_id] < 3:
-                            heapq.heappush(ready_tasks, (priority + 0.1, task_instance_id))
-                        continue
-
-                result = get_next_working_time_with_capacity(
-                    scheduler, earliest_start, product, quality_team,
-                    mechanics_needed, duration, is_quality=True, is_customer=False)
-
-                if result is None or result[0] is None:
-                    cannot_schedule.append(task_instance_id)
-                    task_retry_counts[task_instance_id] += 1
-                    if task_retry_counts[task_instance_id] < 3:
-                        heapq.heappush(ready_tasks, (priority + 0.1, task_instance_id))
-                    else:
-                        failed_tasks.add(task_instance_id)
-                        if not silent_mode:
-                            print(f"[FAILED] Cannot find slot for quality task {task_instance_id}")
-                    continue
-
-                scheduled_start, shift = result
-                team_for_schedule = quality_team
-                base_team_for_schedule = quality_team
+            earliest_start = max(earliest_start, constraint_time)
+            if relationship == 'Start = Start':
+                start_equal_to = first_start
 
+        if start_equal_to is not None:
+            earliest_start = start_equal_to
+
+        # Resources held besides the scheduling team (the inspected mechanic team for QIs)
+        shared_resources = []
+        if is_customer:
+            # Keep an assigned customer team; otherwise take whichever team is free first
+            if task_info.get('team') in scheduler.customer_team_capacity:
+                candidate_teams = [task_info['team']]
             else:
-                team_for_scheduling = task_info.get('team_skill', task_info['team'])
-
-                if '(' in team_for_scheduling and ')' in team_for_scheduling:
-                    base_team = team_for_scheduling.split(' (')[0].strip()
-                else:
-                    base_team = task_info.get('team', team_for_scheduling)
-
-                result = get_next_working_time_with_capacity(
-                    scheduler, earliest_start, product, team_for_scheduling,
-                    mechanics_needed, duration, is_quality=False, is_customer=False)
-
-                if result is None or result[0] is None:
-                    cannot_schedule.append(task_instance_id)
-                    task_retry_counts[task_instance_id] += 1
-                    if task_retry_counts[task_instance_id] < 3:
-                        heapq.heappush(ready_tasks, (priority + 0.1, task_instance_id))
-                    else:
-                        failed_tasks.add(task_instance_id)
-                        if not silent_mode:
-                            print(f"[FAILED] Cannot find slot for mechanic task {task_instance_id}")
-                    continue
-
-                scheduled_start, shift = result
-                team_for_schedule = team_for_scheduling
-                base_team_for_schedule = base_team
-
-            # Check if scheduled to far future (year 7501 problem)
-            if scheduled_start.year > 2030:
-                far_future_schedules.append(task_instance_id)
-                failed_tasks.add(task_instance_id)
-                if not silent_mode:
-                    print(
-                        f"[ERROR] Task {task_instance_id} scheduled to year {scheduled_start.year} - marking as failed")
+                candidate_teams = [team for team, capacity in scheduler.customer_team_capacity.items()
+                                   if capacity >= mechanics_needed]
+        elif is_quality:
+            quality_team = scheduler.map_mechanic_to_quality_team(task_info.get('team', ''))
+            if not quality_team and task_instance_id in scheduler.quality_inspections:
+                primary_task_id = scheduler.quality_inspections[task_instance_id].get('primary_task')
+                if primary_task_id and primary_task_id in all_tasks:
+                    primary_team = all_tasks[primary_task_id].get('team')
+                    quality_team = scheduler.map_mechanic_to_quality_team(primary_team)
+                    if quality_team:
+                        task_info['team'] = primary_team
+                        print(f"[RECOVERY] Assigned {quality_team} to {task_instance_id}")
+            candidate_teams = [quality_team] if quality_team else []
+            shared_resources = [r for r in timeline.task_resources(scheduler, task_info)[1:] if r in timelines]
+        else:
+            candidate_teams = [task_info.get('team_skill', task_info['team'])]
+
+        best_team, best_start, best_shift = None, None, None
+        for team in candidate_teams:
+            if team not in timelines:
                 continue
+            team_timelines = [timelines[team]] + [timelines[r] for r in shared_resources]
+            slot_start, slot_shift = timeline.find_slot(team_timelines, calendars.get(team, product),
+                                                        earliest_start, duration, mechanics_needed)
+            if slot_start is not None and (best_start is None or slot_start < best_start):
+                best_team, best_start, best_shift = team, slot_start, slot_shift
+
+        if best_team is None:
+            cannot_schedule.append(task_instance_id)
+            failed_tasks.add(task_instance_id)
+            if not silent_mode:
+                kind = 'customer' if is_customer else 'quality' if is_quality else 'mechanic'
+                print(f"[FAILED] Cannot find slot for {kind} task {task_instance_id}")
+            continue
 
-            scheduled_end = scheduled_start + timedelta(minutes=int(duration))
-
-            scheduler.task_schedule[task_instance_id] = {
-                'start_time': scheduled_start,
-                'end_time': scheduled_end,
-                'team': base_team_for_schedule,
-                'team_skill': team_for_schedule,
-                'skill': task_info.get('skill'),
-                'product': product,
-                'duration': duration,
-                'mechanics_required': mechanics_needed,
-                'is_quality': is_quality,
-                'is_customer': is_customer,
-                'task_type': task_type,
-                'shift': shift,
-                'original_task_id': scheduler.instance_to_original_task.get(task_instance_id)
-            }
-
-            scheduled_count += 1
-
-            # Add newly ready tasks
-            for constraint in constraints_by_first.get(task_instance_id, []):
-                dependent = constraint['Second']
-                if dependent in scheduler.task_schedule or dependent in failed_tasks:
-                    continue
-
-                all_satisfied = True
-                for dep_constraint in constraints_by_second.get(dependent, []):
-                    predecessor = dep_constraint['First']
-                    if predecessor not in scheduler.task_schedule:
-                        all_satisfied = False
-                        break
-
-                if all_satisfied and dependent not in [t[1] for t in ready_tasks]:
-                    dep_priority = calculate_task_priority(scheduler, dependent)
-                    heapq.heappush(ready_tasks, (dep_priority, dependent))
-
-        except Exception as e:
-            if scheduler.debug:
-                print(f"[ERROR] Failed to schedule {task_instance_id}: {str(e)}")
-            task_retry_counts[task_instance_id] += 1
-            if task_retry_counts[task_instance_id] < 3:
-                heapq.heappush(ready_tasks, (priority + 0.1, task_instance_id))
-            else:
-                failed_tasks.add(task_instance_id)
+        if best_start >= far_future_limit:
+            far_future_schedules.append(task_instance_id)
+            failed_tasks.add(task_instance_id)
+            if not silent_mode:
+                print(f"[ERROR] Task {task_instance_id} scheduled beyond 2030 - marking as failed")
+            continue
+
+        best_end = best_start + duration
+        for resource in [best_team] + shared_resources:
+            timelines[resource].reserve(best_start, best_end, mechanics_needed)
+        placed[task_instance_id] = (best_start, best_end)
+
+        if is_customer or is_quality:
+            base_team = best_team
+        elif '(' in best_team and ')' in best_team:
+            base_team = best_team.split(' (')[0].strip()
+        else:
+            base_team = task_info.get('team', best_team)
+
+        scheduler.task_schedule[task_instance_id] = {
+            'start_time': timeline.to_datetime(origin, best_start),
+            'end_time': timeline.to_datetime(origin, best_end),
+            'team': base_team,
+            'team_skill': best_team,
+            'skill': task_info.get('skill'),
+            'product': product,
+            'duration': task_info['duration'],
+            'mechanics_required': mechanics_needed,
+            'is_quality': is_quality,
+            'is_customer': is_customer,
+            'task_type': task_info['task_type'],
+            'shift': best_shift,
+            'original_task_id': scheduler.instance_to_original_task.get(task_instance_id)
+        }
+        scheduled_count += 1
+
+        # Release successors whose last predecessor was just placed
+        for dependent in successors.get(task_instance_id, []):
+            in_degree[dependent] -= 1
+            if in_degree[dependent] == 0 and dependent not in placed:
+                heapq.heappush(ready_tasks, (priority_fn(scheduler, dependent), sequence, dependent))
+                sequence += 1
 
     if not silent_mode:
         print(f"\n[DEBUG] Scheduling complete! Actually scheduled {scheduled_count}/{total_tasks} task instances.")
@@ -328,6 +235,10 @@ def schedule_tasks(scheduler, allow_late_delivery=False, silent_mode=False):
             if far_future_schedules:
                 print(f"[WARNING] {len(far_future_schedules)} tasks scheduled to far future (>2030)")
 
+            blocked = [t for t, degree in in_degree.items() if degree > 0]
+            if blocked:
+                print(f"[WARNING] {len(blocked)} tasks are blocked by unscheduled predecessors")
+
             unscheduled_list = [t for t in all_tasks if t not in scheduler.task_schedule][:10]
             print(f"[DEBUG] First 10 unscheduled tasks: {unscheduled_list}")
 
@@ -346,104 +257,35 @@ def get_earliest_start_for_late_part(scheduler, task_instance_id):
 
 def get_next_working_time_with_capacity(scheduler, current_time, product_line, team,
                                         mechanics_needed, duration, is_quality=False, is_customer=False):
-    """Find next available working time with sufficient team capacity"""
+    """Find next available working time with sufficient team capacity against the current task_schedule"""
 
-    # Get capacity and shifts based on team type
+    # Get capacity based on team type
     if is_customer:
         capacity = scheduler.customer_team_capacity.get(team, 0)
-        shifts = scheduler.customer_team_shifts.get(team, ['1st'])
     elif is_quality:
         capacity = scheduler.quality_team_capacity.get(team, 0)
-        shifts = scheduler.quality_team_shifts.get(team, ['1st'])
     else:
         capacity = scheduler.team_capacity.get(team, 0)
-        base_team = team.split('(')[0].strip() if '(' in team else team
-        shifts = scheduler.team_shifts.get(base_team, scheduler.team_shifts.get(team, ['1st']))
 
     if capacity == 0 or mechanics_needed > capacity:
         return None, None
 
-    # Start from current time
-    search_time = current_time
-    max_days_ahead = 30
-
-    for days_ahead in range(max_days_ahead):
-        check_date = (current_time + timedelta(days=days_ahead)).replace(
-            hour=0, minute=0, second=0, microsecond=0)
-
-        if not scheduler.is_working_day(check_date, product_line):
-            continue
-
-        for shift in shifts:
-            shift_info = scheduler.shift_hours.get(shift)
-            if not shift_info:
-                continue
-
-            start_hour, start_min = scheduler._parse_shift_time(shift_info['start'])
-            end_hour, end_min = scheduler._parse_shift_time(shift_info['end'])
-
-            # Calculate shift boundaries
-            if shift == '3rd':
-                # 3rd shift: 23:00 today to 6:00 tomorrow
-                shift_start = check_date.replace(hour=23, minute=0)
-                shift_end = (check_date + timedelta(days=1)).replace(hour=6, minute=0)
-
-                # Special case: if we're checking today and current time is 0:00-6:00,
-                # check if we're still in yesterday's 3rd shift
-                if days_ahead == 0 and current_time.hour < 6:
-                    # We're in the tail end of yesterday's 3rd shift
-                    shift_start = (check_date - timedelta(days=1)).replace(hour=23, minute=0)
-                    shift_end = check_date.replace(hour=6, minute=0)
-            else:
-                shift_start = check_date.replace(hour=start_hour, minute=start_min)
-                shift_end = check_date.replace(hour=end_hour, minute=end_min)
-
-            # Skip if shift already ended
-            if shift_end <= current_time:
-                continue
-
-            # Find earliest possible start within this shift
-            earliest_in_shift = max(shift_start, current_time)
-
-            # Round up to next 15-minute mark
-            minutes = earliest_in_shift.minute
-            if minutes % 15 != 0:
-                rounded_minutes = ((minutes // 15) + 1) * 15
-                if rounded_minutes >= 60:
-                    earliest_in_shift = earliest_in_shift.replace(minute=0) + timedelta(hours=1)
-                else:
-                    earliest_in_shift = earliest_in_shift.replace(minute=rounded_minutes)
-
-            # Check if task fits in shift
-            task_end = earliest_in_shift + timedelta(minutes=duration)
-            if task_end > shift_end:
-                continue
-
-            # Check capacity
-            conflicts = 0
-            for task_id, schedule in scheduler.task_schedule.items():
-                # Check if same team (considering all team types)
-                scheduled_team = schedule.get('team_skill', schedule.get('team'))
-
-                # For customer teams, check against team directly
-                if is_customer:
-                    if scheduled_team == team:
-                        # Check for time overlap
-                        if (schedule['start_time'] < task_end and
-                                schedule['end_time'] > earliest_in_shift):
-                            conflicts += schedule.get('mechanics_required', 1)
-                else:
-                    # For mechanic and quality teams, check team_skill or team
-                    if scheduled_team == team or (not is_quality and schedule.get('team') == team):
-                        # Check for time overlap
-                        if (schedule['start_time'] < task_end and
-                                schedule['end_time'] > earliest_in_shift):
-                            conflicts += schedule.get('mechanics_required', 1)
-
-            if capacity - conflicts >= mechanics_needed:
-                return earliest_in_shift, shift
-
-    return None, None
+    origin = scheduler.start_date
+    team_timeline = timeline.CapacityTimeline(capacity)
+    for schedule in scheduler.task_schedule.values():
+        if schedule.get('team_skill', schedule.get('team')) == team or \
+                (not is_customer and not is_quality and schedule.get('team') == team):
+            team_timeline.reserve(timeline.to_minutes(origin, schedule['start_time']),
+                                  timeline.to_minutes(origin, schedule['end_time']),
+                                  schedule.get('mechanics_required', 1))
+
+    calendar = timeline.TeamCalendar(scheduler, team, product_line, origin)
+    start_minute, shift = timeline.find_slot([team_timeline], calendar,
+                                             max(0, timeline.to_minutes(origin, current_time)),
+                                             int(duration), mechanics_needed)
+    if start_minute is None:
+        return None, None
+    return timeline.to_datetime(origin, start_minute), shift
 
 def check_constraint_satisfied(scheduler, first_schedule, second_schedule, relationship):
     """Check if a scheduling constraint is satisfied between two tasks"""
@@ -600,12 +442,7 @@ def calculate_task_priority(scheduler, task_instance_id):
     # For rework tasks, consider when the dependent tasks need them
     if original_task_id in scheduler.rework_tasks:
         # Find all tasks that depend on this rework
-        dynamic_constraints = scheduler.build_dynamic_dependencies()
-        dependent_tasks = []
-
-        for constraint in dynamic_constraints:
-            if constraint['First'] == original_task_id:
-                dependent_tasks.append(constraint['Second'])
+        dependent_tasks = scheduler.get_successors(original_task_id)
 
         if dependent_tasks:
             # Calculate the earliest dependent task's priority
@@ -678,28 +515,35 @@ def classify_task_criticality(scheduler, task_instance_id):
     else:
         return 'FLEXIBLE'  # Can spread out safely
 
+def compute_critical_path_lengths(scheduler, successors=None):
+    """
+    Fill scheduler._critical_path_cache with the longest duration path from every task
+    to the end of the network, in one reverse topological pass.
+    """
+    if successors is None:
+        successors, _ = constraints.get_dependency_index(scheduler)
+
+    in_degree = defaultdict(int)
+    for task, task_successors in successors.items():
+        for successor in task_successors:
+            in_degree[successor] += 1
+
+    order = [t for t in scheduler.tasks if in_degree[t] == 0]
+    for task in order:
+        for successor in successors.get(task, []):
+            in_degree[successor] -= 1
+            if in_degree[successor] == 0:
+                order.append(successor)
+
+    cache = scheduler._critical_path_cache
+    for task in reversed(order):
+        longest_successor = max((cache.get(s, 0) for s in successors.get(task, []) if s in scheduler.tasks),
+                                default=0)
+        cache[task] = scheduler.tasks[task]['duration'] + longest_successor
+    return cache
+
 def calculate_critical_path_length(scheduler, task_instance_id):
     """Calculate critical path length from this task"""
-    if task_instance_id in scheduler._critical_path_cache:
-        return scheduler._critical_path_cache[task_instance_id]
-
-    dynamic_constraints = scheduler.build_dynamic_dependencies()
-
-    def get_path_length(task):
-        if task in scheduler._critical_path_cache:
-            return scheduler._critical_path_cache[task]
-
-        max_successor_path = 0
-        task_duration = scheduler.tasks[task]['duration']
-
-        for constraint in dynamic_constraints:
-            if constraint['First'] == task:
-                successor = constraint['Second']
-                if successor in scheduler.tasks:
-                    successor_path = get_path_length(successor)
-                    max_successor_path = max(max_successor_path, successor_path)
-
-        scheduler._critical_path_cache[task] = task_duration + max_successor_path
-        return scheduler._critical_path_cache[task]
-
-    return get_path_length(task_instance_id)
+    if task_instance_id not in scheduler._critical_path_cache:
+        compute_critical_path_lengths(scheduler)
+    return scheduler._critical_path_cache.get(task_instance_id, scheduler.tasks[task_instance_id]['duration'])
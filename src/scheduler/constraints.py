@@ -117,23 +117,33 @@ def add_chained_dependency(predecessor_id, successor_id, relationship, product,
             'Relationship': relationship, 'Product': product
         })
 
-def get_successors(scheduler, task_id):
-    """Get all immediate successor tasks for a given task"""
-    successors = []
+def get_dependency_index(scheduler):
+    """
+    Successor and predecessor lists per task instance, built once per set of
+    dynamic constraints so lookups do not rescan the whole constraint list.
+    """
     dynamic_constraints = build_dynamic_dependencies(scheduler)
+    if scheduler._dependency_index is not None and scheduler._dependency_index[0] is dynamic_constraints:
+        return scheduler._dependency_index[1], scheduler._dependency_index[2]
+
+    successors = defaultdict(list)
+    predecessors = defaultdict(list)
     for constraint in dynamic_constraints:
-        if constraint['First'] == task_id:
-            successors.append(constraint['Second'])
-    return successors
+        successors[constraint['First']].append(constraint['Second'])
+        predecessors[constraint['Second']].append(constraint['First'])
+
+    scheduler._dependency_index = (dynamic_constraints, successors, predecessors)
+    return successors, predecessors
+
+def get_successors(scheduler, task_id):
+    """Get all immediate successor tasks for a given task"""
+    successors, _ = get_dependency_index(scheduler)
+    return list(successors.get(task_id, []))
 
 def get_predecessors(scheduler, task_id):
     """Get all immediate predecessor tasks for a given task"""
-    predecessors = []
-    dynamic_constraints = build_dynamic_dependencies(scheduler)
-    for constraint in dynamic_constraints:
-        if constraint['Second'] == task_id:
-            predecessors.append(constraint['First'])
-    return predecessors
+    _, predecessors = get_dependency_index(scheduler)
+    return list(predecessors.get(task_id, []))
 
 def get_dependency_maps(scheduler):
     """
@@ -1,36 +1,69 @@
 # src/scheduler/cp_sat_solver.py
 # This file contains the new CP-SAT based scheduling algorithm.
 
+import time
 from ortools.sat.python import cp_model
 from datetime import datetime, timedelta
 from collections import defaultdict
+from . import shifts
+
+# Longest time spent turning a partial solution hint into a complete one; never more than
+# half of a solve's time limit, which it counts against
+HINT_COMPLETION_SECONDS = 10.0
+
+class _SolutionPublisher(cp_model.CpSolverSolutionCallback):
+    """Hands every improving solution found during the search to a callback."""
+
+    def __init__(self, cp_scheduler, on_solution):
+        super().__init__()
+        self.cp_scheduler = cp_scheduler
+        self.on_solution = on_solution
+        self.solution_count = 0
+
+    def on_solution_callback(self):
+        self.solution_count += 1
+        objective = self.ObjectiveValue()
+        print(f"[INFO] CP-SAT solution #{self.solution_count}: objective {objective} after {self.WallTime():.1f}s")
+        try:
+            self.on_solution(self.cp_scheduler._extract_solution(self, silent=True), objective)
+        except Exception as e:
+            print(f"[WARNING] Solution callback failed: {e}")
+
 
 class CpSatScheduler:
     """
     A scheduler that uses Google's CP-SAT solver to find an optimal schedule.
     """
-    def __init__(self, scheduler_instance):
+    def __init__(self, scheduler_instance, frozen_horizon=None):
         """
         Initializes the CpSatScheduler.
         Args:
             scheduler_instance: An instance of the main Scheduler class, containing all task and resource data.
+            frozen_horizon: Optional horizon.split_frozen_horizon() result. Completed tasks are left
+                out of the model, frozen tasks become constants and free tasks start no earlier than now.
         """
         self.scheduler = scheduler_instance
+        self.frozen_horizon = frozen_horizon
         self.model = cp_model.CpModel()
         self.task_vars = defaultdict(list)
         self.horizon = 0
         self.working_intervals = []
-
-    def _get_non_working_intervals(self):
+        self.team_working_windows = {}
+        self._common_holidays = None
+        # Outcome of the last solve()
+        self.status_name = None
+        self.objective_value = None
+        self.best_bound = None
+        # Solver holding the completed warm-start hint, once build_model() has completed one
+        self.hint_solution = None
+
+    def _get_common_holidays(self):
         """
-        Calculates non-working intervals (weekends and holidays for all products).
-        Returns a list of (start_minute, end_minute) tuples.
+        A day is a holiday if it's a holiday for ALL product lines.
         """
-        non_working_intervals = []
-        start_date = self.scheduler.start_date
-        horizon_days = self.horizon // (24 * 60)
+        if self._common_holidays is not None:
+            return self._common_holidays
 
-        # A day is a holiday if it's a holiday for ALL product lines.
         all_product_lines = self.scheduler.delivery_dates.keys()
         if not all_product_lines:
             common_holidays = set()
@@ -43,18 +76,27 @@ class CpSatScheduler:
                 product_holidays = set(d.date() for d in self.scheduler.holidays.get(product, []))
                 common_holidays.intersection_update(product_holidays)
 
+        self._common_holidays = common_holidays
+        return common_holidays
+
+    def _is_working_day(self, date):
+        """Weekdays that are not a common holiday of all product lines."""
+        # Check for weekends (Saturday=5, Sunday=6)
+        return date.weekday() < 5 and date.date() not in self._get_common_holidays()
+
+    def _get_non_working_intervals(self):
+        """
+        Calculates non-working intervals (weekends and holidays for all products).
+        Returns a list of (start_minute, end_minute) tuples.
+        """
+        non_working_intervals = []
+        start_date = self.scheduler.start_date
+        horizon_days = self.horizon // (24 * 60)
+
         for day_offset in range(horizon_days + 1):
             current_date = start_date + timedelta(days=day_offset)
-            is_non_working = False
-
-            # Check for weekends (Saturday=5, Sunday=6)
-            if current_date.weekday() >= 5:
-                is_non_working = True
-            # Check for common holidays
-            elif current_date.date() in common_holidays:
-                is_non_working = True
 
-            if is_non_working:
+            if not self._is_working_day(current_date):
                 # Non-working day is a 24-hour interval
                 start_minute = day_offset * 24 * 60
                 end_minute = start_minute + 24 * 60
@@ -80,13 +122,50 @@ class CpSatScheduler:
 
         return working_intervals
 
-    def _add_interval_in_working_time_constraint(self, interval, start_var, end_var):
+    def _get_team_working_windows(self, team):
+        """
+        Expands the team's compiled shifts into (start_minute, end_minute, shift_name)
+        windows over the horizon. Cached per team for the lifetime of the model.
+        """
+        if team not in self.team_working_windows:
+            self.team_working_windows[team] = shifts.get_working_windows_in_minutes(
+                self.scheduler, team, self.scheduler.start_date, self.horizon, self._is_working_day)
+        return self.team_working_windows[team]
+
+    def _get_resource_team(self, task_info):
+        """The team whose shift calendar a task must follow."""
+        if task_info.get('is_quality', False) or task_info.get('is_customer', False):
+            return task_info.get('team')
+        return task_info.get('team_skill') or task_info.get('team')
+
+    def _get_task_windows(self, task_info):
+        """Working windows (start_minute, end_minute) for a task, falling back to whole working days."""
+        team = self._get_resource_team(task_info)
+        windows = [(w_start, w_end) for w_start, w_end, _ in self._get_team_working_windows(team)] if team else []
+        return windows or self.working_intervals
+
+    def _new_start_var_in_windows(self, windows, duration, name):
+        """
+        Creates a start variable whose domain only allows a fixed-duration task to fit
+        entirely inside one window, avoiding a boolean per window.
+        """
+        allowed_starts = [[w_start, w_end - duration] for w_start, w_end in windows if w_end - w_start >= duration]
+        if not allowed_starts and windows is not self.working_intervals:
+            print(f"[WARNING] {name}: no shift window holds {duration} minutes; "
+                  f"falling back to whole working days. Check the team's shift data.")
+            allowed_starts = [[w_start, w_end - duration] for w_start, w_end in self.working_intervals
+                              if w_end - w_start >= duration]
+        if not allowed_starts:
+            raise ValueError(f"{name}: no working time in the horizon can hold {duration} minutes")
+        return self.model.NewIntVarFromDomain(cp_model.Domain.FromIntervals(allowed_starts), name)
+
+    def _add_interval_in_working_time_constraint(self, interval, start_var, end_var, windows=None):
         """
         Adds a constraint to the model ensuring that the given interval variable
-        is fully contained within one of the working_intervals.
+        is fully contained within one of the working windows (default: working_intervals).
         """
         bool_vars = []
-        for i, (w_start, w_end) in enumerate(self.working_intervals):
+        for i, (w_start, w_end) in enumerate(windows or self.working_intervals):
             b = self.model.NewBoolVar(f'{interval.Name()}_in_w_interval_{i}')
             # An interval is contained if its start is >= working start AND its end is <= working end.
             self.model.Add(start_var >= w_start).OnlyEnforceIf(b)
@@ -115,8 +194,18 @@ class CpSatScheduler:
         print("[INFO] Creating CP-SAT task variables with splitting logic...")
         self.working_intervals = self._get_working_intervals()
 
+        completed = self.frozen_horizon['completed'] if self.frozen_horizon else {}
+        frozen = self.frozen_horizon['frozen'] if self.frozen_horizon else {}
+
         for task_id, task_info in self.scheduler.tasks.items():
+            if task_id in completed:
+                continue
+            if task_id in frozen:
+                self._add_frozen_task(task_id, frozen[task_id])
+                continue
+
             duration = int(task_info['duration'])
+            windows = self._get_task_windows(task_info)
 
             if duration >= 120:  # Task is splittable
                 # Durations for part 1 and 2 must be at least 1 hour (60 min)
@@ -141,21 +230,39 @@ class CpSatScheduler:
                 self.task_vars[task_id].append({'start': start1, 'end': end1, 'interval': interval1, 'duration': duration1, 'part': 1})
                 self.task_vars[task_id].append({'start': start2, 'end': end2, 'interval': interval2, 'duration': duration2, 'part': 2})
 
-                # Each part must be fully contained within a working interval
-                self._add_interval_in_working_time_constraint(interval1, start1, end1)
-                self._add_interval_in_working_time_constraint(interval2, start2, end2)
+                # Each part must be fully contained within one of the team's shift windows
+                self._add_interval_in_working_time_constraint(interval1, start1, end1, windows)
+                self._add_interval_in_working_time_constraint(interval2, start2, end2, windows)
 
             else:  # Non-splittable task
-                start_var = self.model.NewIntVar(0, self.horizon, f'{task_id}_start')
+                # The entire task must be contained in a single shift window of its team
+                start_var = self._new_start_var_in_windows(windows, duration, f'{task_id}_start')
                 end_var = self.model.NewIntVar(0, self.horizon, f'{task_id}_end')
                 interval_var = self.model.NewIntervalVar(start_var, duration, end_var, f'{task_id}_interval')
 
                 self.task_vars[task_id].append({'start': start_var, 'end': end_var, 'interval': interval_var, 'duration': duration, 'part': 0})
 
-                # The entire task must be contained in a single working interval
-                self._add_interval_in_working_time_constraint(interval_var, start_var, end_var)
+            if self.frozen_horizon:
+                # Work that has not started cannot be planned in the past
+                self.model.Add(self.task_vars[task_id][0]['start'] >= self.frozen_horizon['now'])
 
-        print(f"[INFO] Created variables for {len(self.task_vars)} tasks.")
+        print(f"[INFO] Created variables for {len(self.task_vars)} tasks"
+              + (f" ({len(frozen)} frozen, {len(completed)} completed left out)." if self.frozen_horizon else "."))
+
+    def _add_frozen_task(self, task_id, entries):
+        """Adds a frozen task's planned parts as fixed intervals; start/end are plain ints."""
+        start_datetime = self.scheduler.start_date
+        for i, (entry_id, entry) in enumerate(entries):
+            start = int((entry['start_time'] - start_datetime).total_seconds() // 60)
+            end = int((entry['end_time'] - start_datetime).total_seconds() // 60)
+            interval = self.model.NewFixedSizeIntervalVar(start, end - start, f'{entry_id}_frozen_interval')
+            self.task_vars[task_id].append({'start': start, 'end': end, 'interval': interval,
+                                            'duration': end - start, 'part': i + 1 if len(entries) > 1 else 0,
+                                            'frozen_entry': (entry_id, entry)})
+
+    @staticmethod
+    def _is_frozen(part_vars):
+        return 'frozen_entry' in part_vars
 
     def _add_precedence_constraints(self):
         """
@@ -170,12 +277,14 @@ class CpSatScheduler:
             if pred_id not in self.task_vars or succ_id not in self.task_vars:
                 continue
 
+            relationship = const['Relationship']
             # Predecessor is the last part of the first task
             pred_vars = self.task_vars[pred_id][-1]
-            # Successor is the first part of the second task
-            succ_vars = self.task_vars[succ_id][0]
+            # Successor is the first part of the second task, or its last part when its finish is constrained
+            succ_vars = self.task_vars[succ_id][-1 if relationship == 'Finish <= Finish' else 0]
+            if self._is_frozen(pred_vars) and self._is_frozen(succ_vars):
+                continue
 
-            relationship = const['Relationship']
             if relationship == 'Finish <= Start': self.model.Add(pred_vars['end'] <= succ_vars['start'])
             elif relationship == 'Finish = Start': self.model.Add(pred_vars['end'] == succ_vars['start'])
             elif relationship == 'Start <= Start': self.model.Add(pred_vars['start'] <= succ_vars['start'])
@@ -188,7 +297,7 @@ class CpSatScheduler:
         print("[INFO] Adding late part start time constraints...")
         late_part_constraints_added = 0
         for task_id, is_late in self.scheduler.late_part_tasks.items():
-            if not is_late or task_id not in self.task_vars:
+            if not is_late or task_id not in self.task_vars or self._is_frozen(self.task_vars[task_id][0]):
                 continue
 
             original_task_id = self.scheduler.instance_to_original_task.get(task_id, task_id)
@@ -212,7 +321,7 @@ class CpSatScheduler:
         resource_to_tasks = defaultdict(lambda: {'intervals': [], 'demands': []})
 
         for task_id, task_info in self.scheduler.tasks.items():
-            task_parts = self.task_vars[task_id]
+            task_parts = self.task_vars.get(task_id, [])
 
             for part_vars in task_parts:
                 interval = part_vars['interval']
@@ -280,7 +389,13 @@ class CpSatScheduler:
             product_makespan = self.model.NewIntVar(0, self.horizon, f'{product}_makespan')
             # The product makespan is the maximum end time of the LAST part of all terminal tasks.
             for task_id in terminal_tasks:
-                last_part_end_var = self.task_vars[task_id][-1]['end']
+                if task_id in self.task_vars:
+                    last_part_end_var = self.task_vars[task_id][-1]['end']
+                elif self.frozen_horizon and task_id in self.frozen_horizon['completed']:
+                    last_part_end_var = int((self.frozen_horizon['completed'][task_id][-1][1]['end_time']
+                                             - start_datetime).total_seconds() // 60)
+                else:
+                    continue
                 self.model.Add(last_part_end_var <= product_makespan)
 
             delivery_deadline_minutes = int((delivery_date - start_datetime).total_seconds() / 60)
@@ -292,43 +407,165 @@ class CpSatScheduler:
             self.model.Minimize(sum(all_lateness_vars))
         print(f"[INFO] Objective set to minimize the sum of {len(all_lateness_vars)} product lateness variables.")
 
-    def solve(self):
+    def _add_solution_hints(self, hint_schedule):
         """
-        Builds and solves the CP-SAT model.
+        Warm-starts the search from an existing schedule (e.g. the heuristic list schedule).
+        Split entries ('---partN') hint the matching part; an unsplit entry for a splittable
+        task is hinted as two back-to-back halves.
+        """
+        start_datetime = self.scheduler.start_date
+        hinted = 0
+
+        def minutes(dt):
+            return int((dt - start_datetime).total_seconds() / 60)
+
+        for task_id, task_parts in self.task_vars.items():
+            if self._is_frozen(task_parts[0]):
+                continue
+            if len(task_parts) == 1:
+                entry = hint_schedule.get(task_id)
+                if entry:
+                    self.model.AddHint(task_parts[0]['start'], minutes(entry['start_time']))
+                    hinted += 1
+                continue
+
+            part_entries = [hint_schedule.get(f"{task_id}---part{i + 1}") for i in range(len(task_parts))]
+            if all(part_entries):
+                for part_vars, entry in zip(task_parts, part_entries):
+                    self.model.AddHint(part_vars['start'], minutes(entry['start_time']))
+                    self.model.AddHint(part_vars['duration'], int(entry['duration']))
+                hinted += 1
+            elif task_id in hint_schedule:
+                start = minutes(hint_schedule[task_id]['start_time'])
+                first_half = int(self.scheduler.tasks[task_id]['duration']) // 2
+                self.model.AddHint(task_parts[0]['start'], start)
+                self.model.AddHint(task_parts[0]['duration'], first_half)
+                self.model.AddHint(task_parts[1]['start'], start + first_half)
+                self.model.AddHint(task_parts[1]['duration'], int(self.scheduler.tasks[task_id]['duration']) - first_half)
+                hinted += 1
+
+        print(f"[INFO] Added solution hints for {hinted}/{len(self.task_vars)} tasks.")
+
+    def build_model(self, hint_schedule=None, num_workers=None, hint_time_limit=HINT_COMPLETION_SECONDS):
+        """
+        Builds the variables, constraints and objective, hinted with hint_schedule when given.
+        Completing the hint takes up to hint_time_limit seconds on num_workers threads.
         """
         self._calculate_horizon()
         self._create_task_variables()
         self._add_precedence_constraints()
         self._add_resource_constraints()
         self._set_objective()
+        if hint_schedule:
+            self._add_solution_hints(hint_schedule)
+            self._complete_hint(hint_time_limit, num_workers)
+
+    def _solve_with_hint_fixed(self, time_limit, num_workers=None):
+        """Solves the built model with every hinted variable fixed to its hint."""
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = float(time_limit)
+        if num_workers:
+            solver.parameters.num_workers = int(num_workers)
+        solver.parameters.fix_variables_to_their_hinted_value = True
+        status = solver.Solve(self.model)
+        return solver, status in (cp_model.OPTIMAL, cp_model.FEASIBLE)
+
+    def hint_is_feasible(self, time_limit=60.0, num_workers=None):
+        """
+        Whether the built model's hints form a feasible solution on their own: solves with
+        every hinted variable fixed to its hint, so the search only completes the rest.
+        """
+        return self._solve_with_hint_fixed(time_limit, num_workers)[1]
+
+    def _complete_hint(self, time_limit=HINT_COMPLETION_SECONDS, num_workers=None):
+        """
+        Replaces the partial hint (task starts and part durations) by a full assignment of
+        every model variable, so the search takes it as its first solution instead of only
+        steering towards it. Leaves the partial hint when it cannot be completed.
+        """
+        solver, feasible = self._solve_with_hint_fixed(time_limit, num_workers)
+        if not feasible:
+            print("[WARNING] The solution hint is not feasible; the solver will repair it.")
+            return False
+        self.model.ClearHints()
+        for index in range(len(self.model.Proto().variables)):
+            var = self.model.get_int_var_from_proto_index(index)
+            self.model.AddHint(var, solver.Value(var))
+        self.hint_solution = solver
+        print(f"[INFO] Completed the solution hint into a feasible assignment (objective {solver.ObjectiveValue()}).")
+        return True
+
+    def solve(self, time_limit=180.0, hint_schedule=None, on_solution=None, num_workers=None):
+        """
+        Builds and solves the CP-SAT model.
+        hint_schedule warm-starts the search; on_solution(schedule, objective) is called
+        for every improving solution so callers can publish results while the solve runs.
+        num_workers caps the solver's search threads (default: all cores), for completing
+        the hint as well. Time spent building the model and completing the hint counts
+        against time_limit.
+        """
+        started = time.time()
+        self.build_model(hint_schedule, num_workers, hint_time_limit=min(HINT_COMPLETION_SECONDS, time_limit / 2))
+        if on_solution and self.hint_solution:
+            # The completed hint is the first incumbent; presolve alone can take longer than the heuristic
+            try:
+                on_solution(self._extract_solution(self.hint_solution, silent=True), self.hint_solution.ObjectiveValue())
+            except Exception as e:
+                print(f"[WARNING] Solution callback failed: {e}")
 
         print("[INFO] Starting CP-SAT solver...")
         solver = cp_model.CpSolver()
-        solver.parameters.max_time_in_seconds = 180.0
+        solver.parameters.max_time_in_seconds = max(0.0, float(time_limit) - (time.time() - started))
+        if num_workers:
+            solver.parameters.num_workers = int(num_workers)
         solver.parameters.log_search_progress = self.scheduler.debug
-        status = solver.Solve(self.model)
+        if hint_schedule:
+            # Hints from a cached schedule of a changed problem need not be feasible; let the solver repair them
+            solver.parameters.repair_hint = True
+        if on_solution:
+            status = solver.Solve(self.model, _SolutionPublisher(self, on_solution))
+        else:
+            status = solver.Solve(self.model)
 
+        self.status_name = solver.StatusName(status)
         if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
+            self.objective_value = solver.ObjectiveValue()
+            self.best_bound = solver.BestObjectiveBound()
             print(f"[INFO] Solver finished with status: {solver.StatusName(status)}")
             print(f"[INFO] Objective value (total lateness in minutes): {solver.ObjectiveValue()}")
             return self._extract_solution(solver)
+        elif self.hint_solution is not None:
+            # The search ran out of time (often still in presolve); the completed hint is still a solution
+            print(f"[WARNING] The search found no solution ({solver.StatusName(status)}); keeping the warm-start hint.")
+            self.status_name = 'FEASIBLE'
+            self.objective_value = self.hint_solution.ObjectiveValue()
+            return self._extract_solution(self.hint_solution)
         else:
             print(f"[ERROR] No solution found. Status: {solver.StatusName(status)}")
             return None
 
-    def _extract_solution(self, solver):
+    def _extract_solution(self, solver, silent=False):
         """
-        Extracts the schedule from the solver, creating separate entries for split tasks.
+        Extracts the schedule from the solver (or a solution callback), creating
+        separate entries for split tasks.
         """
-        print("[INFO] Extracting solution from solver...")
+        if not silent:
+            print("[INFO] Extracting solution from solver...")
         schedule = {}
         start_datetime = self.scheduler.start_date
 
         for task_id, task_parts in self.task_vars.items():
             task_info = self.scheduler.tasks[task_id]
             is_split = len(task_parts) > 1
+            team = self._get_resource_team(task_info)
+            team_windows = self._get_team_working_windows(team) if team else []
 
             for i, part_vars in enumerate(task_parts):
+                if self._is_frozen(part_vars):
+                    entry_id, entry = part_vars['frozen_entry']
+                    schedule[entry_id] = entry
+                    continue
+
                 # For split tasks, create a unique ID that can be traced back to the original.
                 part_id = f"{task_id}---part{i+1}" if is_split else task_id
 
@@ -349,7 +586,13 @@ class CpSatScheduler:
                     'is_customer': task_info.get('is_customer', False),
                     'task_type': task_info.get('task_type'),
                     'original_task_id': task_info.get('original_task_id'),
+                    'shift': shifts.shift_at_minute(team_windows, start_minutes) or 'N/A',
                     'is_split_part': is_split
                 }
-        print(f"[INFO] Extracted schedule for {len(schedule)} tasks/parts.")
+        if self.frozen_horizon:
+            for entries in self.frozen_horizon['completed'].values():
+                schedule.update(entries)
+
+        if not silent:
+            print(f"[INFO] Extracted schedule for {len(schedule)} tasks/parts.")
         return schedule
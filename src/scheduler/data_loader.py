@@ -5,6 +5,7 @@ import csv
 import re
 from collections import defaultdict
 from io import StringIO
+from . import shifts
 
 def parse_csv_sections(scheduler, file_content):
     """Parse CSV file content into separate sections based on ==== markers"""
@@ -92,6 +93,9 @@ def load_data_from_csv(scheduler):
     # ADD THIS: Load customer team capacities and schedules
     _load_customer_teams(scheduler, sections)
 
+    # Compile shift hours once and resolve every team's working windows
+    shifts.build_shift_table(scheduler)
+
     # Then load task relationships and definitions
     _load_task_definitions(scheduler, sections)
 
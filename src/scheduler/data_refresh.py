@@ -0,0 +1,105 @@
+# src/scheduler/data_refresh.py
+# Differences between two loaded versions of the scheduling data, which scenarios they
+# affect, and carrying the old version's derived caches over to the new one where the
+# change leaves them valid.
+
+from . import constraints
+
+
+def _changed_keys(old, new):
+    return sorted((k for k in old.keys() | new.keys() if old.get(k) != new.get(k)), key=str)
+
+
+def _edges(scheduler):
+    return {(c['First'], c['Second'], c.get('Relationship', ''))
+            for c in constraints.build_dynamic_dependencies(scheduler)}
+
+
+def diff_problems(old, new):
+    """
+    Differences between the problems loaded in schedulers old and new, by section:
+    tasks (added, removed, changed fields), precedence edges, capacities, dates and calendars.
+    Sections without changes are left out, so an empty dict means the same problem.
+    """
+    diff = {}
+
+    added = sorted(new.tasks.keys() - old.tasks.keys())
+    removed = sorted(old.tasks.keys() - new.tasks.keys())
+    changed = {}
+    for task_id in old.tasks.keys() & new.tasks.keys():
+        fields = _changed_keys(old.tasks[task_id], new.tasks[task_id])
+        if fields:
+            changed[task_id] = fields
+    if added or removed or changed:
+        diff['tasks'] = {'added': added, 'removed': removed, 'changed': dict(sorted(changed.items()))}
+
+    old_edges, new_edges = _edges(old), _edges(new)
+    if old_edges != new_edges:
+        diff['precedence'] = {'added': sorted(new_edges - old_edges), 'removed': sorted(old_edges - new_edges)}
+
+    capacities = {}
+    for name in ('team_capacity', 'quality_team_capacity', 'customer_team_capacity'):
+        old_capacity, new_capacity = getattr(old, name), getattr(new, name)
+        for team in _changed_keys(old_capacity, new_capacity):
+            capacities[team] = [old_capacity.get(team), new_capacity.get(team)]
+    if capacities:
+        diff['capacities'] = capacities
+
+    dates = {}
+    for name in ('delivery_dates', 'on_dock_dates'):
+        keys = _changed_keys(getattr(old, name), getattr(new, name))
+        if keys:
+            dates[name] = keys
+    if dates:
+        diff['dates'] = dates
+
+    calendars = [name for name in ('holidays', 'shift_hours', 'team_shifts', 'quality_team_shifts',
+                                   'customer_team_shifts')
+                 if getattr(old, name) != getattr(new, name)]
+    if calendars:
+        diff['calendars'] = calendars
+    return diff
+
+
+def affected_scenarios(diff, scenario_ids):
+    """
+    Scenarios whose result a diff invalidates. Headcount values only matter to the scenarios
+    that schedule against the CSV headcount; scenario 3 sizes the teams itself and only
+    depends on which teams exist.
+    """
+    if not diff:
+        return []
+    if set(diff) == {'capacities'} and all(None not in values for values in diff['capacities'].values()):
+        return [s for s in scenario_ids if s != 'scenario3']
+    return list(scenario_ids)
+
+
+def carry_over_caches(old, new, diff):
+    """
+    Reuse old's critical path lengths in new when the task network and every duration are
+    unchanged; returns the names of the caches carried over. (The dependency index of new
+    is already built by diff_problems.)
+    """
+    tasks = diff.get('tasks', {})
+    if 'precedence' in diff or tasks.get('added') or tasks.get('removed'):
+        return []
+    if any('duration' in fields for fields in tasks.get('changed', {}).values()) or not old._critical_path_cache:
+        return []
+    new._critical_path_cache = dict(old._critical_path_cache)
+    return ['critical_path']
+
+
+def summarize(diff):
+    """Counts per section, for progress messages and API responses."""
+    summary = {}
+    if 'tasks' in diff:
+        summary['tasks'] = {k: len(v) for k, v in diff['tasks'].items()}
+    if 'precedence' in diff:
+        summary['precedence'] = {k: len(v) for k, v in diff['precedence'].items()}
+    if 'capacities' in diff:
+        summary['capacities'] = len(diff['capacities'])
+    if 'dates' in diff:
+        summary['dates'] = {k: len(v) for k, v in diff['dates'].items()}
+    if 'calendars' in diff:
+        summary['calendars'] = diff['calendars']
+    return summary
@@ -0,0 +1,93 @@
+# src/scheduler/data_snapshot.py
+# Binary snapshot of a fully loaded scheduler (tasks, instance maps, constraints, calendars
+# and the dependency index) so a restart skips CSV parsing. A snapshot is only used while
+# the CSV it was built from is unchanged and the code that built it is the same.
+
+import hashlib
+import os
+import pickle
+from . import constraints, data_loader, shifts, utils
+
+SNAPSHOT_VERSION = 1
+
+# Per-run state that is not part of the loaded problem
+EXCLUDED_STATE = ('task_schedule', 'global_priority_list', 'solve_cache')
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Modules whose code builds the snapshotted state: the parser, the compiled shift table,
+# the dependency index and the helpers they share
+SOURCE_MODULES = (data_loader, shifts, constraints, utils)
+
+
+def _loader_fingerprint():
+    """Hash of the code building the loaded state, so a changed module never serves state built by the old one."""
+    digest = hashlib.sha256()
+    for module in SOURCE_MODULES:
+        digest.update(_sha256(module.__file__.replace('.pyc', '.py')).encode('ascii'))
+    return digest.hexdigest()
+
+
+def default_path(scheduler):
+    return f'{scheduler.csv_file_path}.snapshot'
+
+
+def _source_header(scheduler):
+    stat = os.stat(scheduler.csv_file_path)
+    return {'version': SNAPSHOT_VERSION, 'loader': _loader_fingerprint(),
+            'late_part_delay_days': scheduler.late_part_delay_days,
+            'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def save_snapshot(scheduler, path=None):
+    """Write the loaded state of scheduler next to its CSV (or to path); returns the path."""
+    path = path or default_path(scheduler)
+    # Build the derived indexes now so a restored scheduler has them too
+    constraints.get_dependency_index(scheduler)
+
+    header = {**_source_header(scheduler), 'sha256': _sha256(scheduler.csv_file_path)}
+    state = {k: v for k, v in scheduler.__dict__.items() if k not in EXCLUDED_STATE}
+    temp_path = f'{path}.tmp{os.getpid()}'
+    with open(temp_path, 'wb') as f:
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+    return path
+
+
+def load_snapshot(scheduler, path=None):
+    """
+    Restore scheduler from its snapshot if the snapshot matches the CSV: same size and mtime,
+    or, when only the mtime differs, the same content hash. Returns True when restored.
+    """
+    path = path or default_path(scheduler)
+    if not os.path.exists(path):
+        return False
+    try:
+        with open(path, 'rb') as f:
+            header = pickle.load(f)
+            current = _source_header(scheduler)
+            same_build = all(header.get(k) == current[k] for k in ('version', 'loader', 'late_part_delay_days'))
+            if not same_build:
+                return False
+            unchanged = header['size'] == current['size'] and header['mtime_ns'] == current['mtime_ns']
+            if not unchanged and (header['size'] != current['size'] or
+                                  header['sha256'] != _sha256(scheduler.csv_file_path)):
+                return False
+            state = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, KeyError) as e:
+        print(f"[WARNING] Ignoring unreadable snapshot {path}: {e}")
+        return False
+
+    # Keep this run's paths and flags; everything else comes from the snapshot
+    for key in ('csv_file_path', 'debug'):
+        state.pop(key, None)
+    scheduler.__dict__.update(state)
+    return True
@@ -1,5 +1,7 @@
 # src/scheduler/debug.py
 from collections import defaultdict
+from datetime import datetime, timedelta
+from . import shifts as shift_table
 
 def debug_scheduling_blockage(scheduler):
     """Find why scheduling stops at task 140"""
@@ -290,23 +292,12 @@ def debug_scheduling_slot_search(scheduler, task_id, verbose=True):
             continue
 
         for shift in shifts:
-            shift_info = scheduler.shift_hours.get(shift)
-            if not shift_info:
+            if shift not in scheduler.shift_table:
                 print(f"    Shift {shift}: No hours defined")
-                continue
 
-            print(f"    Shift {shift}: {shift_info['start']} - {shift_info['end']}")
-
-            # Calculate actual shift window
-            start_hour, start_min = scheduler._parse_shift_time(shift_info['start'])
-            end_hour, end_min = scheduler._parse_shift_time(shift_info['end'])
-
-            if shift == '3rd':
-                shift_start = test_date.replace(hour=23, minute=0)
-                shift_end = (test_date + timedelta(days=1)).replace(hour=6, minute=0)
-            else:
-                shift_start = test_date.replace(hour=start_hour, minute=start_min)
-                shift_end = test_date.replace(hour=end_hour, minute=end_min)
+        # Actual shift windows from the compiled shift table
+        for shift_start, shift_end, shift in shift_table.get_day_windows(scheduler, team, test_date):
+            print(f"    Shift {shift}: {shift_start.strftime('%H:%M')} - {shift_end.strftime('%H:%M')}")
 
             # Check capacity usage in this shift
             conflicts = 0
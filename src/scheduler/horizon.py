@@ -0,0 +1,47 @@
+# src/scheduler/horizon.py
+# Frozen-horizon split of the current plan for re-optimisation: completed work drops out
+# of the model, started and near-term work is held fixed, and the rest is re-planned.
+
+from collections import defaultdict
+from datetime import timedelta
+from . import timeline
+
+
+def split_frozen_horizon(scheduler, now, freeze_hours=0.0, schedule=None):
+    """
+    Classify the task instances of schedule (default scheduler.task_schedule) at `now`:
+      completed  every entry has ended by now - left out of the model entirely
+      frozen     started before now, or starting before now + freeze_hours - kept as constants
+    Everything else, including tasks missing from the plan, is free but may not start
+    before now. Returns {'now': minute offset of now, 'completed': {...}, 'frozen': {...}}
+    with each task mapped to its [(entry_id, entry), ...] in part order.
+    """
+    schedule = scheduler.task_schedule if schedule is None else schedule
+    freeze_until = now + timedelta(hours=freeze_hours)
+
+    entries_by_task = defaultdict(list)
+    for entry_id, entry in schedule.items():
+        entries_by_task[entry_id.split('---part')[0]].append((entry_id, entry))
+
+    completed, frozen = {}, {}
+    for task_id, entries in entries_by_task.items():
+        if task_id not in scheduler.tasks:
+            continue
+        entries.sort(key=lambda item: item[1]['start_time'])
+        if all(entry['end_time'] <= now for _, entry in entries):
+            completed[task_id] = entries
+        elif entries[0][1]['start_time'] < freeze_until:
+            frozen[task_id] = entries
+
+    print(f"[INFO] Frozen horizon at {now}: {len(completed)} completed tasks dropped, "
+          f"{len(frozen)} started or within {freeze_hours}h locked, "
+          f"{len(scheduler.tasks) - len(completed) - len(frozen)} free")
+
+    return {'now': timeline.to_minutes(scheduler.start_date, now), 'completed': completed, 'frozen': frozen}
+
+
+def locked_entries(frozen_horizon):
+    """Every (entry_id, entry) of completed and frozen tasks, for copying into a new plan."""
+    for group in ('completed', 'frozen'):
+        for entries in frozen_horizon[group].values():
+            yield from entries
@@ -0,0 +1,471 @@
+# src/scheduler/local_search.py
+# Local-search post-processing of a finished task_schedule: left shifts, forward-backward
+# justification, and insert and swap moves on bottleneck resources, evaluated on capacity
+# timelines.
+
+import time
+from bisect import bisect_left, insort
+from collections import defaultdict
+from datetime import timedelta
+from . import horizon, timeline
+
+LATENESS_WEIGHT = 1000  # per minute late, per product
+FINISH_WEIGHT = 1       # per minute of product finish, breaks ties between on-time schedules
+MAX_INSERT_CANDIDATES = 8
+
+
+class ScheduleState:
+    """
+    The schedule as minute offsets with every entry booked on its resources' timelines,
+    plus the precedence edges between entries using the CP-SAT semantics for split tasks
+    (a dependency runs from the predecessor's last part to the successor's first part, or
+    to its last part for Finish <= Finish).
+    """
+
+    def __init__(self, scheduler, lateness_weights=None, finish_weights=None, frozen_horizon=None):
+        self.scheduler = scheduler
+        origin = self.origin = scheduler.start_date
+        schedule = scheduler.task_schedule
+
+        self.start, self.end, self.duration, self.units = {}, {}, {}, {}
+        self.shift, self.product, self.resources, self.calendar = {}, {}, {}, {}
+        self.release = {}
+        self.fixed = set()
+        self.not_before = frozen_horizon['now'] if frozen_horizon else 0
+        if frozen_horizon:
+            self.fixed.update(entry_id for entry_id, _ in horizon.locked_entries(frozen_horizon))
+        self.timelines = timeline.build_timelines(scheduler)
+        self.members = defaultdict(list)
+        calendars = timeline.CalendarSet(scheduler, origin)
+
+        task_parts = defaultdict(list)
+        for entry_id, entry in schedule.items():
+            task_id = entry_id.split('---part')[0]
+            task_info = scheduler.tasks.get(task_id, {})
+            task_parts[task_id].append(entry_id)
+
+            self.start[entry_id] = timeline.to_minutes(origin, entry['start_time'])
+            self.end[entry_id] = timeline.to_minutes(origin, entry['end_time'])
+            self.duration[entry_id] = self.end[entry_id] - self.start[entry_id]
+            self.units[entry_id] = entry.get('mechanics_required') or 1
+            self.shift[entry_id] = entry.get('shift')
+            self.product[entry_id] = entry.get('product')
+
+            if task_info.get('is_customer', False):
+                # Customer inspections keep the team the scheduler gave them
+                resources = [entry.get('team')] if entry.get('team') else []
+            else:
+                resources = timeline.task_resources(scheduler, task_info)
+            resources = [r for r in resources if r in self.timelines]
+            self.resources[entry_id] = resources
+            if resources:
+                self.calendar[entry_id] = calendars.get(resources[0], self.product[entry_id])
+            else:
+                self.fixed.add(entry_id)
+
+            for resource in resources:
+                self.timelines[resource].reserve(self.start[entry_id], self.end[entry_id], self.units[entry_id])
+                self.members[resource].append(entry_id)
+
+        self.predecessors = defaultdict(list)
+        self.successors = defaultdict(list)
+        self.task_parts = task_parts
+        for parts in task_parts.values():
+            parts.sort(key=lambda e: self.start[e])
+            for earlier, later in zip(parts, parts[1:]):
+                self._add_edge(earlier, later, 'FS')
+
+        for const in scheduler.build_dynamic_dependencies():
+            pred_parts = task_parts.get(const['First'])
+            succ_parts = task_parts.get(const['Second'])
+            if not pred_parts or not succ_parts:
+                continue
+            predecessor, successor = pred_parts[-1], succ_parts[0]
+            relationship = const['Relationship']
+            if relationship in ('Finish = Start', 'Start = Start'):
+                # Equalities tie both ends together; leave them where the solver put them
+                self.fixed.update((predecessor, successor))
+            if relationship in ('Start <= Start', 'Start = Start'):
+                self._add_edge(predecessor, successor, 'SS')
+            elif relationship == 'Finish <= Finish':
+                self._add_edge(predecessor, succ_parts[-1], 'FF')
+            else:
+                self._add_edge(predecessor, successor, 'FS')
+
+        for task_id, is_late in scheduler.late_part_tasks.items():
+            if not is_late or task_id not in task_parts:
+                continue
+            original_task_id = scheduler.instance_to_original_task.get(task_id, task_id)
+            on_dock_date = scheduler.on_dock_dates.get(original_task_id)
+            if on_dock_date:
+                earliest = on_dock_date + timedelta(days=scheduler.late_part_delay_days)
+                earliest = earliest.replace(hour=6, minute=0, second=0, microsecond=0)
+                self.release[task_parts[task_id][0]] = timeline.to_minutes(origin, earliest)
+
+        # Sorted end times per product give each product's finish in O(1)
+        self.product_ends = defaultdict(list)
+        for entry_id, product in self.product.items():
+            if product is not None:
+                insort(self.product_ends[product], self.end[entry_id])
+
+        self.due = {}
+        for product in self.product_ends:
+            delivery = scheduler.delivery_dates.get(product)
+            self.due[product] = timeline.to_minutes(origin, delivery) if delivery is not None else None
+        lateness_weights = lateness_weights or {}
+        finish_weights = finish_weights or {}
+        self.lateness_weight = {p: lateness_weights.get(p, LATENESS_WEIGHT) for p in self.product_ends}
+        self.finish_weight = {p: finish_weights.get(p, FINISH_WEIGHT) for p in self.product_ends}
+
+    def _add_edge(self, predecessor, successor, kind):
+        self.successors[predecessor].append((successor, kind))
+        self.predecessors[successor].append((predecessor, kind))
+
+    def product_finish(self, product):
+        ends = self.product_ends.get(product)
+        return ends[-1] if ends else None
+
+    def cost(self):
+        total = 0
+        for product, ends in self.product_ends.items():
+            finish = ends[-1]
+            due = self.due[product]
+            if due is not None and finish > due:
+                total += self.lateness_weight[product] * (finish - due)
+            total += self.finish_weight[product] * finish
+        return total
+
+    def earliest_start(self, entry_id):
+        """Earliest start allowed by the release date and the current predecessor times."""
+        bound = max(self.release.get(entry_id, 0), self.not_before)
+        duration = self.duration[entry_id]
+        for predecessor, kind in self.predecessors[entry_id]:
+            if kind == 'FS':
+                bound = max(bound, self.end[predecessor])
+            elif kind == 'SS':
+                bound = max(bound, self.start[predecessor])
+            else:
+                bound = max(bound, self.end[predecessor] - duration)
+        return bound
+
+    def latest_end(self, entry_id, cap=None):
+        """Latest end allowed by the current successor times (and cap, if given)."""
+        bound = cap if cap is not None else float('inf')
+        duration = self.duration[entry_id]
+        for successor, kind in self.successors[entry_id]:
+            if kind == 'FS':
+                bound = min(bound, self.start[successor])
+            elif kind == 'SS':
+                bound = min(bound, self.start[successor] + duration)
+            else:
+                bound = min(bound, self.end[successor])
+        return bound
+
+    def _book(self, entry_id, units):
+        for resource in self.resources[entry_id]:
+            self.timelines[resource].reserve(self.start[entry_id], self.end[entry_id], units)
+
+    def unbook(self, entry_id):
+        self._book(entry_id, -self.units[entry_id])
+
+    def book(self, entry_id):
+        self._book(entry_id, self.units[entry_id])
+
+    def place(self, entry_id, start, shift):
+        """Move an unbooked entry to start and book it there."""
+        product = self.product[entry_id]
+        if product is not None:
+            ends = self.product_ends[product]
+            del ends[bisect_left(ends, self.end[entry_id])]
+            insort(ends, start + self.duration[entry_id])
+        self.start[entry_id] = start
+        self.end[entry_id] = start + self.duration[entry_id]
+        self.shift[entry_id] = shift
+        self.book(entry_id)
+
+    def resource_timelines(self, entry_id):
+        return [self.timelines[r] for r in self.resources[entry_id]]
+
+    def shift_left(self, entry_id):
+        """Move an entry to its earliest feasible slot; True if it moved."""
+        if entry_id in self.fixed or self.earliest_start(entry_id) >= self.start[entry_id]:
+            return False
+        self.unbook(entry_id)
+        start, shift = timeline.find_slot(self.resource_timelines(entry_id), self.calendar[entry_id],
+                                          self.earliest_start(entry_id), self.duration[entry_id],
+                                          self.units[entry_id])
+        if start is not None and start < self.start[entry_id]:
+            self.place(entry_id, start, shift)
+            return True
+        self.book(entry_id)
+        return False
+
+    def shift_right(self, entry_id):
+        """
+        Move an entry to its latest slot before its successors and its product's current
+        finish, so the product never gets later; True if it moved.
+        """
+        if entry_id in self.fixed:
+            return False
+        latest_end = self.latest_end(entry_id, self.product_finish(self.product[entry_id]))
+        if latest_end <= self.end[entry_id]:
+            return False
+        self.unbook(entry_id)
+        start, shift = timeline.find_latest_slot(self.resource_timelines(entry_id), self.calendar[entry_id],
+                                                 latest_end, self.start[entry_id] + 1,
+                                                 self.duration[entry_id], self.units[entry_id])
+        if start is not None:
+            self.place(entry_id, start, shift)
+            return True
+        self.book(entry_id)
+        return False
+
+    def snapshot(self):
+        return dict(self.start), dict(self.shift)
+
+    def restore(self, snapshot):
+        starts, shifts = snapshot
+        for entry_id, start in starts.items():
+            if self.start[entry_id] != start:
+                self.unbook(entry_id)
+                self.place(entry_id, start, shifts[entry_id])
+
+    def try_insert(self, entry_id, blocker):
+        """
+        Pull entry_id ahead of blocker on a shared resource and re-place the blocker
+        at its earliest slot that still respects its successors. Kept only if the
+        weighted cost improves; True if it was kept.
+        """
+        if blocker in self.fixed:
+            return False
+        before = self.cost()
+        old = {e: (self.start[e], self.shift[e]) for e in (entry_id, blocker)}
+
+        self.unbook(blocker)
+        self.unbook(entry_id)
+        start, shift = timeline.find_slot(self.resource_timelines(entry_id), self.calendar[entry_id],
+                                          self.earliest_start(entry_id), self.duration[entry_id],
+                                          self.units[entry_id])
+        if start is None or start >= old[entry_id][0]:
+            self.book(entry_id)
+            self.book(blocker)
+            return False
+        self.place(entry_id, start, shift)
+
+        blocker_start, blocker_shift = timeline.find_slot(
+            self.resource_timelines(blocker), self.calendar[blocker], self.earliest_start(blocker),
+            self.duration[blocker], self.units[blocker])
+        if (blocker_start is not None
+                and blocker_start + self.duration[blocker] <= self.latest_end(blocker)):
+            self.place(blocker, blocker_start, blocker_shift)
+            if self.cost() < before:
+                return True
+            self.unbook(blocker)
+            self.place(blocker, *old[blocker])
+        else:
+            self.book(blocker)
+        self.unbook(entry_id)
+        self.place(entry_id, *old[entry_id])
+        return False
+
+    def try_swap(self, first, second):
+        """
+        Exchange two adjacent entries on a shared resource: second moves to its earliest slot
+        no later than first's start, then first to its earliest slot after second that still
+        respects its successors. Kept only if the weighted cost improves; True if it was kept.
+        """
+        if first in self.fixed or second in self.fixed:
+            return False
+        before = self.cost()
+        old = {e: (self.start[e], self.shift[e]) for e in (first, second)}
+
+        self.unbook(first)
+        self.unbook(second)
+        start, shift = timeline.find_slot(self.resource_timelines(second), self.calendar[second],
+                                          self.earliest_start(second), self.duration[second],
+                                          self.units[second])
+        if start is None or start > old[first][0]:
+            self.book(second)
+            self.book(first)
+            return False
+        self.place(second, start, shift)
+
+        first_start, first_shift = timeline.find_slot(
+            self.resource_timelines(first), self.calendar[first],
+            max(self.earliest_start(first), self.end[second]), self.duration[first], self.units[first])
+        if first_start is not None and first_start + self.duration[first] <= self.latest_end(first):
+            self.place(first, first_start, first_shift)
+            if self.cost() < before:
+                return True
+            self.unbook(first)
+            self.place(first, *old[first])
+        else:
+            self.book(first)
+        self.unbook(second)
+        self.place(second, *old[second])
+        return False
+
+    def write_back(self, entry_ids):
+        """Copy the times of entry_ids into a new scheduler.task_schedule."""
+        schedule = dict(self.scheduler.task_schedule)
+        for entry_id in entry_ids:
+            entry = dict(schedule[entry_id])
+            entry['start_time'] = timeline.to_datetime(self.origin, self.start[entry_id])
+            entry['end_time'] = timeline.to_datetime(self.origin, self.end[entry_id])
+            if self.shift[entry_id]:
+                entry['shift'] = self.shift[entry_id]
+            schedule[entry_id] = entry
+        self.scheduler.task_schedule = schedule
+
+    def binding_predecessor(self, entry_id):
+        """The predecessor whose time sets entry_id's earliest start, if any."""
+        bound = self.earliest_start(entry_id)
+        duration = self.duration[entry_id]
+        for predecessor, kind in self.predecessors[entry_id]:
+            if kind == 'FS':
+                value = self.end[predecessor]
+            elif kind == 'SS':
+                value = self.start[predecessor]
+            else:
+                value = self.end[predecessor] - duration
+            if value == bound:
+                return predecessor
+        return None
+
+    def blockers(self, entry_id, earliest):
+        """Entries on entry_id's resources running between its earliest and actual start."""
+        found = set()
+        for resource in self.resources[entry_id]:
+            for other in self.members[resource]:
+                if other != entry_id and self.start[other] < self.start[entry_id] and self.end[other] > earliest:
+                    found.add(other)
+        # Latest starters first - they are the cheapest to push back
+        return sorted(found, key=lambda e: -self.start[e])[:MAX_INSERT_CANDIDATES]
+
+    def previous_on_resources(self, entry_id):
+        """For each of entry_id's resources, the entry starting last before it there."""
+        found = []
+        for resource in self.resources[entry_id]:
+            earlier = [e for e in self.members[resource] if e != entry_id and self.start[e] < self.start[entry_id]]
+            if earlier:
+                previous = max(earlier, key=lambda e: self.start[e])
+                if previous not in found:
+                    found.append(previous)
+        return found
+
+
+def _left_justify(state, deadline):
+    moved = 0
+    for entry_id in sorted(state.start, key=lambda e: state.start[e]):
+        if time.time() > deadline:
+            break
+        moved += state.shift_left(entry_id)
+    return moved
+
+
+def _right_justify(state, deadline):
+    moved = 0
+    for entry_id in sorted(state.end, key=lambda e: -state.end[e]):
+        if time.time() > deadline:
+            break
+        moved += state.shift_right(entry_id)
+    return moved
+
+
+def _critical_chain_moves(state, deadline, move):
+    """
+    Walk back along the critical chain of each product, costliest first, and call
+    move(entry_id, earliest) for every entry the resources hold back from its earliest
+    start. Returns the number of moves that were kept.
+    """
+    def product_cost(product):
+        finish = state.product_finish(product)
+        due = state.due[product]
+        late = max(0, finish - due) if due is not None else 0
+        return state.lateness_weight[product] * late + state.finish_weight[product] * finish
+
+    last_entry = {}
+    for entry_id, product in state.product.items():
+        if product is not None and (product not in last_entry or state.end[entry_id] > state.end[last_entry[product]]):
+            last_entry[product] = entry_id
+
+    accepted = 0
+    for product in sorted(last_entry, key=product_cost, reverse=True):
+        entry_id = last_entry[product]
+        visited = set()
+        while entry_id is not None and entry_id not in visited:
+            if time.time() > deadline:
+                return accepted
+            visited.add(entry_id)
+            earliest = state.earliest_start(entry_id)
+            if entry_id not in state.fixed and state.start[entry_id] > earliest:
+                accepted += move(entry_id, earliest)
+            entry_id = state.binding_predecessor(entry_id)
+    return accepted
+
+
+def _bottleneck_insert(state, deadline):
+    """Pull resource-delayed critical entries ahead of the entries holding their resource."""
+    return _critical_chain_moves(state, deadline, lambda entry_id, earliest: any(
+        state.try_insert(entry_id, blocker) for blocker in state.blockers(entry_id, earliest)))
+
+
+def _bottleneck_swap(state, deadline):
+    """Swap resource-delayed critical entries with the entry just before them on their resource."""
+    return _critical_chain_moves(state, deadline, lambda entry_id, earliest: any(
+        state.try_swap(previous, entry_id) for previous in state.previous_on_resources(entry_id)))
+
+
+def improve_schedule(scheduler, time_budget=5.0, lateness_weights=None, finish_weights=None, frozen_horizon=None):
+    """
+    Improve scheduler.task_schedule in place within time_budget seconds. Each round
+    left-shifts every entry, then tries insert and adjacent-swap moves on the bottleneck
+    resources of the latest products, then a forward-backward justification pass, and stops when a round
+    brings no improvement; that round's moves are undone. The schedule is only written back if the
+    cost went down. The cost is LATENESS_WEIGHT per minute late plus FINISH_WEIGHT
+    per minute of finish for every product; both can be overridden per product.
+    Entries locked by frozen_horizon stay put and nothing moves before its 'now'.
+    """
+    if not scheduler.task_schedule:
+        return {'moved': 0, 'initial_cost': 0, 'final_cost': 0, 'elapsed_seconds': 0.0}
+
+    started = time.time()
+    deadline = started + time_budget
+    state = ScheduleState(scheduler, lateness_weights, finish_weights, frozen_horizon)
+    initial_cost = state.cost()
+    initial_starts = dict(state.start)
+
+    rounds = inserts = swaps = 0
+    while time.time() < deadline:
+        rounds += 1
+        round_cost = state.cost()
+        before_round = state.snapshot()
+        _left_justify(state, deadline)
+        inserts += _bottleneck_insert(state, deadline)
+        swaps += _bottleneck_swap(state, deadline)
+
+        # Justification: push everything right against the product finishes, then back left
+        before_justify = state.snapshot()
+        justify_cost = state.cost()
+        _right_justify(state, deadline)
+        _left_justify(state, deadline)
+        if state.cost() > justify_cost:
+            state.restore(before_justify)
+
+        if state.cost() >= round_cost:
+            # A round that does not pay keeps none of its moves
+            state.restore(before_round)
+            break
+
+    final_cost = state.cost()
+    moved = []
+    if final_cost < initial_cost:
+        moved = [e for e, start in state.start.items() if start != initial_starts[e]]
+        state.write_back(moved)
+    else:
+        final_cost = initial_cost
+    elapsed = time.time() - started
+    print(f"[INFO] Local search: {rounds} round(s), {len(moved)} entries moved "
+          f"({inserts} inserts, {swaps} swaps), cost {initial_cost} -> {final_cost} in {elapsed:.2f}s")
+    return {'moved': len(moved), 'rounds': rounds, 'inserts': inserts, 'swaps': swaps, 'initial_cost': initial_cost,
+            'final_cost': final_cost, 'elapsed_seconds': round(elapsed, 3)}
@@ -3,7 +3,8 @@
 from collections import defaultdict
 from datetime import datetime
 import re
-from . import data_loader, scenarios, metrics, utils, algorithms, validation, reporting, constraints, cp_sat_solver
+from . import data_loader, scenarios, metrics, utils, algorithms, validation, reporting, constraints, cp_sat_solver, risk, portfolio, local_search, repair, horizon, simulation, solve_cache, data_snapshot
+from .solver_governor import governor
 
 class ProductionScheduler:
     """
@@ -43,6 +44,8 @@ class ProductionScheduler:
         self.quality_team_shifts = {}
         self.quality_team_capacity = {}
         self.shift_hours = {}
+        self.shift_table = {}
+        self.team_shift_windows = {}
         self.delivery_dates = {}
         self.holidays = defaultdict(set)
 
@@ -50,7 +53,10 @@ class ProductionScheduler:
         self.task_schedule = {}
         self.global_priority_list = []
         self._dynamic_constraints_cache = None
+        self._dependency_index = None
         self._critical_path_cache = {}
+        # Optional solve_cache.SolveCache answering repeated solves of the same problem
+        self.solve_cache = None
 
         # Original capacities for resets
         self._original_team_capacity = {}
@@ -96,27 +102,99 @@ class ProductionScheduler:
 
     # --- Method Delegation ---
 
-    def load_data_from_csv(self):
+    def load_data_from_csv(self, use_snapshot=False):
+        """
+        Parse the CSV into the scheduler. With use_snapshot, restore from the binary snapshot of
+        the same CSV when there is a valid one, and write a fresh snapshot after parsing otherwise.
+        """
+        if use_snapshot and data_snapshot.load_snapshot(self):
+            print(f"[INFO] Restored {len(self.tasks)} task instances from the snapshot of {self.csv_file_path}")
+            return
         data_loader.load_data_from_csv(self)
-
-    def generate_global_priority_list(self, allow_late_delivery=True, silent_mode=False):
-        # algorithms.schedule_tasks(self, allow_late_delivery=allow_late_delivery, silent_mode=silent_mode)
-        print("\n[INFO] Instantiating and running CP-SAT solver...")
-        cp_scheduler = cp_sat_solver.CpSatScheduler(self)
-        new_schedule = cp_scheduler.solve()
-
-        if new_schedule:
-            self.task_schedule = new_schedule
-            print("[INFO] CP-SAT solver returned a valid schedule.")
+        if use_snapshot:
+            try:
+                data_snapshot.save_snapshot(self)
+            except OSError as e:
+                print(f"[WARNING] Could not write the data snapshot: {e}")
+
+    def generate_global_priority_list(self, allow_late_delivery=True, silent_mode=False, method='cp_sat',
+                                      hint_schedule=None, on_solution=None, time_limit=180.0, improve_seconds=0.0,
+                                      now=None, freeze_hours=0.0, num_workers=None):
+        """
+        Schedule all tasks and rebuild the global priority list.
+        method='heuristic' runs the list scheduler once, method='portfolio' runs it under several
+        priority rules in parallel and keeps the best (both fast, used to publish a first schedule);
+        method='cp_sat' runs the solver, optionally warm-started from hint_schedule and
+        reporting each improving solution to on_solution(schedule, objective).
+        improve_seconds > 0 runs the local-search post-processor on the result for that long.
+        With now set, the current task_schedule is re-planned on a frozen horizon: tasks completed
+        by now are dropped, tasks started or starting within freeze_hours keep their times.
+        num_workers caps the CP-SAT search threads so concurrent solves can share the cores;
+        without it the solve takes its threads from the solver governor's core budget.
+        With a solve_cache set, a CP-SAT solve of an identical problem is answered from the cache
+        and one of the same task network with changed data is warm-started from it.
+        """
+        frozen_horizon = horizon.split_frozen_horizon(self, now, freeze_hours) if now is not None else None
+
+        if method == 'heuristic':
+            algorithms.schedule_tasks(self, allow_late_delivery=allow_late_delivery, silent_mode=True,
+                                      frozen_horizon=frozen_horizon)
+            print(f"[INFO] Heuristic list schedule placed {len(self.task_schedule)}/{len(self.tasks)} tasks.")
+        elif method == 'portfolio':
+            portfolio.run_priority_portfolio(self, frozen_horizon=frozen_horizon)
         else:
-            print("[ERROR] CP-SAT solver failed to find a solution. No schedule was generated.")
-            # Clear the schedule to indicate failure
-            self.task_schedule = {}
+            # Frozen-horizon re-plans depend on the plan being executed, so they are not cached
+            cache = self.solve_cache if frozen_horizon is None else None
+            cache_keys = solve_cache.problem_keys(self) if cache else None
+            cache_config = {'time_limit': time_limit}
+            cached = cache.lookup('cp_sat', cache_keys, cache_config) if cache else None
+
+            if cached:
+                print(f"[INFO] Solve cache hit: reusing a {cached['status']} schedule "
+                      f"(objective {cached['objective']}, bound {cached['bound']}).")
+                new_schedule = cached['payload']
+            else:
+                if cache and not hint_schedule:
+                    nearest = cache.nearest('cp_sat', cache_keys)
+                    if nearest:
+                        print("[INFO] Solve cache: warm-starting from the closest cached schedule.")
+                        hint_schedule = nearest['payload']
+                print("\n[INFO] Instantiating and running CP-SAT solver...")
+                cp_scheduler = cp_sat_solver.CpSatScheduler(self, frozen_horizon=frozen_horizon)
+                # Callers that did not size the solve get their threads from the process-wide budget
+                grant = governor.acquire('cp_sat') if num_workers is None else None
+                try:
+                    new_schedule = cp_scheduler.solve(time_limit=time_limit, hint_schedule=hint_schedule,
+                                                      on_solution=on_solution,
+                                                      num_workers=grant.threads if grant else num_workers)
+                finally:
+                    if grant:
+                        grant.release()
+                if cache and new_schedule:
+                    cache.store('cp_sat', cache_keys, cache_config, new_schedule,
+                                status=cp_scheduler.status_name, objective=cp_scheduler.objective_value,
+                                bound=cp_scheduler.best_bound,
+                                model_proto=cp_scheduler.model.Proto().SerializeToString() if cache.keep_models else None)
+
+            if new_schedule:
+                self.task_schedule = new_schedule
+                print("[INFO] CP-SAT solver returned a valid schedule.")
+            else:
+                print("[ERROR] CP-SAT solver failed to find a solution. No schedule was generated.")
+                # Clear the schedule to indicate failure
+                self.task_schedule = {}
+
+        if improve_seconds and self.task_schedule:
+            local_search.improve_schedule(self, time_budget=improve_seconds, frozen_horizon=frozen_horizon)
 
         conflicts = validation.check_resource_conflicts(self)
         if conflicts and not silent_mode:
             print(f"\n[WARNING] Found {len(conflicts)} resource conflicts")
 
+        return self.build_global_priority_list()
+
+    def build_global_priority_list(self):
+        """Rank the entries of the current task_schedule for the dashboard."""
         priority_data = []
         for task_instance_id, schedule in self.task_schedule.items():
             # If the task was split, recover the original instance ID for metrics and lookups
@@ -170,6 +248,36 @@ class ProductionScheduler:
         self.global_priority_list = priority_data
         return priority_data
 
+    def schedule_tasks(self, allow_late_delivery=False, silent_mode=False, priority_fn=None, frozen_horizon=None):
+        return algorithms.schedule_tasks(self, allow_late_delivery=allow_late_delivery,
+                                         silent_mode=silent_mode, priority_fn=priority_fn,
+                                         frozen_horizon=frozen_horizon)
+
+    def run_priority_portfolio(self, rules=portfolio.DEFAULT_RULES, seeds_per_rule=portfolio.DEFAULT_SEEDS_PER_RULE,
+                               workers=None, frozen_horizon=None):
+        return portfolio.run_priority_portfolio(self, rules=rules, seeds_per_rule=seeds_per_rule, workers=workers,
+                                                frozen_horizon=frozen_horizon)
+
+    def improve_schedule(self, time_budget=5.0, lateness_weights=None, finish_weights=None, frozen_horizon=None):
+        return local_search.improve_schedule(self, time_budget=time_budget, lateness_weights=lateness_weights,
+                                             finish_weights=finish_weights, frozen_horizon=frozen_horizon)
+
+    def split_frozen_horizon(self, now, freeze_hours=0.0):
+        return horizon.split_frozen_horizon(self, now, freeze_hours)
+
+    def simulate_execution(self, dispatch_rule='planned', seed=None, until=None, **options):
+        return simulation.simulate_execution(self, dispatch_rule=dispatch_rule, seed=seed, until=until, **options)
+
+    def compare_dispatch_rules(self, rules=simulation.DISPATCH_RULES, replications=20, seed=None, **options):
+        return simulation.compare_dispatch_rules(self, rules=rules, replications=replications, seed=seed, **options)
+
+    def repair_schedule(self, updates, allow_pull_in=False):
+        return repair.repair_schedule(self, updates, allow_pull_in=allow_pull_in)
+
+    def scenario_view(self, **scenario_state):
+        """Lightweight scheduler for one scenario that shares this scheduler's problem data."""
+        return ScenarioView(self, **scenario_state)
+
     def build_dynamic_dependencies(self):
         return constraints.build_dynamic_dependencies(self)
 
@@ -213,11 +321,16 @@ class ProductionScheduler:
     def print_delivery_analysis(self, scenario_name=""):
         return reporting.print_delivery_analysis(self, scenario_name)
 
-    def scenario_1_csv_headcount(self):
-        return scenarios.scenario_1_csv_headcount(self)
+    def scenario_1_csv_headcount(self, time_limit_seconds=60, num_workers=8, hint_schedule=None):
+        return scenarios.scenario_1_csv_headcount(self, time_limit_seconds=time_limit_seconds, num_workers=num_workers,
+                                                  hint_schedule=hint_schedule)
 
-    def scenario_3_optimal_schedule(self):
-        return scenarios.scenario_3_optimal_schedule(self)
+    def scenario_3_optimal_schedule(self, time_limit_seconds=90, num_workers=8, hint_schedule=None):
+        return scenarios.scenario_3_optimal_schedule(self, time_limit_seconds=time_limit_seconds, num_workers=num_workers,
+                                                     hint_schedule=hint_schedule)
+
+    def simulate_schedule_risk(self, n_samples=5000, seed=None, workers=None, **kwargs):
+        return risk.simulate_schedule_risk(self, n_samples=n_samples, seed=seed, workers=workers, **kwargs)
 
     def validate_dag(self):
         return validation.validate_dag(self)
@@ -234,5 +347,39 @@ class ProductionScheduler:
     def calculate_lateness_metrics(self):
         return metrics.calculate_lateness_metrics(self)
 
+    def calculate_total_lateness_minutes(self, schedule=None):
+        return metrics.calculate_total_lateness_minutes(self, schedule)
+
     def calculate_makespan(self):
         return metrics.calculate_makespan(self)
+
+
+class ScenarioView(ProductionScheduler):
+    """
+    A scenario on top of a loaded scheduler. The view owns only the scenario state - the
+    schedule, the priority list and the team capacities - and reads everything else (tasks,
+    constraints, calendars, dependency caches) from the base scheduler without copying it.
+    Attributes assigned on the view stay on the view, so the base is never modified through
+    it; only the owned state may be mutated in place. Every scheduler method works on a view.
+    """
+    OWNED_STATE = ('task_schedule', 'global_priority_list', 'team_capacity', 'quality_team_capacity',
+                   'customer_team_capacity')
+
+    def __init__(self, base, task_schedule=None, global_priority_list=None, team_capacity=None,
+                 quality_team_capacity=None, customer_team_capacity=None):
+        # No ProductionScheduler.__init__: the problem data stays on the base
+        self._base = base
+        self.task_schedule = {} if task_schedule is None else task_schedule
+        self.global_priority_list = [] if global_priority_list is None else global_priority_list
+        # Capacities are small and scenarios change them in place, so the view gets its own copies
+        self.team_capacity = dict(base.team_capacity if team_capacity is None else team_capacity)
+        self.quality_team_capacity = dict(base.quality_team_capacity if quality_team_capacity is None
+                                          else quality_team_capacity)
+        self.customer_team_capacity = dict(base.customer_team_capacity if customer_team_capacity is None
+                                           else customer_team_capacity)
+
+    def __getattr__(self, name):
+        # Only reached for attributes the view does not hold itself
+        if name == '_base':
+            raise AttributeError(name)
+        return getattr(self._base, name)
@@ -3,6 +3,7 @@
 import pandas as pd
 from collections import defaultdict
 from datetime import datetime, timedelta
+from . import shifts
 
 def calculate_lateness_metrics(scheduler):
     """Calculate lateness metrics per product"""
@@ -45,6 +46,26 @@ def calculate_lateness_metrics(scheduler):
 
     return metrics
 
+def calculate_total_lateness_minutes(scheduler, schedule=None):
+    """
+    Sum over products of minutes finished past the delivery date, the quantity the
+    CP-SAT objective minimizes. Unscheduled products count as infinitely late.
+    """
+    schedule = scheduler.task_schedule if schedule is None else schedule
+
+    product_ends = {}
+    for entry in schedule.values():
+        product = entry.get('product')
+        if product and (product not in product_ends or entry['end_time'] > product_ends[product]):
+            product_ends[product] = entry['end_time']
+
+    total = 0
+    for product, delivery_date in scheduler.delivery_dates.items():
+        if product not in product_ends:
+            return float('inf')
+        total += max(0, int((product_ends[product] - delivery_date).total_seconds() // 60))
+    return total
+
 def calculate_makespan(scheduler):
     """Calculate makespan in working days"""
     if not scheduler.task_schedule:
@@ -208,22 +229,8 @@ def calculate_day_utilization(scheduler, team, target_date):
             if task_date == target_date:
                 total_minutes += schedule['duration'] * schedule['mechanics_required']
 
-    # FIX: Use actual shift hours instead of hardcoded 8
-    team_shifts = scheduler.team_shifts.get(team, scheduler.quality_team_shifts.get(team, ['1st']))
-    total_available_minutes = 0
-
-    for shift in team_shifts:
-        shift_info = scheduler.shift_hours.get(shift, {'start': '6:00', 'end': '14:30'})
-        start_hour, start_min = _parse_shift_time(shift_info['start'])
-        end_hour, end_min = _parse_shift_time(shift_info['end'])
-
-        # Calculate shift duration
-        if shift == '3rd':  # Crosses midnight
-            shift_minutes = ((24 - start_hour) * 60 - start_min) + (end_hour * 60 + end_min)
-        else:
-            shift_minutes = (end_hour * 60 + end_min) - (start_hour * 60 + start_min)
-
-        total_available_minutes += shift_minutes * capacity
+    # Use actual shift hours from the compiled shift table instead of hardcoded 8
+    total_available_minutes = shifts.team_shift_minutes(scheduler, team) * capacity
 
     if total_available_minutes > 0:
         return (total_minutes / total_available_minutes) * 100
@@ -357,37 +364,10 @@ def calculate_average_utilization_properly(scheduler):
     # Calculate total available capacity for day 1
     day1_capacity_minutes = 0
 
-    # Add mechanic team capacity
-    for team, capacity in scheduler.team_capacity.items():
+    # Add mechanic and quality team capacity
+    for team, capacity in list(scheduler.team_capacity.items()) + list(scheduler.quality_team_capacity.items()):
         if capacity > 0:
-            shifts = scheduler.team_shifts.get(team, ['1st'])
-            for shift in shifts:
-                shift_info = scheduler.shift_hours.get(shift, {'start': '6:00', 'end': '14:30'})
-                start_hour, start_min = _parse_shift_time(shift_info['start'])
-                end_hour, end_min = _parse_shift_time(shift_info['end'])
-
-                if shift == '3rd':  # Crosses midnight
-                    shift_minutes = ((24 - start_hour) * 60 - start_min) + (end_hour * 60 + end_min)
-                else:
-                    shift_minutes = (end_hour * 60 + end_min) - (start_hour * 60 + start_min)
-
-                day1_capacity_minutes += shift_minutes * capacity
-
-    # Add quality team capacity
-    for team, capacity in scheduler.quality_team_capacity.items():
-        if capacity > 0:
-            shifts = scheduler.quality_team_shifts.get(team, ['1st'])
-            for shift in shifts:
-                shift_info = scheduler.shift_hours.get(shift, {'start': '6:00', 'end': '14:30'})
-                start_hour, start_min = _parse_shift_time(shift_info['start'])
-                end_hour, end_min = _parse_shift_time(shift_info['end'])
-
-                if shift == '3rd':
-                    shift_minutes = ((24 - start_hour) * 60 - start_min) + (end_hour * 60 + end_min)
-                else:
-                    shift_minutes = (end_hour * 60 + end_min) - (start_hour * 60 + start_min)
-
-                day1_capacity_minutes += shift_minutes * capacity
+            day1_capacity_minutes += shifts.team_shift_minutes(scheduler, team) * capacity
 
     if day1_capacity_minutes > 0:
         return (day1_work_minutes / day1_capacity_minutes) * 100
@@ -478,28 +458,3 @@ def calculate_gap_penalty(scheduler, team, proposed_start, proposed_end):
                     penalty += gap * 10
 
     return penalty
-
-def _parse_shift_time(time_str):
-    """Helper to parse shift time string into hour and minute"""
-    # Remove any whitespace
-    time_str = time_str.strip()
-
-    # Handle AM/PM format if present
-    if 'AM' in time_str or 'PM' in time_str:
-        time_str_clean = time_str.replace(' AM', '').replace(' PM', '').replace('AM', '').replace('PM', '')
-        time_parts = time_str_clean.split(':')
-        hour = int(time_parts[0])
-        minute = int(time_parts[1]) if len(time_parts) > 1 else 0
-
-        # Adjust for PM
-        if 'PM' in time_str and hour != 12:
-            hour += 12
-        elif 'AM' in time_str and hour == 12:
-            hour = 0
-    else:
-        # 24-hour format
-        time_parts = time_str.split(':')
-        hour = int(time_parts[0])
-        minute = int(time_parts[1]) if len(time_parts) > 1 else 0
-
-    return hour, minute
@@ -0,0 +1,210 @@
+# src/scheduler/portfolio.py
+# Priority-rule portfolio for the list scheduler: runs schedule_tasks under several
+# priority rules and random tie-breaking seeds in worker processes and keeps the best.
+
+import multiprocessing
+import os
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from . import algorithms, constraints
+
+DEFAULT_RULES = ('blend', 'lft', 'most_successors', 'min_float', 'resource_weighted_cp')
+DEFAULT_SEEDS_PER_RULE = 4
+
+
+def _topological_order(scheduler, successors):
+    """Tasks in precedence order; tasks on a dependency cycle (and after one) come last, in task order."""
+    in_degree = defaultdict(int)
+    for task, task_successors in successors.items():
+        for successor in task_successors:
+            in_degree[successor] += 1
+
+    order = [t for t in scheduler.tasks if in_degree[t] == 0]
+    for task in order:
+        for successor in successors.get(task, []):
+            in_degree[successor] -= 1
+            if in_degree[successor] == 0:
+                order.append(successor)
+
+    if len(order) < len(scheduler.tasks):
+        placed = set(order)
+        cyclic = [t for t in scheduler.tasks if t not in placed]
+        print(f"[WARNING] {len(cyclic)} tasks are on or behind a dependency cycle; "
+              f"the priority rules ignore their cycle edges")
+        order.extend(cyclic)
+    return order
+
+
+def compute_rule_keys(scheduler, rules=DEFAULT_RULES):
+    """
+    Static priority keys per task for each rule (smaller is scheduled first), computed
+    once on the precedence network ignoring resources:
+      lft                   latest finish time against the product's delivery date
+      most_successors       number of transitive successors (more goes first)
+      min_float             total float (latest start - earliest start)
+      resource_weighted_cp  longest path to the end weighting each task by its team's load
+    'blend' is the default calculate_task_priority and has no static key.
+    Tasks on a dependency cycle still get a key for every rule; the cycle's back edges are ignored.
+    """
+    successors_index, _ = constraints.get_dependency_index(scheduler)
+    successors = {t: [s for s in successors_index.get(t, []) if s in scheduler.tasks] for t in scheduler.tasks}
+    order = _topological_order(scheduler, successors)
+    duration = {t: int(info['duration']) for t, info in scheduler.tasks.items()}
+    origin = scheduler.start_date
+
+    keys = {}
+
+    if {'lft', 'min_float'} & set(rules):
+        earliest_start = dict.fromkeys(scheduler.tasks, 0)
+        for task in order:
+            finish = earliest_start[task] + duration[task]
+            for successor in successors[task]:
+                earliest_start[successor] = max(earliest_start[successor], finish)
+
+        latest_finish = {}
+        for task in reversed(order):
+            product = scheduler.tasks[task].get('product')
+            delivery = scheduler.delivery_dates.get(product)
+            deadline = (delivery - origin).total_seconds() / 60 if delivery is not None else float('inf')
+            latest_finish[task] = min([deadline] + [latest_finish[s] - duration[s] for s in successors[task]
+                                                    if s in latest_finish])
+
+        if 'lft' in rules:
+            keys['lft'] = latest_finish
+        if 'min_float' in rules:
+            keys['min_float'] = {t: latest_finish[t] - duration[t] - earliest_start[t] for t in latest_finish}
+
+    if 'most_successors' in rules:
+        index = {t: i for i, t in enumerate(order)}
+        descendants = {}
+        for task in reversed(order):
+            bits = 0
+            for successor in successors[task]:
+                bits |= (1 << index[successor]) | descendants.get(successor, 0)
+            descendants[task] = bits
+        keys['most_successors'] = {t: -bin(bits).count('1') for t, bits in descendants.items()}
+
+    if 'resource_weighted_cp' in rules:
+        capacities = {**scheduler.team_capacity, **scheduler.quality_team_capacity,
+                      **scheduler.customer_team_capacity}
+        team_load = defaultdict(float)
+        for task, info in scheduler.tasks.items():
+            team = info.get('team_skill') or info.get('team')
+            if capacities.get(team):
+                team_load[team] += duration[task] * info.get('mechanics_required', 1) / capacities[team]
+        mean_load = (sum(team_load.values()) / len(team_load)) if team_load else 1.0
+
+        weighted_path = {}
+        for task in reversed(order):
+            info = scheduler.tasks[task]
+            team = info.get('team_skill') or info.get('team')
+            weight = duration[task] * (team_load.get(team, mean_load) / mean_load if mean_load else 1.0)
+            weighted_path[task] = weight + max((weighted_path[s] for s in successors[task] if s in weighted_path),
+                                               default=0)
+        keys['resource_weighted_cp'] = {t: -length for t, length in weighted_path.items()}
+
+    return keys
+
+
+def _make_priority_fn(rule, rule_keys, seed):
+    """Priority function for schedule_tasks; a non-zero seed breaks ties randomly."""
+    rng = random.Random(seed)
+    tie_breaker = (lambda: rng.random()) if seed else (lambda: 0)
+
+    if rule == 'blend':
+        return lambda scheduler, task_id: (algorithms.calculate_task_priority(scheduler, task_id), tie_breaker())
+
+    rule_key = rule_keys[rule]
+    return lambda scheduler, task_id: (rule_key.get(task_id, 0), tie_breaker())
+
+
+def score_schedule(scheduler):
+    """(unscheduled tasks, total lateness minutes, sum of product finishes in minutes) - lower is better."""
+    unscheduled = len(set(scheduler.tasks) - set(scheduler.task_schedule))
+    lateness = scheduler.calculate_total_lateness_minutes()
+
+    product_finish = {}
+    for entry in scheduler.task_schedule.values():
+        product = entry.get('product')
+        if product not in product_finish or entry['end_time'] > product_finish[product]:
+            product_finish[product] = entry['end_time']
+    flow_time = sum((finish - scheduler.start_date).total_seconds() / 60 for finish in product_finish.values())
+    return unscheduled, lateness, flow_time
+
+
+def _run_candidate(scheduler, rule, seed, rule_keys, frozen_horizon=None):
+    """Schedule once with one rule and seed; returns (rule, seed, score, schedule)."""
+    scheduler.schedule_tasks(silent_mode=True, priority_fn=_make_priority_fn(rule, rule_keys, seed),
+                             frozen_horizon=frozen_horizon)
+    return rule, seed, score_schedule(scheduler), scheduler.task_schedule
+
+
+# Worker-process state, set once per process by _init_worker
+_worker_scheduler = None
+_worker_rule_keys = None
+_worker_frozen_horizon = None
+
+
+def _init_worker(scheduler, rule_keys, frozen_horizon=None):
+    global _worker_scheduler, _worker_rule_keys, _worker_frozen_horizon
+    _worker_scheduler = scheduler
+    _worker_rule_keys = rule_keys
+    _worker_frozen_horizon = frozen_horizon
+
+
+def _run_candidate_in_worker(rule, seed):
+    return _run_candidate(_worker_scheduler, rule, seed, _worker_rule_keys, _worker_frozen_horizon)
+
+
+def run_priority_portfolio(scheduler, rules=DEFAULT_RULES, seeds_per_rule=DEFAULT_SEEDS_PER_RULE, workers=None,
+                           frozen_horizon=None):
+    """
+    Run the list scheduler once per (rule, seed) - seed 0 is the deterministic order -
+    spread over worker processes, and keep the schedule with the fewest unscheduled
+    tasks, then the lowest total lateness, then the earliest product finishes.
+    Leaves the winner in scheduler.task_schedule and returns a summary of all runs.
+    frozen_horizon is passed on to every schedule_tasks run.
+    """
+    started = time.time()
+    rule_keys = compute_rule_keys(scheduler, rules)
+    candidates = [(rule, seed) for rule in rules for seed in range(seeds_per_rule)]
+
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, len(candidates)))
+
+    results = []
+    if workers == 1:
+        for rule, seed in candidates:
+            rule, seed, score, schedule = _run_candidate(scheduler, rule, seed, rule_keys, frozen_horizon)
+            results.append((score, rule, seed, dict(schedule)))
+    else:
+        # Workers get their own copy of the scheduler once, not per candidate. Spawned, not
+        # forked: this runs inside the server, whose threads may hold locks at fork time
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(scheduler, rule_keys, frozen_horizon),
+                                 mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = [pool.submit(_run_candidate_in_worker, rule, seed) for rule, seed in candidates]
+            for future in as_completed(futures):
+                rule, seed, score, schedule = future.result()
+                results.append((score, rule, seed, schedule))
+
+    results.sort(key=lambda r: (r[0], DEFAULT_RULES.index(r[1]) if r[1] in DEFAULT_RULES else 99, r[2]))
+    best_score, best_rule, best_seed, best_schedule = results[0]
+    scheduler.task_schedule = best_schedule
+
+    elapsed = time.time() - started
+    print(f"[INFO] Priority portfolio: {len(results)} runs on {workers} worker(s) in {elapsed:.2f}s, "
+          f"best rule '{best_rule}' seed {best_seed} with {best_score[1]} minutes total lateness")
+
+    return {
+        'best_rule': best_rule,
+        'best_seed': best_seed,
+        'total_lateness_minutes': best_score[1],
+        'unscheduled': best_score[0],
+        'elapsed_seconds': round(elapsed, 3),
+        'runs': [{'rule': rule, 'seed': seed, 'unscheduled': score[0],
+                  'total_lateness_minutes': score[1], 'flow_time_minutes': score[2]}
+                 for score, rule, seed, _ in results]
+    }
@@ -0,0 +1,153 @@
+# src/scheduler/repair.py
+# Schedule repair: applies actual starts/finishes or delays reported from the floor and
+# re-times only the downstream cone of the affected tasks; everything else stays put.
+
+import time
+from collections import deque
+from . import local_search, timeline
+
+
+def _resolve_entries(state, task_id):
+    """Schedule entries for a task instance id (all of its parts) or a single part id."""
+    if task_id in state.start:
+        return [task_id]
+    return list(state.task_parts.get(task_id, []))
+
+
+def _pin(state, entries, update):
+    """Move the reported entries to their actual times, whatever that does to capacity."""
+    first, last = entries[0], entries[-1]
+    if update.get('actual_start') is not None:
+        offset = timeline.to_minutes(state.origin, update['actual_start']) - state.start[first]
+    else:
+        offset = int(update.get('delay_minutes') or 0)
+
+    for entry_id in entries:
+        state.unbook(entry_id)
+        new_start = state.start[entry_id] + offset
+        if entry_id == last and update.get('actual_finish') is not None:
+            new_end = timeline.to_minutes(state.origin, update['actual_finish'])
+            new_start = min(new_start, new_end)
+            # place() keys the product bookkeeping off the old end, so only change duration here
+            state.duration[entry_id] = new_end - new_start
+        state.place(entry_id, new_start, state.shift[entry_id])
+
+
+def _downstream_cone(state, roots):
+    cone = set()
+    queue = deque(roots)
+    while queue:
+        entry_id = queue.popleft()
+        for successor, _ in state.successors[entry_id]:
+            if successor not in cone and successor not in roots:
+                cone.add(successor)
+                queue.append(successor)
+    return cone
+
+
+def _topological(state, cone):
+    in_degree = {e: sum(1 for p, _ in state.predecessors[e] if p in cone) for e in cone}
+    order = [e for e in sorted(cone, key=lambda e: state.start[e]) if in_degree[e] == 0]
+    for entry_id in order:
+        for successor, _ in state.successors[entry_id]:
+            if successor in in_degree:
+                in_degree[successor] -= 1
+                if in_degree[successor] == 0:
+                    order.append(successor)
+    # Anything left is on a cycle; keep it in its current order
+    placed = set(order)
+    order.extend(sorted((e for e in cone if e not in placed), key=lambda e: state.start[e]))
+    return order
+
+
+def repair_schedule(scheduler, updates, allow_pull_in=False):
+    """
+    Repair scheduler.task_schedule after floor updates without a full re-solve.
+
+    updates maps a task instance id (or a '---part' entry id) to any of
+    'actual_start' / 'actual_finish' (datetimes) or 'delay_minutes'. Reported entries are
+    pinned at their actual times; every entry downstream of them is re-timed in
+    precedence order to its earliest slot on the capacity left by the untouched entries.
+    Unless allow_pull_in is set, downstream entries never move earlier than planned.
+
+    Returns the delta: the changed entries with old and new times, the products whose
+    finish moved, and any task ids that were not in the schedule.
+    """
+    started = time.time()
+    state = local_search.ScheduleState(scheduler)
+    previous = {e: (state.start[e], state.end[e]) for e in state.start}
+    previous_finish = {p: state.product_finish(p) for p in state.product_ends}
+
+    roots = set()
+    unknown = []
+    for task_id, update in updates.items():
+        entries = _resolve_entries(state, task_id)
+        if not entries:
+            unknown.append(task_id)
+            continue
+        _pin(state, entries, update)
+        roots.update(entries)
+
+    cone = _downstream_cone(state, roots)
+    for entry_id in cone:
+        state.unbook(entry_id)
+
+    unplaced = []
+    for entry_id in _topological(state, cone):
+        earliest = state.earliest_start(entry_id)
+        if not allow_pull_in:
+            earliest = max(earliest, previous[entry_id][0])
+        start, shift = None, state.shift[entry_id]
+        if state.resources[entry_id]:
+            start, shift = timeline.find_slot(state.resource_timelines(entry_id), state.calendar[entry_id],
+                                              earliest, state.duration[entry_id], state.units[entry_id])
+        if start is None:
+            if state.resources[entry_id]:
+                unplaced.append(entry_id)
+            start, shift = earliest, state.shift[entry_id]
+        state.place(entry_id, start, shift)
+
+    changed = [e for e in roots | cone if (state.start[e], state.end[e]) != previous[e]]
+    if changed:
+        state.write_back(changed)
+
+    origin = state.origin
+    delta = []
+    for entry_id in sorted(changed, key=lambda e: state.start[e]):
+        old_start, old_end = previous[entry_id]
+        delta.append({
+            'task_id': entry_id,
+            'product': state.product[entry_id],
+            'previous_start': timeline.to_datetime(origin, old_start),
+            'previous_end': timeline.to_datetime(origin, old_end),
+            'start_time': timeline.to_datetime(origin, state.start[entry_id]),
+            'end_time': timeline.to_datetime(origin, state.end[entry_id]),
+            'shift': state.shift[entry_id],
+            'shift_minutes': state.start[entry_id] - old_start,
+        })
+
+    products = {}
+    for product, old_finish in previous_finish.items():
+        finish = state.product_finish(product)
+        if finish != old_finish:
+            due = state.due[product]
+            products[product] = {
+                'previous_finish': timeline.to_datetime(origin, old_finish),
+                'finish': timeline.to_datetime(origin, finish),
+                'lateness_days': round(max(0, finish - due) / 1440, 2) if due is not None else None,
+            }
+
+    elapsed = time.time() - started
+    print(f"[INFO] Schedule repair: {len(roots)} reported entries, cone of {len(cone)}, "
+          f"{len(changed)} changed in {elapsed * 1000:.0f}ms")
+    if unplaced:
+        print(f"[WARNING] {len(unplaced)} entries found no slot within the search horizon and were left at their earliest start")
+
+    return {
+        'changed': delta,
+        'products': products,
+        'cone_size': len(cone),
+        'unknown_tasks': unknown,
+        'unplaced': unplaced,
+        'elapsed_seconds': round(elapsed, 4),
+    }
@@ -0,0 +1,382 @@
+# src/scheduler/risk.py
+# Monte Carlo schedule-risk engine: samples task durations and late-part on-dock dates
+# and propagates them through the solved schedule's sequencing decisions with NumPy.
+
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+import numpy as np
+from . import shifts, timeline
+
+MINUTES_PER_DAY = 24 * 60
+DEFAULT_DURATION_SPREAD = (0.9, 1.0, 1.5)   # triangular (low, mode, high) factor on planned work
+DEFAULT_ON_DOCK_SLIP_DAYS = (-1.0, 0.0, 5.0)  # triangular (low, mode, high) slip of on-dock dates
+DEFAULT_PERCENTILES = (50, 80, 95)
+MIN_SAMPLES_PER_WORKER = 250
+
+
+def _resource_demands(scheduler, task_info):
+    """(resource, demand) pairs a task consumes, mirroring the CP-SAT resource model."""
+    demand = task_info.get('mechanics_required', 1)
+    return [(resource, demand) for resource in timeline.task_resources(scheduler, task_info)]
+
+
+def _chain_resource_edges(scheduler, node_ids, planned_start, planned_end):
+    """
+    Converts the schedule's resource decisions into precedence edges by chaining each
+    unit of every resource: a task takes over the units that were released last before
+    it started. The resulting partial order stays resource-feasible for any durations.
+    """
+    all_resources = {**scheduler.team_capacity, **scheduler.quality_team_capacity,
+                     **scheduler.customer_team_capacity}
+
+    resource_nodes = defaultdict(list)
+    for index, node_id in enumerate(node_ids):
+        task_info = scheduler.tasks.get(node_id.split('---part')[0], {})
+        for resource, demand in _resource_demands(scheduler, task_info):
+            if all_resources.get(resource, 0) > 0:
+                resource_nodes[resource].append((index, demand))
+
+    edges = set()
+    unchained = 0
+    for resource, members in resource_nodes.items():
+        capacity = all_resources[resource]
+        unit_last_node = [-1] * capacity
+        unit_last_end = [float('-inf')] * capacity
+
+        for index, demand in sorted(members, key=lambda m: (planned_start[m[0]], planned_end[m[0]])):
+            eligible = sorted((u for u in range(capacity) if unit_last_end[u] <= planned_start[index]),
+                              key=lambda u: unit_last_end[u], reverse=True)
+            chosen = eligible[:demand]
+            if len(chosen) < demand:
+                # The schedule overloads this resource here; keep going without inventing edges
+                unchained += 1
+                spare = sorted((u for u in range(capacity) if u not in chosen), key=lambda u: unit_last_end[u])
+                chosen += spare[:demand - len(chosen)]
+
+            for unit in chosen:
+                predecessor = unit_last_node[unit]
+                if predecessor >= 0 and unit_last_end[unit] <= planned_start[index]:
+                    edges.add((predecessor, index, 'FS'))
+                unit_last_node[unit] = index
+                unit_last_end[unit] = planned_end[index]
+
+    return edges, unchained
+
+
+def _compute_levels(node_count, edges):
+    """Longest-path level of every node; nodes left over by a cycle go to a final level."""
+    successors = defaultdict(list)
+    in_degree = [0] * node_count
+    for predecessor, successor, _ in edges:
+        successors[predecessor].append(successor)
+        in_degree[successor] += 1
+
+    level = [0] * node_count
+    frontier = [n for n in range(node_count) if in_degree[n] == 0]
+    processed = 0
+    while frontier:
+        next_frontier = []
+        for node in frontier:
+            processed += 1
+            for successor in successors[node]:
+                level[successor] = max(level[successor], level[node] + 1)
+                in_degree[successor] -= 1
+                if in_degree[successor] == 0:
+                    next_frontier.append(successor)
+        frontier = next_frontier
+
+    cyclic = set()
+    if processed < node_count:
+        final_level = max(level) + 1
+        cyclic = {n for n in range(node_count) if in_degree[n] > 0}
+        for node in cyclic:
+            level[node] = final_level
+    return level, cyclic
+
+
+def build_risk_network(scheduler):
+    """
+    Compiles the solved schedule into a picklable activity network: planned times in
+    minutes from scheduler.start_date, precedence and resource-chain edges grouped by
+    topological level as padded index arrays, and product membership.
+    """
+    if not scheduler.task_schedule:
+        raise ValueError("No schedule to simulate. Solve a scenario first.")
+
+    origin = scheduler.start_date
+    node_ids = sorted(scheduler.task_schedule, key=lambda t: scheduler.task_schedule[t]['start_time'])
+    node_index = {node_id: i for i, node_id in enumerate(node_ids)}
+    node_count = len(node_ids)
+
+    def to_minutes(dt):
+        return (dt - origin).total_seconds() / 60
+
+    planned_start = np.array([to_minutes(scheduler.task_schedule[n]['start_time']) for n in node_ids])
+    planned_end = np.array([to_minutes(scheduler.task_schedule[n]['end_time']) for n in node_ids])
+    work = np.array([float(scheduler.task_schedule[n].get('duration') or 0) for n in node_ids])
+
+    # Parts of the same task, in order, so dependencies attach to the first and last part
+    task_parts = defaultdict(list)
+    for node_id in node_ids:
+        task_parts[node_id.split('---part')[0]].append(node_index[node_id])
+    for parts in task_parts.values():
+        parts.sort(key=lambda i: planned_start[i])
+
+    edges = set()
+    for parts in task_parts.values():
+        for earlier, later in zip(parts, parts[1:]):
+            edges.add((earlier, later, 'FS'))
+
+    for const in scheduler.build_dynamic_dependencies():
+        pred_parts = task_parts.get(const['First'])
+        succ_parts = task_parts.get(const['Second'])
+        if not pred_parts or not succ_parts:
+            continue
+        relationship = const['Relationship']
+        if relationship in ('Start <= Start', 'Start = Start'):
+            edges.add((pred_parts[0], succ_parts[0], 'SS'))
+        elif relationship == 'Finish <= Finish':
+            edges.add((pred_parts[-1], succ_parts[-1], 'FF'))
+        else:
+            edges.add((pred_parts[-1], succ_parts[0], 'FS'))
+
+    resource_edges, unchained = _chain_resource_edges(scheduler, node_ids, planned_start, planned_end)
+    edges |= resource_edges
+
+    level, cyclic = _compute_levels(node_count, edges)
+    if cyclic:
+        print(f"[WARNING] {len(cyclic)} schedule entries are on dependency cycles; their incoming edges are ignored")
+        edges = {e for e in edges if e[0] not in cyclic or e[1] not in cyclic}
+
+    incoming = defaultdict(list)
+    for predecessor, successor, kind in edges:
+        incoming[successor].append((predecessor, kind))
+
+    # Padded per-level arrays; index node_count is a sentinel column that is always -inf
+    levels = []
+    for lvl in range(max(level) + 1 if node_count else 0):
+        nodes = np.array([n for n in range(node_count) if level[n] == lvl], dtype=np.int64)
+        width = max(1, max(len(incoming[n]) for n in nodes))
+        pred_idx = np.full((len(nodes), width), node_count, dtype=np.int64)
+        use_start = np.zeros((len(nodes), width), dtype=bool)
+        finish_finish = np.zeros((len(nodes), width), dtype=bool)
+        for row, node in enumerate(nodes):
+            for col, (predecessor, kind) in enumerate(incoming[node]):
+                pred_idx[row, col] = predecessor
+                use_start[row, col] = kind == 'SS'
+                finish_finish[row, col] = kind == 'FF'
+        levels.append({'nodes': nodes, 'pred_idx': pred_idx, 'use_start': use_start, 'ff': finish_finish})
+
+    # Late parts: earliest start follows the on-dock date (+ configured delay) at 06:00
+    release = np.full(node_count, -np.inf)
+    late_part_nodes = []
+    for task_id, is_late in scheduler.late_part_tasks.items():
+        if not is_late or task_id not in task_parts:
+            continue
+        original_task_id = scheduler.instance_to_original_task.get(task_id, task_id)
+        on_dock_date = scheduler.on_dock_dates.get(original_task_id)
+        if on_dock_date is None:
+            continue
+        earliest = on_dock_date + timedelta(days=scheduler.late_part_delay_days)
+        earliest = earliest.replace(hour=6, minute=0, second=0, microsecond=0)
+        first_part = task_parts[task_id][0]
+        release[first_part] = to_minutes(earliest)
+        late_part_nodes.append(first_part)
+
+    # Overruns are in working minutes of the team; stretch them into calendar minutes
+    stretch = np.ones(node_count)
+    for i, node_id in enumerate(node_ids):
+        task_info = scheduler.tasks.get(node_id.split('---part')[0], {})
+        demands = _resource_demands(scheduler, task_info)
+        if demands:
+            shift_minutes = shifts.team_shift_minutes(scheduler, demands[0][0])
+            if shift_minutes > 0:
+                stretch[i] = (7 * MINUTES_PER_DAY) / (5 * shift_minutes)
+
+    products = sorted({scheduler.task_schedule[n].get('product') for n in node_ids} - {None})
+    product_nodes = {p: np.array([i for i, n in enumerate(node_ids)
+                                  if scheduler.task_schedule[n].get('product') == p], dtype=np.int64)
+                     for p in products}
+
+    return {
+        'node_ids': node_ids,
+        'task_ids': [n.split('---part')[0] for n in node_ids],
+        'planned_start': planned_start,
+        'planned_end': planned_end,
+        'work': work,
+        'stretch': stretch,
+        'release': release,
+        'late_part_nodes': np.array(late_part_nodes, dtype=np.int64),
+        'levels': levels,
+        'products': products,
+        'product_nodes': product_nodes,
+        'edge_count': len(edges),
+        'resource_edge_count': len(resource_edges),
+        'unchained_assignments': unchained
+    }
+
+
+def simulate_network(network, n_samples, seed=None, duration_spread=DEFAULT_DURATION_SPREAD,
+                     on_dock_slip_days=DEFAULT_ON_DOCK_SLIP_DAYS, allow_early_start=False):
+    """
+    Runs n_samples scenarios as one batch. Every level of the network is propagated with
+    array operations over (samples x tasks). Returns the completion minute of every product
+    per sample and, per schedule entry, the number of samples in which it was critical.
+    """
+    rng = np.random.default_rng(seed)
+    node_count = len(network['node_ids'])
+    planned_start = network['planned_start']
+    planned_span = network['planned_end'] - planned_start
+
+    low, mode, high = duration_spread
+    factors = rng.triangular(low, mode, high, size=(n_samples, node_count)) if high > low else np.full(
+        (n_samples, node_count), mode)
+    span = planned_span + (factors - 1.0) * network['work'] * network['stretch']
+    span = np.maximum(span, 0.0)
+
+    floor = np.broadcast_to(network['release'], (n_samples, node_count)).copy()
+    late_part_nodes = network['late_part_nodes']
+    if len(late_part_nodes):
+        slip_low, slip_mode, slip_high = on_dock_slip_days
+        slip = rng.triangular(slip_low, slip_mode, slip_high, size=(n_samples, len(late_part_nodes))) \
+            if slip_high > slip_low else np.full((n_samples, len(late_part_nodes)), slip_mode)
+        floor[:, late_part_nodes] += slip * MINUTES_PER_DAY
+    if not allow_early_start:
+        # Work is dispatched no earlier than planned; only lateness propagates
+        floor = np.maximum(floor, planned_start)
+
+    # One extra sentinel column that never binds
+    start = np.full((n_samples, node_count + 1), -np.inf)
+    end = np.full((n_samples, node_count + 1), -np.inf)
+    binding = []
+
+    for level in network['levels']:
+        nodes = level['nodes']
+        pred_idx = level['pred_idx']
+        pred_times = np.where(level['use_start'], start[:, pred_idx], end[:, pred_idx])
+        pred_times = pred_times - np.where(level['ff'], span[:, nodes][:, :, None], 0.0)
+
+        best = pred_times.argmax(axis=2)
+        bound = np.take_along_axis(pred_times, best[:, :, None], axis=2)[:, :, 0]
+        level_floor = floor[:, nodes]
+
+        level_start = np.maximum(np.maximum(level_floor, bound), 0.0)
+        start[:, nodes] = level_start
+        end[:, nodes] = level_start + span[:, nodes]
+
+        binding_pred = pred_idx[np.arange(len(nodes))[None, :], best]
+        binding_pred = np.where((bound >= level_floor) & (binding_pred < node_count), binding_pred, -1)
+        binding.append(binding_pred)
+
+    completions = np.empty((n_samples, len(network['products'])))
+    critical = np.zeros((n_samples, node_count + 1), dtype=bool)
+    rows = np.arange(n_samples)
+    for p, product in enumerate(network['products']):
+        members = network['product_nodes'][product]
+        product_end = end[:, members]
+        completions[:, p] = product_end.max(axis=1)
+        critical[rows, members[product_end.argmax(axis=1)]] = True
+
+    # Walk back along the binding predecessors of critical entries
+    for level, binding_pred in zip(reversed(network['levels']), reversed(binding)):
+        mask = critical[:, level['nodes']] & (binding_pred >= 0)
+        sample_rows, cols = np.nonzero(mask)
+        critical[sample_rows, binding_pred[sample_rows, cols]] = True
+
+    return completions, critical[:, :node_count].sum(axis=0)
+
+
+def _simulate_chunk(network, n_samples, seed, options):
+    """Worker-process entry point."""
+    return simulate_network(network, n_samples, seed=seed, **options)
+
+
+def simulate_schedule_risk(scheduler, n_samples=5000, seed=None, workers=None,
+                           duration_spread=DEFAULT_DURATION_SPREAD, on_dock_slip_days=DEFAULT_ON_DOCK_SLIP_DAYS,
+                           percentiles=DEFAULT_PERCENTILES, allow_early_start=False):
+    """
+    Quote risk-adjusted delivery dates for the current task_schedule.
+
+    Task work is sampled from a triangular distribution scaled on the planned duration and
+    late-part on-dock dates from a triangular slip in days. The schedule's sequencing
+    (precedences plus resource hand-overs) is kept fixed. Samples are split across worker
+    processes. Returns per-product completion percentiles and on-time probability, and a
+    per-task criticality index (share of samples in which the task drove a product's finish).
+    """
+    started = time.time()
+    network = build_risk_network(scheduler)
+
+    workers = workers or os.cpu_count() or 1
+    workers = max(1, min(workers, n_samples // MIN_SAMPLES_PER_WORKER))
+    options = {'duration_spread': duration_spread, 'on_dock_slip_days': on_dock_slip_days,
+               'allow_early_start': allow_early_start}
+
+    chunk_sizes = [n_samples // workers + (1 if i < n_samples % workers else 0) for i in range(workers)]
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+
+    if workers == 1:
+        results = [simulate_network(network, n_samples, seed=seeds[0], **options)]
+    else:
+        results = []
+        # Spawned, not forked: this runs inside the server, whose threads may hold locks at fork time
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = [pool.submit(_simulate_chunk, network, size, chunk_seed, options)
+                       for size, chunk_seed in zip(chunk_sizes, seeds)]
+            for future in as_completed(futures):
+                results.append(future.result())
+
+    completions = np.vstack([r[0] for r in results])
+    critical_counts = np.sum([r[1] for r in results], axis=0)
+
+    origin = scheduler.start_date
+
+    def to_datetime(minutes):
+        return origin + timedelta(minutes=float(minutes))
+
+    products = {}
+    for p, product in enumerate(network['products']):
+        samples = completions[:, p]
+        members = network['product_nodes'][product]
+        delivery_date = scheduler.delivery_dates.get(product)
+        result = {
+            'planned_completion': to_datetime(network['planned_end'][members].max()),
+            'mean_completion': to_datetime(samples.mean()),
+            'delivery_date': delivery_date,
+        }
+        for q in percentiles:
+            result[f'p{q}'] = to_datetime(np.percentile(samples, q))
+        if delivery_date is not None:
+            deadline = (delivery_date - origin).total_seconds() / 60
+            result['on_time_probability'] = round(float((samples <= deadline).mean()), 4)
+            for q in percentiles:
+                result[f'p{q}_lateness_days'] = round((result[f'p{q}'] - delivery_date).total_seconds() / 86400, 2)
+        products[product] = result
+
+    # A split task is as critical as its most critical part
+    criticality = defaultdict(float)
+    for i, task_id in enumerate(network['task_ids']):
+        criticality[task_id] = max(criticality[task_id], critical_counts[i] / n_samples)
+    criticality = dict(sorted(((t, round(float(c), 4)) for t, c in criticality.items()),
+                              key=lambda item: item[1], reverse=True))
+
+    elapsed = time.time() - started
+    print(f"[INFO] Simulated {n_samples} schedule scenarios over {len(network['node_ids'])} tasks/parts "
+          f"({network['edge_count']} edges) with {workers} worker(s) in {elapsed:.2f}s")
+
+    return {
+        'samples': n_samples,
+        'workers': workers,
+        'elapsed_seconds': round(elapsed, 3),
+        'products': products,
+        'criticality': criticality,
+        'network': {
+            'tasks': len(network['node_ids']),
+            'edges': network['edge_count'],
+            'resource_edges': network['resource_edge_count'],
+            'unchained_assignments': network['unchained_assignments']
+        }
+    }
@@ -0,0 +1,229 @@
+# src/scheduler/scenario_runner.py
+# Concurrent scenario solves: every scenario runs in its own worker process against the
+# same pickled problem snapshot, with the machine's cores split between the CP-SAT solves.
+
+import multiprocessing
+import pickle
+import threading
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+import ortools
+from . import scenarios, solve_cache
+from .solver_governor import governor
+from .main import ScenarioView
+
+SCENARIOS = ('baseline', 'scenario1', 'scenario3')
+
+# Solve settings of each startup scenario; with the inputs they identify a stored result
+SCENARIO_PARAMS = {
+    'baseline': {'method': 'cp_sat', 'time_limit_seconds': 180, 'hint': 'portfolio'},
+    'scenario1': {'method': 'cp_sat', 'time_limit_seconds': 60},
+    'scenario3': {'method': 'cp_sat', 'time_limit_seconds': 90},
+}
+
+# Scheduler state a scenario solve produces; what the solve cache keeps for it
+SCENARIO_STATE = ScenarioView.OWNED_STATE
+
+# Marks the end of a scenario's progress messages on the progress queue
+PROGRESS_DONE = None
+
+
+def snapshot(scheduler):
+    """Immutable snapshot of a loaded scheduler; each worker unpickles its own private copy."""
+    return pickle.dumps(scheduler, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+# The last snapshot of each scheduler, with the schedule it was taken with
+_shared_snapshots = weakref.WeakKeyDictionary()
+_shared_snapshots_lock = threading.Lock()
+
+
+def shared_snapshot(scheduler):
+    """
+    snapshot(scheduler), reused while the scheduler still holds the same schedule, so jobs
+    queued on one scheduler share one copy of the bytes instead of pickling it again each.
+    """
+    with _shared_snapshots_lock:
+        cached = _shared_snapshots.get(scheduler)
+        if cached is not None and cached[0] is scheduler.task_schedule:
+            return cached[1]
+    data = snapshot(scheduler)
+    with _shared_snapshots_lock:
+        _shared_snapshots[scheduler] = (scheduler.task_schedule, data)
+    return data
+
+
+def solver_profile():
+    """Identifies the solver build, so results from another OR-Tools version are not reused."""
+    return f'cp-sat ortools {ortools.__version__}'
+
+
+def scenario_params(scenario_id, late_part_delay_days):
+    """Everything besides the input data that a scenario's result depends on."""
+    return {**SCENARIO_PARAMS[scenario_id], 'late_part_delay_days': late_part_delay_days}
+
+
+def split_core_budget(scenario_ids, cores=None):
+    """Split the cores (default: the governor's budget) evenly between solves, at least one thread each."""
+    cores = cores or governor.cores
+    share, remainder = divmod(cores, len(scenario_ids))
+    return {scenario_id: max(1, share + (1 if i < remainder else 0))
+            for i, scenario_id in enumerate(scenario_ids)}
+
+
+def _cached_solve(scheduler, kind, config, solve):
+    """
+    Run solve() - which leaves its result on scheduler and returns True if it found one -
+    unless the scheduler's solve cache already holds this exact problem and config.
+    """
+    cache = scheduler.solve_cache
+    if cache is None:
+        return solve()
+    keys = solve_cache.problem_keys(scheduler)
+    cached = cache.lookup(kind, keys, config)
+    if cached:
+        print(f"[INFO] Solve cache hit for {kind}; skipping the model build and solve.")
+        for attr, value in cached['payload'].items():
+            setattr(scheduler, attr, value)
+        return True
+    solved = solve()
+    if solved:
+        cache.store(kind, keys, config, {attr: getattr(scheduler, attr) for attr in SCENARIO_STATE},
+                    status='SOLVED', objective=scheduler.calculate_total_lateness_minutes())
+    return solved
+
+
+# Worker-process state, set once per process by _init_worker
+_worker_snapshot = None
+_worker_progress = None
+
+
+def _init_worker(problem_snapshot, progress_queue):
+    global _worker_snapshot, _worker_progress
+    _worker_snapshot = problem_snapshot
+    _worker_progress = progress_queue
+
+
+def _solve_in_worker(scenario_id, num_workers, hint_schedule=None):
+    try:
+        return _solve_scenario(scenario_id, num_workers, hint_schedule)
+    finally:
+        # Sent even when loading the snapshot fails, so whoever drains the progress queue stops waiting
+        if scenario_id == 'baseline' and _worker_progress is not None:
+            _worker_progress.put((scenario_id, PROGRESS_DONE, PROGRESS_DONE))
+
+
+def _solve_scenario(scenario_id, num_workers, hint_schedule):
+    scheduler = pickle.loads(_worker_snapshot)
+    started = time.time()
+    time_limit = SCENARIO_PARAMS.get(scenario_id, {}).get('time_limit_seconds')
+
+    if scenario_id == 'baseline':
+        def report_progress(schedule, objective):
+            _worker_progress.put((scenario_id, schedule, objective))
+
+        scheduler.generate_global_priority_list(allow_late_delivery=True, silent_mode=True, hint_schedule=hint_schedule,
+                                                on_solution=report_progress if _worker_progress is not None else None,
+                                                time_limit=time_limit, num_workers=num_workers)
+        solved = bool(scheduler.task_schedule)
+    elif scenario_id == 'scenario1':
+        def solve():
+            result = scheduler.scenario_1_csv_headcount(time_limit_seconds=time_limit, num_workers=num_workers,
+                                                        hint_schedule=hint_schedule)
+            return bool(result) and result.get('status') == 'SUCCESS'
+        solved = _cached_solve(scheduler, scenario_id, {'time_limit': time_limit}, solve)
+    elif scenario_id == 'scenario3':
+        def solve():
+            result = scheduler.scenario_3_optimal_schedule(time_limit_seconds=time_limit, num_workers=num_workers,
+                                                           hint_schedule=hint_schedule)
+            return bool(result) and result.get('status') == 'SUCCESS'
+        solved = _cached_solve(scheduler, scenario_id, {'time_limit': time_limit}, solve)
+    else:
+        raise ValueError(f"Unknown scenario '{scenario_id}'")
+
+    return _outcome(scenario_id, scheduler, solved, num_workers, started)
+
+
+def _outcome(scenario_id, scheduler, solved, num_workers, started):
+    return {
+        'scenario_id': scenario_id,
+        'status': 'SOLVED' if solved else 'FAILED',
+        'task_schedule': scheduler.task_schedule,
+        'global_priority_list': scheduler.global_priority_list,
+        'team_capacity': scheduler.team_capacity,
+        'quality_team_capacity': scheduler.quality_team_capacity,
+        'customer_team_capacity': scheduler.customer_team_capacity,
+        'objective': scheduler.calculate_total_lateness_minutes() if solved else None,
+        'num_workers': num_workers,
+        'elapsed_seconds': round(time.time() - started, 2),
+    }
+
+
+def solve_what_if(problem_snapshot, prioritized_product, num_workers, time_limit_seconds=60):
+    """What-if run on a snapshot, for a solver process; returns an outcome like the scenario solves."""
+    scheduler = pickle.loads(problem_snapshot)
+    started = time.time()
+
+    def solve():
+        what_if_scheduler = scenarios.run_what_if_scenario(scheduler, prioritized_product,
+                                                           time_limit_seconds=time_limit_seconds,
+                                                           num_workers=num_workers)
+        if what_if_scheduler is None:
+            return False
+        for attr in SCENARIO_STATE:
+            setattr(scheduler, attr, getattr(what_if_scheduler, attr))
+        return True
+
+    config = {'time_limit': time_limit_seconds, 'prioritized_product': prioritized_product}
+    if not _cached_solve(scheduler, 'what_if', config, solve):
+        raise RuntimeError('The solver did not find a feasible what-if schedule')
+    return _outcome(f'what_if_{prioritized_product}', scheduler, True, num_workers, started)
+
+
+def start_scenario_solves(scheduler, scenario_ids=SCENARIOS, hint_schedules=None, cores=None):
+    """
+    Start one worker process per scenario on a snapshot of scheduler and return
+    ({scenario_id: future}, progress_queue) straight away. Each future resolves to the
+    scenario's outcome (schedule, priority list, capacities, objective); the baseline's
+    improving solutions arrive on progress_queue as (scenario_id, schedule, objective),
+    ending with (scenario_id, PROGRESS_DONE, PROGRESS_DONE).
+    Each solve asks the solver governor for its share of the cores and starts once granted,
+    so solves already running elsewhere in the process are not oversubscribed.
+    The scheduler itself is never modified.
+    """
+    hint_schedules = hint_schedules or {}
+    budget = split_core_budget(scenario_ids, cores)
+    # Spawned, not forked: the server's threads may hold locks (and the solver its threads) at fork time
+    context = multiprocessing.get_context('spawn')
+    progress_queue = context.Queue()
+
+    pool = ProcessPoolExecutor(max_workers=len(scenario_ids), initializer=_init_worker,
+                               initargs=(snapshot(scheduler), progress_queue), mp_context=context)
+    futures = {scenario_id: governor.submit(pool, scenario_id, _solve_in_worker, scenario_id,
+                                            requested=budget[scenario_id],
+                                            hint_schedule=hint_schedules.get(scenario_id))
+               for scenario_id in scenario_ids}
+
+    remaining = {'count': len(futures)}
+    remaining_lock = threading.Lock()
+
+    def shut_down_when_done(_):
+        # The processes exit once the last scenario is done
+        with remaining_lock:
+            remaining['count'] -= 1
+            last = remaining['count'] == 0
+        if last:
+            pool.shutdown(wait=False)
+
+    for future in futures.values():
+        future.add_done_callback(shut_down_when_done)
+
+    print(f"[INFO] Queued {len(scenario_ids)} scenario solves for worker processes, "
+          f"requested search threads: {', '.join(f'{s}={n}' for s, n in budget.items())}")
+    return futures, progress_queue
+
+
+def scenario_view(scheduler, outcome):
+    """View of scheduler carrying a scenario outcome's schedule and capacities, for export."""
+    return scheduler.scenario_view(**{attr: outcome[attr] for attr in SCENARIO_STATE})
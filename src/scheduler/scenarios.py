@@ -1,7 +1,6 @@
 # src/scheduler/scenarios.py
 
 from collections import defaultdict
-import copy
 import random
 import math
 from typing import TYPE_CHECKING
@@ -12,7 +11,24 @@ from datetime import datetime, timedelta
 if TYPE_CHECKING:
     from .main import ProductionScheduler
 
-def scenario_1_csv_headcount(scheduler, time_limit_seconds=60):
+def add_schedule_hints(model, task_starts, hint_schedule, date_to_minutes, horizon):
+    """
+    Hint each task's start variable from an earlier schedule of the same scenario, e.g. the
+    one solved before a data refresh. Tasks the earlier schedule does not have are left free.
+    """
+    hinted = 0
+    for task_id, start_var in task_starts.items():
+        entry = hint_schedule.get(task_id)
+        if not entry:
+            continue
+        start = entry['start_time']
+        minute_of_day = min(max((start.hour - 6) * 60 + start.minute, 0), 8 * 60 - 1)
+        model.AddHint(start_var, min(date_to_minutes(start) + minute_of_day, horizon))
+        hinted += 1
+    print(f"[INFO] Added solution hints for {hinted}/{len(task_starts)} tasks.")
+
+
+def scenario_1_csv_headcount(scheduler, time_limit_seconds=60, num_workers=8, hint_schedule=None):
     """
     Scenario 1: Find an optimal schedule using fixed, CSV-defined resources.
     This scenario uses the CP-SAT solver to minimize total project lateness
@@ -59,6 +75,7 @@ def scenario_1_csv_headcount(scheduler, time_limit_seconds=60):
     # --- Task Interval Variables ---
     tasks = scheduler.tasks
     task_intervals = {}
+    task_starts = {}
     mechanic_blocking_intervals = {}
 
     for task_id, task_info in tasks.items():
@@ -67,6 +84,7 @@ def scenario_1_csv_headcount(scheduler, time_limit_seconds=60):
         end_var = model.NewIntVar(0, horizon, f'end_{task_id}')
         interval = model.NewIntervalVar(start_var, duration, end_var, f'interval_{task_id}')
         task_intervals[task_id] = interval
+        task_starts[task_id] = start_var
 
         if task_info.get('task_type') in ['Production', 'Rework', 'Late Part'] and task_id in scheduler.quality_requirements:
             qi_task_id = scheduler.quality_requirements[task_id]
@@ -163,8 +181,11 @@ def scenario_1_csv_headcount(scheduler, time_limit_seconds=60):
     # --- Solve ---
     print(f"Starting CP-SAT solver with a time limit of {time_limit_seconds} seconds...")
     solver = cp_model.CpSolver()
-    solver.parameters.num_workers = 8
+    solver.parameters.num_workers = num_workers
     solver.parameters.max_time_in_seconds = time_limit_seconds
+    if hint_schedule:
+        add_schedule_hints(model, task_starts, hint_schedule, date_to_minutes, horizon)
+        solver.parameters.repair_hint = True
     status = solver.Solve(model)
 
     # --- Result Extraction ---
@@ -265,7 +286,7 @@ def scenario_1_csv_headcount(scheduler, time_limit_seconds=60):
         return {'status': 'FAILED', 'makespan': 0, 'metrics': {}, 'priority_list': [], 'team_capacities': {}, 'quality_capacities': {}, 'total_late_days': 0}
 
 
-def scenario_3_optimal_schedule(scheduler, time_limit_seconds=90):
+def scenario_3_optimal_schedule(scheduler, time_limit_seconds=90, num_workers=8, hint_schedule=None):
     """
     Scenario 3: Find an optimal schedule and resource allocation using CP-SAT.
     This scenario simplifies the resource model to match the validation script.
@@ -311,6 +332,7 @@ def scenario_3_optimal_schedule(scheduler, time_limit_seconds=90):
     # --- Task Interval Variables ---
     tasks = scheduler.tasks
     task_intervals = {}
+    task_starts = {}
     mechanic_blocking_intervals = {}
 
     for task_id, task_info in tasks.items():
@@ -319,6 +341,7 @@ def scenario_3_optimal_schedule(scheduler, time_limit_seconds=90):
         end_var = model.NewIntVar(0, horizon, f'end_{task_id}')
         interval = model.NewIntervalVar(start_var, duration, end_var, f'interval_{task_id}')
         task_intervals[task_id] = interval
+        task_starts[task_id] = start_var
 
         if task_info.get('task_type') in ['Production', 'Rework', 'Late Part'] and task_id in scheduler.quality_requirements:
             qi_task_id = scheduler.quality_requirements[task_id]
@@ -434,8 +457,11 @@ def scenario_3_optimal_schedule(scheduler, time_limit_seconds=90):
     # --- Solve ---
     print(f"Starting CP-SAT solver with a time limit of {time_limit_seconds} seconds...")
     solver = cp_model.CpSolver()
-    solver.parameters.num_workers = 8
+    solver.parameters.num_workers = num_workers
     solver.parameters.max_time_in_seconds = time_limit_seconds
+    if hint_schedule:
+        add_schedule_hints(model, task_starts, hint_schedule, date_to_minutes, horizon)
+        solver.parameters.repair_hint = True
     status = solver.Solve(model)
 
     # --- Result Extraction ---
@@ -523,10 +549,12 @@ def scenario_3_optimal_schedule(scheduler, time_limit_seconds=90):
         return None
 
 
-def run_what_if_scenario(scheduler, prioritized_product, time_limit_seconds=60):
+def run_what_if_scenario(scheduler, prioritized_product, time_limit_seconds=60, num_workers=8):
     """
     Scenario "What-If": Prioritize a specific product and see the impact.
     This is a modification of scenario_3_optimal_schedule, but uses fixed resources.
+    Its model packs every working day into one 8-hour block rather than the team shifts,
+    so the shift-calendar local search is not run on the result.
     """
     print("\n" + "=" * 80)
     print(f"SCENARIO WHAT-IF: Prioritizing {prioritized_product}")
@@ -686,7 +714,7 @@ def run_what_if_scenario(scheduler, prioritized_product, time_limit_seconds=60):
     # --- Solve ---
     print(f"Starting CP-SAT solver for What-If with a time limit of {time_limit_seconds} seconds...")
     solver = cp_model.CpSolver()
-    solver.parameters.num_workers = 8
+    solver.parameters.num_workers = num_workers
     solver.parameters.max_time_in_seconds = time_limit_seconds
     status = solver.Solve(model)
 
@@ -694,12 +722,11 @@ def run_what_if_scenario(scheduler, prioritized_product, time_limit_seconds=60):
     if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
         print(f"Solver finished with status: {solver.StatusName(status)}")
 
-        temp_scheduler = copy.deepcopy(scheduler)
-        temp_scheduler.task_schedule.clear()
-
-        temp_scheduler.team_capacity = scheduler._original_team_capacity.copy()
-        temp_scheduler.quality_team_capacity = scheduler._original_quality_capacity.copy()
-        temp_scheduler.customer_team_capacity = scheduler._original_customer_team_capacity.copy()
+        # A view over the loaded problem; only the schedule and capacities belong to the what-if
+        temp_scheduler = scheduler.scenario_view(
+            team_capacity=scheduler._original_team_capacity,
+            quality_team_capacity=scheduler._original_quality_capacity,
+            customer_team_capacity=scheduler._original_customer_team_capacity)
 
         for task_id, interval in task_intervals.items():
             task_info = temp_scheduler.tasks[task_id]
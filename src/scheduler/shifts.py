@@ -0,0 +1,135 @@
+# src/scheduler/shifts.py
+# Compiled shift table shared by the CP-SAT solver, the greedy scheduler and the metrics.
+
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from . import utils
+
+MINUTES_PER_DAY = 24 * 60
+DEFAULT_TEAM_SHIFTS = ['1st']
+
+
+def compile_shift(shift_name, shift_info):
+    """
+    Parse a shift definition ({'start': '23:00', 'end': '6:00'}) once into minutes-of-day.
+    A shift whose end is not after its start crosses midnight.
+    """
+    start_hour, start_min = utils.parse_shift_time(shift_info['start'])
+    end_hour, end_min = utils.parse_shift_time(shift_info['end'])
+    start_minute = start_hour * 60 + start_min
+    end_minute = end_hour * 60 + end_min
+    wraps_midnight = end_minute <= start_minute
+    duration = end_minute - start_minute + (MINUTES_PER_DAY if wraps_midnight else 0)
+
+    return {
+        'name': shift_name,
+        'start_minute': start_minute,
+        'end_minute': end_minute,
+        'duration': duration,
+        'wraps_midnight': wraps_midnight
+    }
+
+
+def _team_shift_names(scheduler, team):
+    """Shift names for any team type, falling back to the base team and then to the 1st shift."""
+    for shift_map in (scheduler.customer_team_shifts, scheduler.quality_team_shifts, scheduler.team_shifts):
+        if shift_map.get(team):
+            return shift_map[team]
+
+    base_team = team.split(' (')[0].strip() if team and '(' in team else team
+    if scheduler.team_shifts.get(base_team):
+        return scheduler.team_shifts[base_team]
+
+    return DEFAULT_TEAM_SHIFTS
+
+
+def _resolve_team(scheduler, team):
+    """Resolve a team's shift names against the compiled table, ordered by start time."""
+    windows = [scheduler.shift_table[name] for name in _team_shift_names(scheduler, team)
+               if name in scheduler.shift_table]
+    return tuple(sorted(windows, key=lambda s: s['start_minute']))
+
+
+def build_shift_table(scheduler):
+    """
+    Compile scheduler.shift_hours and resolve every known team against it.
+    Must run after shift hours and all team calendars have been loaded.
+    """
+    scheduler.shift_table = {name: compile_shift(name, info) for name, info in scheduler.shift_hours.items()}
+
+    all_teams = (set(scheduler.team_capacity) | set(scheduler.team_shifts) |
+                 set(scheduler.quality_team_capacity) | set(scheduler.quality_team_shifts) |
+                 set(scheduler.customer_team_capacity) | set(scheduler.customer_team_shifts))
+    scheduler.team_shift_windows = {team: _resolve_team(scheduler, team) for team in all_teams}
+
+    utils.debug_print(scheduler, f"[DEBUG] Compiled {len(scheduler.shift_table)} shifts for "
+                                 f"{len(scheduler.team_shift_windows)} teams")
+    return scheduler.team_shift_windows
+
+
+def get_team_shifts(scheduler, team):
+    """Return the compiled shifts for a team, resolving unknown teams once on first use."""
+    if not scheduler.shift_table and scheduler.shift_hours:
+        build_shift_table(scheduler)
+
+    windows = scheduler.team_shift_windows.get(team)
+    if windows is None:
+        windows = _resolve_team(scheduler, team)
+        scheduler.team_shift_windows[team] = windows
+    return windows
+
+
+def team_shift_minutes(scheduler, team):
+    """Working minutes per day for one person of the team."""
+    return sum(shift['duration'] for shift in get_team_shifts(scheduler, team))
+
+
+def get_day_windows(scheduler, team, day):
+    """
+    Working windows of the team's shifts that START on the given day, as
+    (start_datetime, end_datetime, shift_name). Midnight-crossing shifts end on the next day.
+    """
+    midnight = datetime(day.year, day.month, day.day)
+    return [(midnight + timedelta(minutes=shift['start_minute']),
+             midnight + timedelta(minutes=shift['start_minute'] + shift['duration']),
+             shift['name'])
+            for shift in get_team_shifts(scheduler, team)]
+
+
+def iter_working_windows(scheduler, team, start, end, is_working_day):
+    """
+    Yield the team's working windows overlapping [start, end) in chronological order.
+    is_working_day(midnight_datetime) decides whether shifts starting on that day are worked;
+    the previous day is included so the tail of a midnight-crossing shift is not missed.
+    """
+    day = (start - timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    while day < end:
+        if is_working_day(day):
+            for window_start, window_end, shift_name in get_day_windows(scheduler, team, day):
+                if window_end > start and window_start < end:
+                    yield window_start, window_end, shift_name
+        day += timedelta(days=1)
+
+
+def get_working_windows_in_minutes(scheduler, team, origin, horizon_minutes, is_working_day):
+    """
+    Expand a team's shifts across the horizon as (start_minute, end_minute, shift_name)
+    offsets from origin, clipped to [0, horizon_minutes].
+    """
+    horizon_end = origin + timedelta(minutes=horizon_minutes)
+    windows = []
+    for window_start, window_end, shift_name in iter_working_windows(scheduler, team, origin, horizon_end,
+                                                                     is_working_day):
+        start_minute = max(0, int((window_start - origin).total_seconds() // 60))
+        end_minute = min(horizon_minutes, int((window_end - origin).total_seconds() // 60))
+        if end_minute > start_minute:
+            windows.append((start_minute, end_minute, shift_name))
+    return windows
+
+
+def shift_at_minute(windows, minute):
+    """Name of the window (from get_working_windows_in_minutes) containing minute, or None."""
+    index = bisect_right(windows, (minute, float('inf'))) - 1
+    if index >= 0 and windows[index][0] <= minute < windows[index][1]:
+        return windows[index][2]
+    return None
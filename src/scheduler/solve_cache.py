@@ -0,0 +1,194 @@
+# src/scheduler/solve_cache.py
+# Content-addressed cache of solver results. A solve is keyed by a canonical hash of the
+# parsed problem (tasks, precedence edges, calendars, capacities, dates) and the solver
+# configuration: an identical solve is answered from the cache, and a solve of the same
+# task network with different data can start from the closest cached solution.
+
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import zlib
+from datetime import date, datetime
+from . import constraints
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS solves (
+    kind TEXT NOT NULL,
+    problem_key TEXT NOT NULL,
+    structure_key TEXT NOT NULL,
+    config TEXT NOT NULL,
+    status TEXT,
+    objective REAL,
+    bound REAL,
+    created_at TEXT NOT NULL,
+    last_used_at TEXT NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    payload BLOB NOT NULL,
+    model_proto BLOB,
+    PRIMARY KEY (kind, problem_key, config)
+);
+CREATE INDEX IF NOT EXISTS solves_structure ON solves (kind, structure_key, last_used_at);
+CREATE TABLE IF NOT EXISTS stats (
+    kind TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (kind, outcome)
+);
+"""
+
+HIT, MISS, NEAR_HIT = 'hit', 'miss', 'near_hit'
+
+
+def _canonical(value):
+    if isinstance(value, (set, frozenset)):
+        return sorted(str(v) for v in value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _digest(data):
+    text = json.dumps(data, sort_keys=True, default=_canonical, separators=(',', ':'))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def problem_keys(scheduler):
+    """
+    (problem_key, structure_key) of the scheduler's current problem. problem_key covers
+    everything a solve depends on; structure_key only the task set and precedence edges,
+    so problems that differ in durations, dates or headcount share it.
+    """
+    edges = sorted((c['First'], c['Second'], c.get('Relationship', ''))
+                   for c in constraints.build_dynamic_dependencies(scheduler))
+    structure = {'tasks': sorted(scheduler.tasks), 'edges': edges}
+    problem = {
+        'structure': structure,
+        'tasks': scheduler.tasks,
+        'late_parts': scheduler.late_part_constraints,
+        'calendars': {'holidays': scheduler.holidays, 'shift_hours': scheduler.shift_hours,
+                      'team_shifts': scheduler.team_shifts, 'quality_team_shifts': scheduler.quality_team_shifts,
+                      'customer_team_shifts': scheduler.customer_team_shifts},
+        'capacities': {'team': scheduler.team_capacity, 'quality': scheduler.quality_team_capacity,
+                       'customer': scheduler.customer_team_capacity,
+                       'original_team': scheduler._original_team_capacity,
+                       'original_quality': scheduler._original_quality_capacity,
+                       'original_customer': scheduler._original_customer_team_capacity},
+        'dates': {'start': scheduler.start_date, 'delivery': scheduler.delivery_dates,
+                  'on_dock': scheduler.on_dock_dates, 'late_part_delay_days': scheduler.late_part_delay_days},
+    }
+    return _digest(problem), _digest(structure)
+
+
+class SolveCache:
+    """
+    SQLite-backed solve cache shared by the server and its solver processes. Each process
+    opens its own connection; hit, miss and near-hit counts are kept per kind of solve.
+    keep_models also stores each solve's serialised CP-SAT model proto.
+    """
+
+    def __init__(self, path, max_entries=200, keep_models=False):
+        self.path = path
+        self.max_entries = max_entries
+        self.keep_models = keep_models
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def __getstate__(self):
+        # Connections do not survive pickling; the copy reconnects on first use
+        return {'path': self.path, 'max_entries': self.max_entries, 'keep_models': self.keep_models}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _connection(self):
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(SCHEMA)
+            self._pid = os.getpid()
+        return self._conn
+
+    def _count(self, conn, kind, outcome):
+        conn.execute('INSERT INTO stats (kind, outcome, count) VALUES (?, ?, 1) '
+                     'ON CONFLICT (kind, outcome) DO UPDATE SET count = count + 1', (kind, outcome))
+
+    def lookup(self, kind, keys, config=None):
+        """Cached entry for exactly this problem and config, or None (counted as a hit or a miss)."""
+        config_key = json.dumps(config or {}, sort_keys=True, default=str)
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                row = conn.execute('SELECT status, objective, bound, payload FROM solves '
+                                   'WHERE kind=? AND problem_key=? AND config=?',
+                                   (kind, keys[0], config_key)).fetchone()
+                self._count(conn, kind, HIT if row else MISS)
+                if row:
+                    conn.execute('UPDATE solves SET hits = hits + 1, last_used_at = ? '
+                                 'WHERE kind=? AND problem_key=? AND config=?',
+                                 (datetime.now().isoformat(), kind, keys[0], config_key))
+        if row is None:
+            return None
+        status, objective, bound, payload = row
+        return {'status': status, 'objective': objective, 'bound': bound,
+                'payload': pickle.loads(zlib.decompress(payload))}
+
+    def nearest(self, kind, keys):
+        """Most recently used entry of the same task network with different data, or None."""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                row = conn.execute('SELECT status, objective, bound, payload FROM solves '
+                                   'WHERE kind=? AND structure_key=? AND problem_key != ? '
+                                   'ORDER BY last_used_at DESC LIMIT 1', (kind, keys[1], keys[0])).fetchone()
+                if row:
+                    self._count(conn, kind, NEAR_HIT)
+        if row is None:
+            return None
+        status, objective, bound, payload = row
+        return {'status': status, 'objective': objective, 'bound': bound,
+                'payload': pickle.loads(zlib.decompress(payload))}
+
+    def store(self, kind, keys, config, payload, status=None, objective=None, bound=None, model_proto=None):
+        """Cache a solve's result, evicting the least recently used entries beyond max_entries."""
+        now = datetime.now().isoformat()
+        blob = zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+        proto = zlib.compress(model_proto) if (model_proto and self.keep_models) else None
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute('INSERT OR REPLACE INTO solves (kind, problem_key, structure_key, config, status, '
+                             'objective, bound, created_at, last_used_at, hits, payload, model_proto) '
+                             'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?, ?)',
+                             (kind, keys[0], keys[1], json.dumps(config or {}, sort_keys=True, default=str),
+                              status, objective, bound, now, now, blob, proto))
+                conn.execute('DELETE FROM solves WHERE rowid IN (SELECT rowid FROM solves '
+                             'ORDER BY last_used_at DESC LIMIT -1 OFFSET ?)', (self.max_entries,))
+
+    def stats(self):
+        """Hit, miss and near-hit counts and cached entries per kind of solve."""
+        with self._lock:
+            conn = self._connection()
+            counts = conn.execute('SELECT kind, outcome, count FROM stats').fetchall()
+            entries = conn.execute('SELECT kind, COUNT(*), SUM(LENGTH(payload)), SUM(LENGTH(model_proto)) '
+                                   'FROM solves GROUP BY kind').fetchall()
+        stats = {}
+        for kind, outcome, count in counts:
+            stats.setdefault(kind, {HIT: 0, MISS: 0, NEAR_HIT: 0})[outcome] = count
+        for kind, count, payload_bytes, proto_bytes in entries:
+            stats.setdefault(kind, {HIT: 0, MISS: 0, NEAR_HIT: 0}).update(
+                entries=count, payload_bytes=payload_bytes or 0, model_bytes=proto_bytes or 0)
+        for kind_stats in stats.values():
+            lookups = kind_stats[HIT] + kind_stats[MISS]
+            kind_stats['hit_rate'] = round(kind_stats[HIT] / lookups, 3) if lookups else None
+        return stats
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute('DELETE FROM solves')
+                conn.execute('DELETE FROM stats')
@@ -0,0 +1,171 @@
+# src/scheduler/solver_governor.py
+# Process-wide budget of CP-SAT search threads. Every solve started by this process takes a
+# grant from the governor before it runs: it gets the threads it asked for while the budget
+# lasts, fewer when the budget is nearly used up, and waits in line when nothing is left.
+
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+
+class SolverGrant:
+    """Search threads granted to one solve; release() (or leaving the with block) returns them."""
+
+    def __init__(self, governor, grant_id, name, threads, requested):
+        self.governor = governor
+        self.id = grant_id
+        self.name = name
+        self.threads = threads
+        self.requested = requested
+        self.granted_at = datetime.now()
+        self.released = False
+
+    def release(self):
+        self.governor.release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+class SolverGovernor:
+    """
+    Hands out search threads from a fixed core budget (default: all cores). A solve asking
+    for more threads than are free is scaled down to what is free, as long as that is at
+    least its min_threads; otherwise it waits, first come first served, for running solves
+    to release theirs. Listeners registered with on_grant and on_release hear about every
+    grant and release.
+    """
+
+    def __init__(self, cores=None):
+        self.cores = cores or os.cpu_count() or 1
+        self._condition = threading.Condition()
+        self._grants = {}
+        self._waiting = []
+        self._ids = itertools.count(1)
+        self._listeners = []
+        self._grant_listeners = []
+
+    def _free(self):
+        return self.cores - sum(grant.threads for grant in self._grants.values())
+
+    def _grant(self, name, requested, min_threads):
+        """A grant if the budget allows one now, else None; called with the condition held."""
+        free = self._free()
+        if free < min(min_threads, self.cores):
+            return None
+        grant = SolverGrant(self, next(self._ids), name, max(1, min(requested, free)), requested)
+        self._grants[grant.id] = grant
+        return grant
+
+    def acquire(self, name, requested=None, min_threads=1, timeout=None):
+        """Wait for and return a grant of up to requested threads (default: the whole budget)."""
+        requested = max(1, requested or self.cores)
+        ticket = (name, requested, time.time())
+        with self._condition:
+            self._waiting.append(ticket)
+            try:
+                deadline = None if timeout is None else time.time() + timeout
+                while True:
+                    grant = self._waiting[0] is ticket and self._grant(name, requested, min_threads)
+                    if grant:
+                        break
+                    remaining = None if deadline is None else deadline - time.time()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f'No solver threads free for {name} within {timeout}s')
+                    self._condition.wait(remaining)
+            finally:
+                self._waiting.remove(ticket)
+                self._condition.notify_all()
+        self._granted(grant)
+        return grant
+
+    def try_acquire(self, name, requested=None, min_threads=1):
+        """A grant if one is available right now without jumping the queue, else None."""
+        with self._condition:
+            if self._waiting:
+                return None
+            grant = self._grant(name, max(1, requested or self.cores), min_threads)
+        if grant is not None:
+            self._granted(grant)
+        return grant
+
+    def _granted(self, grant):
+        with self._condition:
+            listeners = list(self._grant_listeners)
+        for listener in listeners:
+            listener(grant)
+
+    def release(self, grant):
+        with self._condition:
+            if grant.released:
+                return
+            grant.released = True
+            del self._grants[grant.id]
+            self._condition.notify_all()
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener()
+
+    def on_grant(self, listener):
+        """Call listener(grant) whenever a solve is granted threads; registering twice has no effect."""
+        with self._condition:
+            if listener not in self._grant_listeners:
+                self._grant_listeners.append(listener)
+
+    def on_release(self, listener):
+        """Call listener() whenever threads are returned, e.g. to start queued work."""
+        with self._condition:
+            self._listeners.append(listener)
+
+    def submit(self, executor, name, fn, *args, requested=None, min_threads=1, **kwargs):
+        """
+        Run fn(*args, num_workers=<granted threads>, **kwargs) on executor once a grant is
+        available, without blocking the caller. Returns a Future for fn's result; the grant
+        is released when fn finishes.
+        """
+        result = Future()
+
+        def run_when_granted():
+            try:
+                grant = self.acquire(name, requested, min_threads)
+            except Exception as e:
+                result.set_exception(e)
+                return
+            try:
+                inner = executor.submit(fn, *args, num_workers=grant.threads, **kwargs)
+            except Exception as e:
+                grant.release()
+                result.set_exception(e)
+                return
+
+            def finish(done):
+                grant.release()
+                if done.exception() is not None:
+                    result.set_exception(done.exception())
+                else:
+                    result.set_result(done.result())
+            inner.add_done_callback(finish)
+
+        threading.Thread(target=run_when_granted, name=f'governor-{name}', daemon=True).start()
+        return result
+
+    def allocations(self):
+        """The budget, the running grants and the solves waiting for threads."""
+        with self._condition:
+            grants = [{'id': g.id, 'name': g.name, 'threads': g.threads, 'requested': g.requested,
+                       'grantedAt': g.granted_at.isoformat()} for g in self._grants.values()]
+            waiting = [{'name': name, 'requested': requested, 'waitingSeconds': round(time.time() - since, 1)}
+                       for name, requested, since in self._waiting]
+            free = self._free()
+        return {'cores': self.cores, 'allocated': self.cores - free, 'free': free,
+                'grants': grants, 'waiting': waiting}
+
+
+# The governor of this process; SCHEDULER_SOLVER_CORES overrides the core budget
+governor = SolverGovernor(int(os.environ.get('SCHEDULER_SOLVER_CORES', 0)) or None)
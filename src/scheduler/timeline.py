@@ -0,0 +1,315 @@
+# src/scheduler/timeline.py
+# Per-resource capacity timelines and lazily expanded team calendars used by the list scheduler.
+# All times are integer minutes from the scheduler's start date.
+
+from bisect import bisect_left, bisect_right
+from datetime import timedelta
+from . import shifts
+
+SLOT_GRANULARITY = 15  # task starts are rounded up to the next quarter hour
+CALENDAR_CHUNK_DAYS = 30
+MAX_SEARCH_DAYS = 365
+
+
+class CapacityTimeline:
+    """
+    Units in use over time for one resource, kept as a step function:
+    usage[i] applies on [times[i], times[i + 1]).
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = [float('-inf')]
+        self.usage = [0]
+
+    def _breakpoint(self, t):
+        """Index of the breakpoint at t, inserting one if needed."""
+        index = bisect_left(self.times, t)
+        if index < len(self.times) and self.times[index] == t:
+            return index
+        self.times.insert(index, t)
+        self.usage.insert(index, self.usage[index - 1])
+        return index
+
+    def reserve(self, start, end, units):
+        """Book units on [start, end)."""
+        first = self._breakpoint(start)
+        last = self._breakpoint(end)
+        usage = self.usage
+        for i in range(first, last):
+            usage[i] += units
+
+    def release(self, start, end, units):
+        """Undo a reservation made with reserve()."""
+        self.reserve(start, end, -units)
+
+    def usage_at(self, t):
+        return self.usage[bisect_right(self.times, t) - 1]
+
+    def earliest_fit(self, start, duration, units, latest_start=None):
+        """
+        Earliest t >= start with at least `units` free on [t, t + duration),
+        or None if that would be after latest_start.
+        """
+        limit = self.capacity - units
+        if limit < 0:
+            return None
+
+        times, usage = self.times, self.usage
+        t = start
+        i = bisect_right(times, t) - 1
+        while latest_start is None or t <= latest_start:
+            end = t + duration
+            j = i
+            while j < len(times) and times[j] < end:
+                if usage[j] > limit:
+                    # The final segment is always free, so j + 1 exists here
+                    t = times[j + 1]
+                    i = j + 1
+                    break
+                j += 1
+            else:
+                return t
+        return None
+
+    def latest_fit(self, start, duration, units, earliest_start):
+        """
+        Latest t <= start with at least `units` free on [t, t + duration),
+        or None if that would be before earliest_start.
+        """
+        limit = self.capacity - units
+        if limit < 0:
+            return None
+
+        times, usage = self.times, self.usage
+        t = start
+        while t >= earliest_start:
+            # Walk back over the segments overlapping [t, t + duration)
+            j = bisect_left(times, t + duration) - 1
+            while j >= 0 and (j + 1 == len(times) or times[j + 1] > t):
+                if usage[j] > limit:
+                    t = times[j] - duration
+                    break
+                if times[j] <= t:
+                    return t
+                j -= 1
+            else:
+                return t
+        return None
+
+    def peak_usage(self, start, end):
+        """Highest usage on [start, end)."""
+        i = bisect_right(self.times, start) - 1
+        peak = 0
+        while i < len(self.times) and self.times[i] < end:
+            peak = max(peak, self.usage[i])
+            i += 1
+        return peak
+
+
+class TeamCalendar:
+    """
+    Working windows of one team for one product line as (start, end, shift) minute
+    offsets, expanded from the compiled shift table in chunks as searches move forward.
+    """
+
+    def __init__(self, scheduler, team, product, origin, working_days=None):
+        self.scheduler = scheduler
+        self.team = team
+        self.product = product
+        self.origin = origin
+        self.windows = []
+        self.window_starts = []
+        self.window_ends = []
+        self.expanded_until = origin - timedelta(days=1)
+        self.limit = origin + timedelta(days=MAX_SEARCH_DAYS)
+        # Working-day lookups can be shared by calendars of products with the same holidays
+        self.working_days = working_days if working_days is not None else {}
+
+    def _is_working_day(self, day):
+        key = day.date()
+        if key not in self.working_days:
+            self.working_days[key] = self.scheduler.is_working_day(day, self.product)
+        return self.working_days[key]
+
+    def _expand(self):
+        if self.expanded_until >= self.limit:
+            return False
+        chunk_start = self.expanded_until
+        chunk_end = chunk_start + timedelta(days=CALENDAR_CHUNK_DAYS)
+        for window_start, window_end, shift_name in shifts.iter_working_windows(
+                self.scheduler, self.team, chunk_start, chunk_end, self._is_working_day):
+            start = int((window_start - self.origin).total_seconds() // 60)
+            end = int((window_end - self.origin).total_seconds() // 60)
+            # Windows straddling a chunk boundary are seen twice
+            if self.windows and start < self.windows[-1][1]:
+                continue
+            self.windows.append((start, end, shift_name))
+            self.window_starts.append(start)
+            self.window_ends.append(end)
+        self.expanded_until = chunk_end
+        return True
+
+    def window_after(self, minute):
+        """First window that ends after minute, or None beyond the search limit."""
+        while True:
+            index = bisect_right(self.window_ends, minute)
+            if index < len(self.windows):
+                return self.windows[index]
+            if not self._expand():
+                return None
+
+    def windows_before(self, minute):
+        """Windows starting before minute, latest first."""
+        while (not self.windows or self.windows[-1][1] < minute) and self._expand():
+            pass
+        for index in range(bisect_left(self.window_starts, minute) - 1, -1, -1):
+            yield self.windows[index]
+
+
+class CalendarSet:
+    """
+    TeamCalendar lookup shared by everything placed in one scheduling pass. Teams on the
+    same shifts and products with the same holidays share one calendar.
+    """
+
+    def __init__(self, scheduler, origin):
+        self.scheduler = scheduler
+        self.origin = origin
+        self.calendars = {}
+        self.working_days = {}
+        self.shift_keys = {}
+        self.holiday_keys = {}
+
+    def get(self, team, product):
+        shift_key = self.shift_keys.get(team)
+        if shift_key is None:
+            shift_key = tuple(shift['name'] for shift in shifts.get_team_shifts(self.scheduler, team))
+            self.shift_keys[team] = shift_key
+        holiday_key = self.holiday_keys.get(product)
+        if holiday_key is None:
+            holidays = self.scheduler.holidays.get(product, ()) if product else ()
+            holiday_key = frozenset(h.date() for h in holidays)
+            self.holiday_keys[product] = holiday_key
+
+        key = (shift_key, holiday_key)
+        calendar = self.calendars.get(key)
+        if calendar is None:
+            calendar = TeamCalendar(self.scheduler, team, product, self.origin,
+                                    self.working_days.setdefault(holiday_key, {}))
+            self.calendars[key] = calendar
+        return calendar
+
+
+def round_up(minute, granularity=SLOT_GRANULARITY):
+    return -(-minute // granularity) * granularity
+
+
+def round_down(minute, granularity=SLOT_GRANULARITY):
+    return minute // granularity * granularity
+
+
+def find_slot(timelines, calendar, earliest, duration, units):
+    """
+    Earliest quarter-hour start >= earliest at which the task fits inside a single
+    working window of the calendar with `units` free on every one of the timelines.
+    Returns (start_minute, shift_name) or (None, None).
+    """
+    t = earliest
+    while True:
+        window = calendar.window_after(t)
+        if window is None:
+            return None, None
+        window_start, window_end, shift_name = window
+
+        t = round_up(max(t, window_start))
+        if t + duration > window_end:
+            t = window_end
+            continue
+
+        # Push t forward until every resource agrees on it
+        fit = t
+        settled = False
+        while fit is not None and not settled:
+            settled = True
+            for team_timeline in timelines:
+                candidate = team_timeline.earliest_fit(fit, duration, units, latest_start=window_end - duration)
+                if candidate is None or candidate != fit:
+                    settled = False
+                    fit = candidate
+                    if candidate is None:
+                        break
+
+        if fit is None:
+            t = window_end
+        elif fit % SLOT_GRANULARITY:
+            t = round_up(fit)
+        else:
+            return fit, shift_name
+
+
+def find_latest_slot(timelines, calendar, latest_end, earliest, duration, units):
+    """
+    Latest quarter-hour start >= earliest whose task ends by latest_end inside a single
+    working window with `units` free on every one of the timelines.
+    Returns (start_minute, shift_name) or (None, None).
+    """
+    for window_start, window_end, shift_name in calendar.windows_before(latest_end):
+        if window_end <= earliest:
+            break
+        lower = max(window_start, earliest)
+        t = round_down(min(window_end, latest_end) - duration)
+        while t >= lower:
+            fit = t
+            settled = False
+            while fit is not None and not settled:
+                settled = True
+                for team_timeline in timelines:
+                    candidate = team_timeline.latest_fit(fit, duration, units, lower)
+                    if candidate is None or candidate != fit:
+                        settled = False
+                        fit = candidate
+                        if candidate is None:
+                            break
+            if fit is None:
+                break
+            if fit % SLOT_GRANULARITY == 0:
+                return fit, shift_name
+            t = round_down(fit)
+    return None, None
+
+
+def task_resources(scheduler, task_info):
+    """
+    Resources a task occupies, matching the CP-SAT model: quality inspections hold their
+    quality team and the primary task's mechanic team, customer inspections their customer
+    team, everything else its mechanic team/skill.
+    """
+    if task_info.get('is_quality', False):
+        resources = [task_info.get('team')]
+        primary_task_id = task_info.get('primary_task')
+        if primary_task_id and primary_task_id in scheduler.tasks:
+            resources.append(scheduler.tasks[primary_task_id].get('team_skill'))
+    elif task_info.get('is_customer', False):
+        resources = [task_info.get('team')]
+    else:
+        resources = [task_info.get('team_skill')]
+    return [resource for resource in resources if resource]
+
+
+def build_timelines(scheduler):
+    """One empty timeline per team of every type, sized to its current capacity."""
+    timelines = {}
+    for capacities in (scheduler.team_capacity, scheduler.quality_team_capacity,
+                       scheduler.customer_team_capacity):
+        for team, capacity in capacities.items():
+            timelines[team] = CapacityTimeline(capacity)
+    return timelines
+
+
+def to_minutes(origin, dt):
+    return int((dt - origin).total_seconds() // 60)
+
+
+def to_datetime(origin, minute):
+    return origin + timedelta(minutes=minute)
@@ -70,12 +70,14 @@ def export_scenario_with_capacities(scheduler, scenario_name):
         predecessors_map[const['Second']].append(const['First'])
         successors_map[const['First']].append(const['Second'])
 
-    tasks = []
+    # Rows for every task; the dashboard payload carries the top MAX_TASKS_FOR_DASHBOARD by priority
+    # and the rest are browsed through the task query endpoint
+    all_tasks = []
     MAX_TASKS_FOR_DASHBOARD = 1000
     total_tasks_available = len(scheduler.global_priority_list) if hasattr(scheduler, 'global_priority_list') else len(scheduler.task_schedule)
 
     if hasattr(scheduler, 'global_priority_list') and scheduler.global_priority_list:
-        sorted_priority_items = sorted(scheduler.global_priority_list, key=lambda x: x.get('global_priority', 999))[:MAX_TASKS_FOR_DASHBOARD]
+        sorted_priority_items = sorted(scheduler.global_priority_list, key=lambda x: x.get('global_priority', 999))
         for item in sorted_priority_items:
             task_id = item.get('task_instance_id')
             original_task_id = task_id.split('---part')[0]
@@ -92,7 +94,7 @@ def export_scenario_with_capacities(scheduler, scenario_name):
                 else:
                     slack_hours_serializable = slack_hours
 
-                tasks.append({
+                all_tasks.append({
                     'taskId': task_id,
                     'originalTaskId': original_task_id,
                     'type': item.get('task_type', 'Production'),
@@ -111,12 +113,15 @@ def export_scenario_with_capacities(scheduler, scenario_name):
                     'isQualityTask': schedule.get('is_quality', False),
                     'isCustomerTask': schedule.get('is_customer', False),
                     'isCritical': is_critical,
+                    'criticality': item.get('criticality', ''),
                     'slackHours': slack_hours_serializable,
                     'dependencies': predecessors_map.get(original_task_id, []),
                     'dynamic_predecessors': predecessors_map.get(original_task_id, []),
                     'dynamic_successors': successors_map.get(original_task_id, [])
                 })
 
+    tasks = all_tasks[:MAX_TASKS_FOR_DASHBOARD]
+
     makespan = scheduler.calculate_makespan()
     lateness_metrics = scheduler.calculate_lateness_metrics()
 
@@ -206,6 +211,7 @@ def export_scenario_with_capacities(scheduler, scenario_name):
     return {
         'scenarioId': scenario_name,
         'tasks': tasks,
+        'allTasks': all_tasks,
         'teamCapacities': team_capacities,
         'teamShifts': team_shifts,
         'products': products,
@@ -218,8 +224,13 @@ def export_scenario_with_capacities(scheduler, scenario_name):
         'totalTasks': total_tasks_available,
         'displayedTasks': len(tasks),
         'truncated': total_tasks_available > MAX_TASKS_FOR_DASHBOARD,
-        'aggStats': agg_stats,
+        'aggStats': {group: dict(counts) for group, counts in agg_stats.items()},
         'predecessors_map': dict(predecessors_map),
         'successors_map': dict(successors_map),
         'holidays': holidays_serializable
     }
+
+
+def scenario_payload(result):
+    """A scenario result as sent to clients: without allTasks, which is served page by page."""
+    return {key: value for key, value in result.items() if key != 'allTasks'}
@@ -0,0 +1,325 @@
+# src/serving.py
+# Production serving mode: a supervisor process owns data loading and every solve and
+# publishes the scenario state as versioned, read-only snapshot files; worker processes
+# serve the API from the latest snapshot and forward anything that writes to the supervisor.
+
+import glob
+import multiprocessing
+import os
+import pickle
+import socket
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime
+from flask import Response, request
+from werkzeug.serving import make_server
+
+SNAPSHOT_PATTERN = 'scenarios-{:08d}.pkl'
+CURRENT_FILE = 'CURRENT'
+# Older snapshot files kept so a worker that is still reading one never loses it
+KEEP_SNAPSHOTS = 3
+PUBLISH_INTERVAL_SECONDS = 0.5
+REFRESH_INTERVAL_SECONDS = 0.5
+PROXY_TIMEOUT_SECONDS = 60
+
+# Read endpoints whose answer lives only in the supervisor (job queues, stores, caches)
+PROXIED_PREFIXES = ('/api/scenarios/jobs', '/api/jobs', '/api/results', '/api/solve_cache', '/api/refresh',
+                    '/api/solvers', '/api/scenario_progress')
+# Streams relayed from the supervisor as they arrive (events are published where the work runs)
+STREAMED_PREFIXES = ('/api/events',)
+# Hop-by-hop and recomputed headers that must not be copied through the proxy
+SKIPPED_HEADERS = {'connection', 'keep-alive', 'transfer-encoding', 'content-length', 'host'}
+
+
+def collect_state(app):
+    """Everything a worker needs to answer reads, taken consistently under the results lock."""
+    with app.scenario_results_lock:
+        state = {
+            'scenario_results': app.scenario_results,
+            'scenario_schedules': app.scenario_schedules,
+        }
+    scheduler = app.scheduler
+    state.update({
+        'saved_scenarios': dict(app.saved_scenarios),
+        'mechanic_assignments': {k: dict(v) for k, v in app.mechanic_assignments.items()},
+        'data_hash': app.data_hash,
+        'jobs': app.jobs.status(),
+        'jobs_started_at': app.jobs.started_at,
+        'task_schedule': scheduler.task_schedule if scheduler else None,
+        'global_priority_list': scheduler.global_priority_list if scheduler else None,
+        'published_at': datetime.now().isoformat(),
+    })
+    return state
+
+
+def _state_signature(app):
+    # Scenario results are always replaced, never mutated, so their identity marks a change.
+    # Job progress messages are left out: workers proxy the job endpoints, and re-writing every
+    # result for each progress note would cost more than a slightly stale message in a snapshot.
+    return (id(app.scenario_results), id(app.scenario_schedules), len(app.saved_scenarios),
+            sum(len(tasks) for mechanics in app.mechanic_assignments.values() for tasks in mechanics.values()),
+            id(app.scheduler.task_schedule) if app.scheduler else None, app.data_hash,
+            tuple(sorted((name, job['status']) for name, job in app.jobs.status().items())))
+
+
+def write_snapshot(directory, version, state):
+    """Write a snapshot file, then point CURRENT at it; both steps are atomic renames."""
+    path = os.path.join(directory, SNAPSHOT_PATTERN.format(version))
+    temp_path = f'{path}.tmp'
+    with open(temp_path, 'wb') as f:
+        pickle.dump({'version': version, **state}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, path)
+
+    current_tmp = os.path.join(directory, f'{CURRENT_FILE}.tmp')
+    with open(current_tmp, 'w') as f:
+        f.write(os.path.basename(path))
+    os.replace(current_tmp, os.path.join(directory, CURRENT_FILE))
+
+    # By version number, not name; CURRENT's file is never removed
+    for _, old in snapshot_files(directory)[:-KEEP_SNAPSHOTS]:
+        if old != path:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+    return path
+
+
+def snapshot_files(directory):
+    """(version, path) of every snapshot file in directory, oldest version first."""
+    files = []
+    for path in glob.glob(os.path.join(directory, 'scenarios-*.pkl')):
+        try:
+            files.append((int(os.path.basename(path)[len('scenarios-'):-len('.pkl')]), path))
+        except ValueError:
+            continue
+    return sorted(files)
+
+
+def start_snapshot_publisher(app, directory):
+    """Daemon thread writing a new snapshot version whenever the supervisor's state changes."""
+    def publish_loop():
+        # Continue after the versions a previous run left in a persistent directory
+        existing = snapshot_files(directory)
+        version, last_signature = (existing[-1][0] if existing else 0), None
+        while True:
+            signature = _state_signature(app)
+            if signature != last_signature:
+                version += 1
+                write_snapshot(directory, version, collect_state(app))
+                last_signature = signature
+            time.sleep(PUBLISH_INTERVAL_SECONDS)
+
+    thread = threading.Thread(target=publish_loop, name='snapshot-publisher', daemon=True)
+    thread.start()
+    return thread
+
+
+class SnapshotReader:
+    """
+    Loads the snapshot CURRENT points at, once per version. Each worker unpickles its own
+    private copy; the files are shared, the objects are not.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.current_name = None
+
+    def poll(self):
+        """The new state if CURRENT moved to another snapshot since the last call, else None."""
+        try:
+            with open(os.path.join(self.directory, CURRENT_FILE)) as f:
+                name = f.read().strip()
+        except OSError:
+            return None
+        if not name or name == self.current_name:
+            return None
+        try:
+            with open(os.path.join(self.directory, name), 'rb') as f:
+                state = pickle.load(f)
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError) as e:
+            print(f"[WARNING] Could not read snapshot {name}: {e}")
+            return None
+        self.current_name = name
+        return state
+
+
+class JobStatusMirror:
+    """Read-only stand-in for the supervisor's JobRunner, fed from the snapshots."""
+
+    def __init__(self):
+        self._jobs = {}
+        self.started_at = datetime.now()
+
+    def update(self, jobs, started_at):
+        self._jobs = jobs
+        self.started_at = started_at
+
+    def status(self, name=None):
+        if name is not None:
+            return dict(self._jobs[name]) if name in self._jobs else None
+        return {job_name: dict(job) for job_name, job in self._jobs.items()}
+
+    def is_active(self, name):
+        job = self._jobs.get(name)
+        return job is not None and job['status'] in ('pending', 'running')
+
+    def any_active(self):
+        return any(job['status'] in ('pending', 'running') for job in self._jobs.values())
+
+    def report(self, name, message):
+        pass
+
+
+def apply_state(app, state, reload_data):
+    """
+    Swap a snapshot's state into a worker app; each request sees one version or the next.
+    reload_data() is called first when the supervisor has refreshed the input data.
+    """
+    if state['data_hash'] and app.data_hash and state['data_hash'] != app.data_hash:
+        reload_data()
+    app.data_hash = state['data_hash'] or app.data_hash
+    with app.scenario_results_lock:
+        app.scenario_results = state['scenario_results']
+        app.scenario_schedules = state['scenario_schedules']
+    app.saved_scenarios = state['saved_scenarios']
+    app.mechanic_assignments = state['mechanic_assignments']
+    app.jobs.update(state['jobs'], state['jobs_started_at'])
+    if app.scheduler is not None and state['task_schedule'] is not None:
+        app.scheduler.task_schedule = state['task_schedule']
+        app.scheduler.global_priority_list = state['global_priority_list']
+    app.snapshot_version = state['version']
+
+
+def _forward(supervisor_url):
+    """Send the current request to the supervisor and relay its answer."""
+    upstream = urllib.request.Request(
+        supervisor_url + request.full_path.rstrip('?'), data=request.get_data() or None, method=request.method,
+        headers={k: v for k, v in request.headers.items() if k.lower() not in SKIPPED_HEADERS})
+    try:
+        with urllib.request.urlopen(upstream, timeout=PROXY_TIMEOUT_SECONDS) as response:
+            status, headers, body = response.status, response.headers.items(), response.read()
+    except urllib.error.HTTPError as e:
+        status, headers, body = e.code, e.headers.items(), e.read()
+    except (urllib.error.URLError, OSError) as e:
+        return Response(f'{{"error": "Supervisor unavailable: {e}"}}', status=503, mimetype='application/json',
+                        headers={'Retry-After': '5'})
+    return Response(body, status=status,
+                    headers=[(k, v) for k, v in headers if k.lower() not in SKIPPED_HEADERS])
+
+
+def _forward_stream(supervisor_url):
+    """Relay a long-lived response (the event stream) from the supervisor chunk by chunk."""
+    upstream = urllib.request.Request(
+        supervisor_url + request.full_path.rstrip('?'), method='GET',
+        headers={k: v for k, v in request.headers.items() if k.lower() not in SKIPPED_HEADERS})
+    try:
+        response = urllib.request.urlopen(upstream, timeout=PROXY_TIMEOUT_SECONDS)
+    except urllib.error.HTTPError as e:
+        return Response(e.read(), status=e.code,
+                        headers=[(k, v) for k, v in e.headers.items() if k.lower() not in SKIPPED_HEADERS])
+    except (urllib.error.URLError, OSError) as e:
+        return Response(f'{{"error": "Supervisor unavailable: {e}"}}', status=503, mimetype='application/json',
+                        headers={'Retry-After': '5'})
+
+    def relay():
+        with response:
+            while True:
+                chunk = response.read1(8192)
+                if not chunk:
+                    return
+                yield chunk
+
+    return Response(relay(), status=response.status,
+                    headers=[(k, v) for k, v in response.headers.items() if k.lower() not in SKIPPED_HEADERS])
+
+
+def install_worker_hooks(app, snapshot_dir, supervisor_url, reload_data):
+    """
+    Make app a read-only worker: refresh from snapshots, forward writes to the supervisor.
+    reload_data() reloads the worker's scheduler after the supervisor refreshed the input.
+    """
+    reader = SnapshotReader(snapshot_dir)
+    app.jobs = JobStatusMirror()
+    app.snapshot_version = None
+    refresh_lock = threading.Lock()
+    last_refresh = {'at': 0.0}
+
+    def refresh():
+        now = time.time()
+        if now - last_refresh['at'] < REFRESH_INTERVAL_SECONDS or not refresh_lock.acquire(blocking=False):
+            return
+        try:
+            last_refresh['at'] = now
+            state = reader.poll()
+            if state is not None:
+                apply_state(app, state, reload_data)
+        finally:
+            refresh_lock.release()
+
+    refresh()
+
+    @app.before_request
+    def serve_from_snapshot():
+        if request.path.startswith(STREAMED_PREFIXES):
+            return _forward_stream(supervisor_url)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS') or request.path.startswith(PROXIED_PREFIXES):
+            return _forward(supervisor_url)
+        refresh()
+
+
+def _worker_main(sock, snapshot_dir, supervisor_url, index):
+    from src.app import create_app
+    app = create_app(mode='worker', snapshot_dir=snapshot_dir, supervisor_url=supervisor_url)
+    print(f"[INFO] Worker {index} (pid {os.getpid()}) serving from {snapshot_dir}")
+    make_server(*sock.getsockname()[:2], app, threaded=True, fd=sock.fileno()).serve_forever()
+
+
+def serve(host='0.0.0.0', port=5000, workers=None, snapshot_dir=None):
+    """
+    Run the supervisor and `workers` API processes (default: one per core) on host:port.
+    The supervisor loads the data, runs every solve, and listens only on localhost for the
+    requests the workers forward; the workers share the public listening socket.
+    """
+    workers = workers or os.cpu_count() or 1
+    snapshot_dir = snapshot_dir or tempfile.mkdtemp(prefix='scheduler-snapshots-')
+    os.makedirs(snapshot_dir, exist_ok=True)
+
+    from src.app import create_app
+    supervisor_app = create_app(mode='supervisor', snapshot_dir=snapshot_dir)
+    internal = make_server('127.0.0.1', 0, supervisor_app, threaded=True)
+    supervisor_url = f'http://127.0.0.1:{internal.server_port}'
+    threading.Thread(target=internal.serve_forever, name='supervisor-api', daemon=True).start()
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(socket.SOMAXCONN)
+
+    # Spawned (not forked) so workers never inherit the supervisor's solver threads and locks
+    context = multiprocessing.get_context('spawn')
+
+    def start_worker(index):
+        process = context.Process(target=_worker_main, args=(listener, snapshot_dir, supervisor_url, index),
+                                  name=f'api-worker-{index}', daemon=True)
+        process.start()
+        return process
+
+    processes = [start_worker(i) for i in range(workers)]
+    print(f"[INFO] Serving on {host}:{port} with {workers} worker processes; supervisor API at {supervisor_url}")
+    try:
+        while True:
+            time.sleep(2)
+            for i, process in enumerate(processes):
+                if not process.is_alive():
+                    print(f"[WARNING] Worker {i} exited with code {process.exitcode}; restarting it")
+                    processes[i] = start_worker(i)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        internal.shutdown()
@@ -0,0 +1,212 @@
+# src/solver_pool.py
+# Bounded pool for on-demand solver jobs (what-if runs): each job runs in its own process
+# so it can be cancelled mid-solve, at most max_concurrent run at once and the rest queue.
+# Jobs take their search threads from the process-wide solver governor, and are announced
+# as whatif.* events on the event bus.
+
+import multiprocessing
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from src.job_runner import PENDING, RUNNING, DONE, FAILED
+from src import event_bus
+from src.scheduler import solver_governor
+
+CANCELLED = 'cancelled'
+FINISHED = (DONE, FAILED, CANCELLED)
+
+# Finished jobs kept for polling before the oldest are dropped
+KEEP_FINISHED = 100
+
+
+def _child_main(conn, fn, args, num_workers):
+    try:
+        conn.send(('ok', fn(*args, num_workers=num_workers)))
+    except Exception as e:
+        conn.send(('error', f'{type(e).__name__}: {e}'))
+    finally:
+        conn.close()
+
+
+class SolverPool:
+    """
+    Queue of solver jobs sized to the machine: max_concurrent jobs run at a time, each
+    asking the governor for threads_per_job solver threads. A job only starts once the
+    governor grants it threads (possibly fewer when other solves hold most of the budget),
+    so pool jobs and other solves together never ask for more than the cores.
+    Submitting a job whose key matches a pending or running job returns that job instead.
+    """
+
+    def __init__(self, max_concurrent=None, cores=None, governor=None, events=None):
+        self.governor = governor or solver_governor.governor
+        self.events = events or event_bus.events
+        cores = cores or self.governor.cores
+        # CP-SAT scales well up to a handful of threads; past that, more parallel jobs pay off more
+        self.max_concurrent = max_concurrent or max(1, cores // 4)
+        self.threads_per_job = max(1, cores // self.max_concurrent)
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._pending = deque()
+        self._active_keys = {}
+        self._processes = {}
+        self._grants = {}
+        # Spawned (not forked) so jobs never inherit the server's request threads and locks
+        self._context = multiprocessing.get_context('spawn')
+        self.governor.on_release(self._threads_released)
+
+    def _threads_released(self):
+        with self._lock:
+            self._start_next()
+
+    def submit(self, key, fn, args=(), on_done=None, description=''):
+        """
+        Queue fn(*args, num_workers=<granted threads>) to run in a child process (fn must be
+        importable by name, and its arguments and return value must pickle); its return
+        value is passed to on_done(result) in this process, and whatever
+        on_done returns becomes the job's result. Returns (job_id, deduplicated).
+        args may be a callable returning the arguments, so costly ones (a scheduler snapshot)
+        are only built for a job that is not a duplicate.
+        """
+        with self._lock:
+            if key in self._active_keys:
+                return self._active_keys[key], True
+        if callable(args):
+            args = args()
+        with self._lock:
+            # An identical job may have been queued while the arguments were built
+            if key in self._active_keys:
+                return self._active_keys[key], True
+            job_id = uuid.uuid4().hex[:12]
+            self._jobs[job_id] = {'id': job_id, 'key': key, 'description': description, 'status': PENDING,
+                                  'submitted_at': datetime.now().isoformat(), 'started_at': None,
+                                  'finished_at': None, 'elapsed_seconds': None, 'error': None, 'result': None,
+                                  'fn': fn, 'args': args, 'on_done': on_done}
+            self._active_keys[key] = job_id
+            self._pending.append(job_id)
+            self._announce(job_id, queuePosition=len(self._pending))
+            self._start_next()
+        return job_id, False
+
+    def _start_next(self):
+        """Start queued jobs while there is room and the governor grants threads; called with the lock held."""
+        while self._pending and len(self._processes) < self.max_concurrent:
+            job_id = self._pending[0]
+            grant = self.governor.try_acquire(f'job {job_id}', self.threads_per_job)
+            if grant is None:
+                return
+            self._pending.popleft()
+            job = self._jobs[job_id]
+            parent_conn, child_conn = self._context.Pipe(duplex=False)
+            process = self._context.Process(target=_child_main,
+                                            args=(child_conn, job['fn'], job['args'], grant.threads),
+                                            name=f'solver-{job_id}', daemon=True)
+            process.start()
+            child_conn.close()
+            self._processes[job_id] = process
+            self._grants[job_id] = grant
+            job.update(status=RUNNING, started_at=datetime.now().isoformat(), started=time.time(),
+                       num_workers=grant.threads)
+            self._announce(job_id, numWorkers=grant.threads)
+            threading.Thread(target=self._watch, args=(job_id, process, parent_conn),
+                             name=f'solver-watch-{job_id}', daemon=True).start()
+
+    def _watch(self, job_id, process, conn):
+        try:
+            outcome = conn.recv()
+        except EOFError:
+            # The process died without answering: cancelled, or crashed
+            outcome = ('error', f'solver process exited with code {process.exitcode}')
+        finally:
+            conn.close()
+        process.join()
+
+        job = self._jobs[job_id]
+        status, result, error = FAILED, None, None
+        if job['status'] == CANCELLED:
+            status = CANCELLED
+        elif outcome[0] == 'error':
+            error = outcome[1]
+        else:
+            try:
+                result = job['on_done'](outcome[1]) if job['on_done'] else outcome[1]
+                status = DONE
+            except Exception as e:
+                error = f'{type(e).__name__}: {e}'
+        if error:
+            print(f"[WARNING] Solver job {job_id} ({job['description']}) failed: {error}")
+
+        with self._lock:
+            grant = self._grants.pop(job_id, None)
+            self._finish(job_id, status, result=result, error=error)
+        # Starts the next queued job, through _threads_released
+        if grant is not None:
+            grant.release()
+
+    def _finish(self, job_id, status, result=None, error=None):
+        """Record a job's end and release its dedup key; called with the lock held."""
+        job = self._jobs[job_id]
+        job.update(status=status, result=result, error=error, finished_at=datetime.now().isoformat(),
+                   fn=None, args=None, on_done=None)
+        if job.get('started'):
+            job['elapsed_seconds'] = round(time.time() - job['started'], 2)
+        self._announce(job_id, error=error, elapsedSeconds=job['elapsed_seconds'])
+        self._processes.pop(job_id, None)
+        if self._active_keys.get(job['key']) == job_id:
+            del self._active_keys[job['key']]
+
+        finished = [j for j in self._jobs.values() if j['status'] in FINISHED]
+        for old in finished[:max(0, len(finished) - KEEP_FINISHED)]:
+            del self._jobs[old['id']]
+
+    def _announce(self, job_id, **fields):
+        job = self._jobs[job_id]
+        self.events.publish(f"whatif.{'queued' if job['status'] == PENDING else job['status']}", id=job_id,
+                            description=job['description'], **fields)
+
+    def cancel(self, job_id):
+        """Drop a queued job or stop a running one. Returns False if it does not exist or already ended."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['status'] in FINISHED:
+                return False
+            if job['status'] == PENDING:
+                self._pending.remove(job_id)
+                self._finish(job_id, CANCELLED)
+                return True
+            job['status'] = CANCELLED
+            process = self._processes.get(job_id)
+        # The watcher thread records the end once the process is gone
+        if process is not None:
+            process.terminate()
+        return True
+
+    def cancel_where(self, predicate):
+        """Cancel every queued or running job whose key matches predicate(key); returns their ids."""
+        with self._lock:
+            job_ids = [job['id'] for job in self._jobs.values()
+                       if job['status'] not in FINISHED and predicate(job['key'])]
+        return [job_id for job_id in job_ids if self.cancel(job_id)]
+
+    def status(self, job_id=None, include_result=True):
+        with self._lock:
+            pending = list(self._pending)
+            jobs = [self._jobs[job_id]] if job_id is not None and job_id in self._jobs else (
+                [] if job_id is not None else list(self._jobs.values()))
+            views = []
+            for job in jobs:
+                view = {k: v for k, v in job.items() if k not in ('fn', 'args', 'on_done', 'started')}
+                if not include_result:
+                    view.pop('result')
+                view['queue_position'] = pending.index(job['id']) + 1 if job['id'] in pending else None
+                views.append(view)
+        if job_id is not None:
+            return views[0] if views else None
+        return views
+
+    def load(self):
+        with self._lock:
+            return {'running': len(self._processes), 'pending': len(self._pending),
+                    'max_concurrent': self.max_concurrent, 'threads_per_job': self.threads_per_job,
+                    'threads_granted': sum(grant.threads for grant in self._grants.values())}
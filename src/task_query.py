@@ -0,0 +1,160 @@
+# src/task_query.py
+# Server-side task browsing for a scenario: filters, sorting and cursor pagination over every
+# task of a published result, answered from sort orders and filter postings built once per
+# result instead of shipping the whole task list to the browser.
+
+import base64
+import bisect
+import hashlib
+import json
+from collections import defaultdict
+from datetime import datetime
+
+# Query parameter -> task row field, for sorting
+SORT_FIELDS = {'priority': 'priority', 'start': 'startTime', 'end': 'endTime', 'slack': 'slackHours',
+               'duration': 'duration', 'taskId': 'taskId', 'product': 'product', 'team': 'teamSkill'}
+# Query parameter -> task row field, for exact-match filters (repeat a parameter to allow several values)
+FILTER_FIELDS = {'team': 'team', 'teamSkill': 'teamSkill', 'skill': 'skill', 'product': 'product',
+                 'type': 'type', 'criticality': 'criticality', 'critical': 'isCritical'}
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+class CursorError(ValueError):
+    """A cursor issued for another version of the scenario or another sort order."""
+
+
+def result_tasks(result):
+    """Every task row of a scenario result (older results only carry the dashboard's top slice)."""
+    return result.get('allTasks', result.get('tasks', []))
+
+
+def _filter_value(field, value):
+    # Booleans arrive as strings in query parameters
+    if field == 'isCritical':
+        return str(value).lower() in ('1', 'true', 'yes')
+    return value
+
+
+def _plan_time(moment):
+    """A window bound in the plan's time: naive local, as the task rows are (aware times are converted)."""
+    if moment is None or moment.tzinfo is None:
+        return moment
+    return moment.astimezone().replace(tzinfo=None)
+
+
+class TaskIndex:
+    """
+    Sort orders and filter postings over one scenario result's task rows. Built once and
+    read-only afterwards, so concurrent requests can share it.
+    """
+
+    def __init__(self, result):
+        self.source = result
+        self.rows = rows = result_tasks(result)
+        count = len(rows)
+        # Every field a page's order or membership depends on, so a republish that moves any row changes it
+        fields = sorted(set(SORT_FIELDS.values()) | set(FILTER_FIELDS.values()))
+        self.version = hashlib.sha1(json.dumps([[row.get(f) for f in fields] for row in rows], default=str,
+                                               separators=(',', ':')).encode('utf-8')).hexdigest()[:16]
+
+        # Missing values sort last; the row number breaks ties so every order is total
+        self._orders = {name: sorted(range(count),
+                                     key=lambda i, f=field: (rows[i].get(f) is None, rows[i].get(f), i))
+                        for name, field in SORT_FIELDS.items()}
+
+        self._postings = {name: defaultdict(list) for name in FILTER_FIELDS}
+        for i, row in enumerate(rows):
+            for name, field in FILTER_FIELDS.items():
+                self._postings[name][row.get(field)].append(i)
+
+        # Start and end times in sorted order, for time-window lookups by bisection
+        self._starts = [datetime.fromisoformat(rows[i]['startTime']) for i in self._orders['start']]
+        self._ends = [datetime.fromisoformat(rows[i]['endTime']) for i in self._orders['end']]
+
+    def facets(self):
+        """Distinct values and task counts of every filter, for building filter controls."""
+        return {name: {str(value): len(rows) for value, rows in sorted(postings.items(), key=lambda kv: str(kv[0]))}
+                for name, postings in self._postings.items()}
+
+    def _matching(self, filters, window_start, window_end):
+        """Row numbers passing every filter and overlapping the window, or None when unfiltered."""
+        candidates = []
+        for name, values in filters.items():
+            field = FILTER_FIELDS[name]
+            rows = set()
+            for value in values:
+                rows.update(self._postings[name].get(_filter_value(field, value), ()))
+            candidates.append(rows)
+        if window_end is not None:
+            candidates.append(set(self._orders['start'][:bisect.bisect_left(self._starts, window_end)]))
+        if window_start is not None:
+            candidates.append(set(self._orders['end'][bisect.bisect_right(self._ends, window_start):]))
+        if not candidates:
+            return None
+        candidates.sort(key=len)
+        matching = candidates[0]
+        for rows in candidates[1:]:
+            matching = matching & rows
+        return matching
+
+    def _encode_cursor(self, sort, descending, position):
+        payload = json.dumps([self.version, sort, descending, position], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def _decode_cursor(self, cursor, sort, descending):
+        try:
+            decoded = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+            version, cursor_sort, cursor_descending, position = decoded
+        except (ValueError, TypeError) as e:
+            raise ValueError(f'Invalid cursor: {e}') from e
+        if version != self.version:
+            raise CursorError('The scenario has been republished since this cursor was issued; start again')
+        if (cursor_sort, cursor_descending) != (sort, descending):
+            raise CursorError('The cursor was issued for another sort order')
+        return int(position)
+
+    def query(self, filters=None, window_start=None, window_end=None, sort='priority', descending=False,
+              limit=DEFAULT_LIMIT, cursor=None):
+        """
+        One page of task rows: those matching every filter ({name: [values]}, values of one
+        filter are alternatives) and overlapping [window_start, window_end), in sort order;
+        window bounds with a timezone are converted to local time.
+        Returns {'tasks', 'total', 'nextCursor'}; nextCursor is None on the last page.
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Unknown sort '{sort}'; use one of {', '.join(SORT_FIELDS)}")
+        unknown = set(filters or {}) - set(FILTER_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown filter(s) {', '.join(sorted(unknown))}")
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            raise ValueError(f"limit must be a whole number from 1 to {MAX_LIMIT}, not '{limit}'") from None
+        limit = max(1, min(limit, MAX_LIMIT))
+
+        matching = self._matching(filters or {}, _plan_time(window_start), _plan_time(window_end))
+        order = self._orders[sort]
+        count = len(order)
+        position = self._decode_cursor(cursor, sort, descending) + 1 if cursor else 0
+
+        page, next_cursor = [], None
+        while position < count:
+            row = order[count - 1 - position] if descending else order[position]
+            if matching is None or row in matching:
+                if len(page) == limit:
+                    next_cursor = self._encode_cursor(sort, descending, position - 1)
+                    break
+                page.append(self.rows[row])
+            position += 1
+        return {'tasks': page, 'total': count if matching is None else len(matching), 'nextCursor': next_cursor}
+
+
+def index_for(indexes, scenario_id, result):
+    """The TaskIndex of a published result, building it the first time the result is queried."""
+    index = indexes.get(scenario_id)
+    if index is None or index.source is not result:
+        index = TaskIndex(result)
+        indexes[scenario_id] = index
+    return index
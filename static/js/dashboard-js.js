@@ -52,12 +52,63 @@ document.addEventListener('DOMContentLoaded', function() {
     initializeSavedAssignments();
 
     loadAllScenarios();
+    connectEventStream();
     setupEventListeners();
     setupProductFilter();
     setupRefreshButton();
 });
 
-// Load all scenarios at startup for quick switching
+// Rebuild the row form of a scenario sent with format=columnar (see src/payload_codec.py)
+function decodeColumnarScenario(data) {
+    if (!data || data.format !== 'columnar-v1') {
+        return data;
+    }
+    const {tasks: encoded, graph, format, ...scenario} = data;
+    const nodes = graph.nodes;
+    // Naive ISO times, as the row form sends them
+    const epoch = Date.parse(encoded.epoch + 'Z');
+    const toIso = minutes => new Date(epoch + minutes * 60000).toISOString().slice(0, 19);
+    const neighbours = (csr, i) => csr.targets.slice(csr.offsets[i], csr.offsets[i + 1]).map(j => nodes[j]);
+    const toMap = csr => {
+        const map = {};
+        nodes.forEach((node, i) => {
+            if (csr.offsets[i + 1] > csr.offsets[i]) {
+                map[node] = neighbours(csr, i);
+            }
+        });
+        return map;
+    };
+    const nodeIndex = new Map(nodes.map((node, i) => [node, i]));
+    const fields = Object.keys(encoded.columns);
+    const booleans = new Set(encoded.booleanFields);
+
+    scenario.tasks = [];
+    for (let row = 0; row < encoded.count; row++) {
+        const task = {};
+        for (const field of fields) {
+            const value = encoded.columns[field][row];
+            if (encoded.dictionaries[field]) {
+                task[field] = encoded.dictionaries[field][value];
+            } else if (field === 'startTime' || field === 'endTime') {
+                task[field] = toIso(value);
+            } else if (booleans.has(field)) {
+                task[field] = value === 1;
+            } else {
+                task[field] = value;
+            }
+        }
+        task.originalTaskId = task.taskId.split('---part')[0];
+        const node = nodeIndex.get(task.originalTaskId);
+        task.dynamic_predecessors = node === undefined ? [] : neighbours(graph.taskPredecessors, node);
+        task.dependencies = task.dynamic_predecessors;
+        task.dynamic_successors = node === undefined ? [] : neighbours(graph.taskSuccessors, node);
+        scenario.tasks.push(task);
+    }
+    scenario.predecessors_map = toMap(graph.predecessors);
+    scenario.successors_map = toMap(graph.successors);
+    return scenario;
+}
+
 // Load all scenarios at startup for quick switching
 async function loadAllScenarios() {
     try {
@@ -69,9 +120,9 @@ async function loadAllScenarios() {
 
         // Load each scenario
         for (const scenario of scenariosInfo.scenarios) {
-            const response = await fetch(`/api/scenario/${scenario.id}`);
+            const response = await fetch(`/api/scenario/${scenario.id}?format=columnar`);
             if (response.ok) {
-                const data = await response.json();
+                const data = decodeColumnarScenario(await response.json());
                 allScenarios[scenario.id] = data;
                 console.log(`✓ Loaded ${scenario.id}: ${data.tasks ? data.tasks.length : 0} tasks`);
             } else {
@@ -5274,11 +5325,17 @@ async function refreshData() {
             const response = await fetch('/api/refresh', { method: 'POST' });
             const result = await response.json();
 
-            if (result.success) {
-                await loadAllScenarios();
-                alert('All scenarios refreshed successfully!');
-            } else {
+            if (!result.success) {
                 alert('Failed to refresh: ' + result.error);
+            } else if (!result.changed) {
+                alert('The input data has not changed; nothing to refresh.');
+            } else {
+                const refresh = await pollRefreshJob(result.statusUrl);
+                await updateAllScenarios();
+                const resolved = refresh.lastRefresh.resolved;
+                alert(resolved.length
+                    ? `Data refreshed; re-solved ${resolved.join(', ')}.`
+                    : 'Data refreshed; no scenario was affected by the changes.');
             }
         } catch (error) {
             alert('Error refreshing data: ' + error.message);
@@ -5288,6 +5345,142 @@ async function refreshData() {
     }
 }
 
+// Bring the loaded scenarios up to date with a delta from the version each one holds;
+// reloads everything when a scenario cannot be caught up that way
+async function updateAllScenarios() {
+    for (const [id, held] of Object.entries(allScenarios)) {
+        if (!held.version || !(await updateScenario(id))) {
+            return loadAllScenarios();
+        }
+    }
+    scenarioData = allScenarios[currentScenario] || allScenarios['baseline'];
+    populateTeamDropdowns();
+    updateProductFilter();
+    updateView();
+}
+
+// Catch one loaded scenario up to the version the server has now; false if it cannot be
+async function updateScenario(id) {
+    const held = allScenarios[id];
+    const response = await fetch(`/api/scenario/${id}/delta?since=${encodeURIComponent(held.version)}`);
+    if (response.status !== 200) {
+        return false;
+    }
+    const delta = await response.json();
+    allScenarios[id] = delta.full ? delta.scenario : applyScenarioDelta(held, delta);
+    if (id === currentScenario) {
+        scenarioData = allScenarios[id];
+    }
+    console.log(`✓ Updated ${id} to ${delta.version}` + (delta.full ? ' (full)' : ''));
+    return true;
+}
+
+// Live updates pushed by the server (/api/events) instead of polling
+let eventSource = null;
+let jobEventWaiters = [];
+const scenarioUpdates = {};
+
+function connectEventStream() {
+    if (!window.EventSource) return;
+    eventSource = new EventSource('/api/events?types=job,whatif,scenario,ie');
+
+    eventSource.addEventListener('scenario.published', event => {
+        const published = JSON.parse(event.data);
+        const held = allScenarios[published.scenarioId];
+        if (held && held.version && held.version !== published.version) {
+            scheduleScenarioUpdate(published.scenarioId);
+        }
+    });
+    eventSource.addEventListener('ie.queue', () => {
+        if (currentView === 'industrial-engineering') {
+            updateIEView();
+        }
+    });
+    for (const type of ['job.progress', 'job.running', 'job.done', 'job.failed', 'job.skipped',
+                        'whatif.started', 'whatif.done', 'whatif.failed', 'whatif.cancelled']) {
+        eventSource.addEventListener(type, wakeJobWaiters);
+    }
+}
+
+// One delta fetch at a time per scenario; versions published meanwhile are caught up afterwards
+async function scheduleScenarioUpdate(id) {
+    if (scenarioUpdates[id]) {
+        scenarioUpdates[id] = 'again';
+        return;
+    }
+    scenarioUpdates[id] = 'running';
+    try {
+        do {
+            scenarioUpdates[id] = 'running';
+            if (await updateScenario(id) && id === currentScenario) {
+                updateView();
+            }
+        } while (scenarioUpdates[id] === 'again');
+    } catch (error) {
+        console.error(`✗ Failed to update ${id}:`, error);
+    } finally {
+        delete scenarioUpdates[id];
+    }
+}
+
+function wakeJobWaiters() {
+    const waiters = jobEventWaiters;
+    jobEventWaiters = [];
+    waiters.forEach(resolve => resolve());
+}
+
+// Resolves on the next job event, or after a fallback delay (short when the stream is down)
+function nextJobEvent() {
+    const streaming = eventSource && eventSource.readyState === EventSource.OPEN;
+    return new Promise(resolve => {
+        jobEventWaiters.push(resolve);
+        setTimeout(resolve, streaming ? 15000 : 2000);
+    });
+}
+
+// A scenario with a delta from /api/scenario/<id>/delta applied
+function applyScenarioDelta(held, delta) {
+    const scenario = {...held, ...delta.values, version: delta.version, computing: delta.computing};
+    delta.removedValues.forEach(key => delete scenario[key]);
+
+    const removed = new Set(delta.tasks.removed);
+    const changed = new Map(delta.tasks.changed.map(change => [change.taskId, change]));
+    scenario.tasks = held.tasks
+        .filter(task => !removed.has(task.taskId))
+        .map(task => changed.has(task.taskId) ? {...task, ...changed.get(task.taskId)} : task)
+        .concat(delta.tasks.added)
+        .sort((a, b) => a.priority - b.priority);
+
+    for (const key of ['predecessors_map', 'successors_map']) {
+        const map = {...(held[key] || {})};
+        for (const [node, targets] of Object.entries(delta.dependencies[key])) {
+            if (targets === null) {
+                delete map[node];
+            } else {
+                map[node] = targets;
+            }
+        }
+        scenario[key] = map;
+    }
+    return scenario;
+}
+
+// Wait for the refresh job, showing its progress messages
+async function pollRefreshJob(statusUrl) {
+    while (true) {
+        const response = await fetch(statusUrl);
+        const status = await response.json();
+        const job = status.job;
+        if (job.status === 'done') return status;
+        if (job.status === 'failed' || job.status === 'skipped') {
+            throw new Error(job.error || `Refresh ${job.status}`);
+        }
+        hideLoading();
+        showLoading(`Refreshing: ${job.message || job.status}...`);
+        await nextJobEvent();
+    }
+}
+
 // Clear all assignments (for current view only, doesn't clear saved)
 function clearAllAssignments() {
     if (!confirm('This will clear all current assignments in the view. Continue?')) return;
@@ -8444,7 +8637,9 @@ async function runWhatIfScenario() {
             throw new Error(data.error || `Scenario run failed with status: ${response.status}`);
         }
 
-        renderScenarioComparison(data);
+        // The run is queued as a background job; poll it until it finishes
+        const job = await pollWhatIfJob(data.statusUrl, runBtn);
+        renderScenarioComparison(job.result);
         loadSavedScenarios(); // Refresh the saved list
 
     } catch (error) {
@@ -8459,6 +8654,24 @@ async function runWhatIfScenario() {
     }
 }
 
+async function pollWhatIfJob(statusUrl, runBtn) {
+    while (true) {
+        const response = await fetch(statusUrl);
+        const job = await response.json();
+        if (!response.ok) {
+            throw new Error(job.error || `Job status failed with status: ${response.status}`);
+        }
+        if (job.status === 'done') return job;
+        if (job.status === 'failed' || job.status === 'cancelled') {
+            throw new Error(job.error || `Scenario job ${job.status}`);
+        }
+        runBtn.textContent = job.status === 'pending'
+            ? `Queued (position ${job.queue_position})...`
+            : 'Running Optimization...';
+        await nextJobEvent();
+    }
+}
+
 function renderScenarioComparison(data) {
     const resultDiv = document.getElementById('scenarioResult');
     const titleEl = document.getElementById('scenarioResultTitle');
@@ -0,0 +1,38 @@
+# tests/conftest.py
+# Shared fixtures: the bundled scheduling_data.csv loaded once per test session. Tests get
+# their own copy, so they can schedule and mutate it freely.
+
+import os
+import pickle
+
+import pytest
+
+from src.scheduler.main import ProductionScheduler
+
+DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scheduling_data.csv')
+
+
+@pytest.fixture(scope='session')
+def loaded_snapshot():
+    scheduler = ProductionScheduler(DATA_FILE, debug=False, late_part_delay_days=1.0)
+    scheduler.load_data_from_csv()
+    return pickle.dumps(scheduler, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+@pytest.fixture
+def scheduler(loaded_snapshot):
+    """A freshly loaded scheduler with no schedule yet."""
+    return pickle.loads(loaded_snapshot)
+
+
+@pytest.fixture(scope='session')
+def scheduled_snapshot(loaded_snapshot):
+    scheduler = pickle.loads(loaded_snapshot)
+    scheduler.generate_global_priority_list(method='heuristic', silent_mode=True)
+    return pickle.dumps(scheduler, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+@pytest.fixture
+def scheduled(scheduled_snapshot):
+    """A loaded scheduler holding the heuristic list schedule."""
+    return pickle.loads(scheduled_snapshot)
@@ -0,0 +1,68 @@
+# tests/test_cp_sat_solver.py
+
+import time
+
+import pytest
+
+from src.scheduler import cp_sat_solver
+
+
+def _task_bounds(schedule):
+    """{task id: (first start, last end)} over a schedule's entries, split parts merged."""
+    bounds = {}
+    for entry_id, entry in schedule.items():
+        task_id = entry_id.split('---part')[0]
+        start, end = bounds.get(task_id, (entry['start_time'], entry['end_time']))
+        bounds[task_id] = (min(start, entry['start_time']), max(end, entry['end_time']))
+    return bounds
+
+
+def test_heuristic_hint_is_feasible(scheduled):
+    cp_scheduler = cp_sat_solver.CpSatScheduler(scheduled)
+    cp_scheduler.build_model(dict(scheduled.task_schedule))
+    assert cp_scheduler.hint_solution is not None
+    assert cp_scheduler.hint_is_feasible(time_limit=30)
+
+
+def test_finish_finish_uses_the_whole_successor(scheduled):
+    cp_scheduler = cp_sat_solver.CpSatScheduler(scheduled)
+    cp_scheduler.build_model(dict(scheduled.task_schedule))
+    bounds = _task_bounds(cp_scheduler._extract_solution(cp_scheduler.hint_solution, silent=True))
+    finish_finish = [const for const in scheduled.build_dynamic_dependencies()
+                     if const['Relationship'] == 'Finish <= Finish']
+    assert finish_finish
+    for const in finish_finish:
+        assert bounds[const['First']][1] <= bounds[const['Second']][1]
+
+
+def test_task_longer_than_every_shift_window_falls_back_to_working_days(scheduler):
+    cp_scheduler = cp_sat_solver.CpSatScheduler(scheduler)
+    cp_scheduler.horizon = 3 * 24 * 60
+    cp_scheduler.working_intervals = [(0, 1440), (2880, 4320)]
+    start = cp_scheduler._new_start_var_in_windows([(0, 60), (1440, 1500)], 90, 'long_start')
+    assert list(cp_scheduler.model.Proto().variables[start.Index()].domain) == [0, 1350, 2880, 4230]
+
+
+def test_task_without_any_working_time_raises(scheduler):
+    cp_scheduler = cp_sat_solver.CpSatScheduler(scheduler)
+    cp_scheduler.horizon = 1440
+    cp_scheduler.working_intervals = [(0, 30)]
+    with pytest.raises(ValueError):
+        cp_scheduler._new_start_var_in_windows([(0, 30)], 90, 'long_start')
+
+
+def test_hint_completion_uses_the_solve_threads_and_time_limit(scheduled, monkeypatch):
+    cp_scheduler = cp_sat_solver.CpSatScheduler(scheduled)
+    calls = []
+    fixed_solve = cp_scheduler._solve_with_hint_fixed
+
+    def record(time_limit, num_workers=None):
+        calls.append((time_limit, num_workers))
+        return fixed_solve(time_limit, num_workers)
+    monkeypatch.setattr(cp_scheduler, '_solve_with_hint_fixed', record)
+
+    started = time.time()
+    schedule = cp_scheduler.solve(time_limit=6, hint_schedule=dict(scheduled.task_schedule), num_workers=1)
+    assert calls == [(3, 1)]
+    assert schedule is not None
+    assert time.time() - started < 6 + 3
@@ -0,0 +1,73 @@
+# tests/test_data_refresh.py
+
+import pickle
+
+from src.scheduler import data_refresh
+
+SCENARIOS = ('baseline', 'scenario1', 'scenario3')
+
+
+def _reloaded(loaded_snapshot):
+    """The same data loaded again, as a refresh of an unchanged file would."""
+    return pickle.loads(loaded_snapshot)
+
+
+def test_identical_data_has_no_differences(scheduler, loaded_snapshot):
+    diff = data_refresh.diff_problems(scheduler, _reloaded(loaded_snapshot))
+    assert diff == {}
+    assert data_refresh.affected_scenarios(diff, SCENARIOS) == []
+    assert data_refresh.summarize(diff) == {}
+
+
+def test_task_and_precedence_changes_are_reported_by_section(scheduler, loaded_snapshot):
+    new = _reloaded(loaded_snapshot)
+    task_id = next(iter(new.tasks))
+    new.tasks[task_id] = {**new.tasks[task_id], 'duration': new.tasks[task_id]['duration'] + 30}
+    removed = sorted(new.tasks)[-1]
+    del new.tasks[removed]
+    product = next(iter(new.delivery_dates))
+    new.delivery_dates = {**new.delivery_dates, product: None}
+
+    diff = data_refresh.diff_problems(scheduler, new)
+    assert diff['tasks']['changed'][task_id] == ['duration']
+    assert diff['tasks']['removed'] == [removed] and diff['tasks']['added'] == []
+    assert diff['dates'] == {'delivery_dates': [product]}
+    assert 'capacities' not in diff and 'calendars' not in diff
+    assert data_refresh.summarize(diff)['tasks'] == {'added': 0, 'removed': 1, 'changed': 1}
+    assert data_refresh.affected_scenarios(diff, SCENARIOS) == list(SCENARIOS)
+
+
+def test_headcount_changes_leave_scenario3_alone(scheduler, loaded_snapshot):
+    new = _reloaded(loaded_snapshot)
+    team = next(iter(new.team_capacity))
+    new.team_capacity = {**new.team_capacity, team: new.team_capacity[team] + 1}
+    diff = data_refresh.diff_problems(scheduler, new)
+    assert diff == {'capacities': {team: [scheduler.team_capacity[team], new.team_capacity[team]]}}
+    assert data_refresh.affected_scenarios(diff, SCENARIOS) == ['baseline', 'scenario1']
+
+    # A team that appears or disappears changes what scenario 3 can size
+    new.team_capacity = {**new.team_capacity, 'New Team': 2}
+    diff = data_refresh.diff_problems(scheduler, new)
+    assert data_refresh.affected_scenarios(diff, SCENARIOS) == list(SCENARIOS)
+
+
+def test_critical_paths_carry_over_only_while_the_network_is_unchanged(scheduled, loaded_snapshot):
+    assert scheduled._critical_path_cache
+    new = _reloaded(loaded_snapshot)
+    team = next(iter(new.team_capacity))
+    new.team_capacity = {**new.team_capacity, team: new.team_capacity[team] + 1}
+    assert data_refresh.carry_over_caches(scheduled, new, data_refresh.diff_problems(scheduled, new)) == \
+        ['critical_path']
+    assert new._critical_path_cache == scheduled._critical_path_cache
+
+    longer = _reloaded(loaded_snapshot)
+    task_id = next(iter(longer.tasks))
+    longer.tasks[task_id] = {**longer.tasks[task_id], 'duration': longer.tasks[task_id]['duration'] + 30}
+    assert data_refresh.carry_over_caches(scheduled, longer, data_refresh.diff_problems(scheduled, longer)) == []
+
+    rewired = _reloaded(loaded_snapshot)
+    rewired.precedence_constraints = rewired.precedence_constraints[1:]
+    rewired._dynamic_constraints_cache = None
+    diff = data_refresh.diff_problems(scheduled, rewired)
+    assert diff['precedence']['removed']
+    assert data_refresh.carry_over_caches(scheduled, rewired, diff) == []
@@ -0,0 +1,93 @@
+# tests/test_data_snapshot.py
+
+import os
+import shutil
+
+import pytest
+
+from src.scheduler import data_snapshot
+from src.scheduler.main import ProductionScheduler
+
+
+@pytest.fixture
+def csv_path(tmp_path, scheduler):
+    """A private copy of the bundled CSV."""
+    path = tmp_path / 'scheduling_data.csv'
+    shutil.copyfile(scheduler.csv_file_path, path)
+    return str(path)
+
+
+def _scheduler(csv_path):
+    return ProductionScheduler(csv_path, debug=False, late_part_delay_days=1.0)
+
+
+def _snapshotted(csv_path):
+    """A scheduler parsed from csv_path, with its snapshot written."""
+    scheduler = _scheduler(csv_path)
+    scheduler.load_data_from_csv(use_snapshot=True)
+    assert os.path.exists(data_snapshot.default_path(scheduler))
+    return scheduler
+
+
+def _touch(path, seconds=10):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + seconds * 10 ** 9))
+
+
+def test_a_snapshot_restores_the_loaded_state(csv_path):
+    parsed = _snapshotted(csv_path)
+    restored = _scheduler(csv_path)
+    assert data_snapshot.load_snapshot(restored)
+    assert restored.tasks == parsed.tasks
+    assert restored.precedence_constraints == parsed.precedence_constraints
+    assert restored.team_capacity == parsed.team_capacity
+    assert restored.csv_file_path == csv_path
+
+
+def test_only_a_touched_file_keeps_its_snapshot(csv_path):
+    _snapshotted(csv_path)
+    _touch(csv_path)
+    assert data_snapshot.load_snapshot(_scheduler(csv_path))
+
+
+def test_a_content_change_invalidates_the_snapshot(csv_path):
+    _snapshotted(csv_path)
+    size = os.path.getsize(csv_path)
+    with open(csv_path) as f:
+        text = f.read()
+    assert 'RW_410,100,' in text
+    # Same size, different content
+    with open(csv_path, 'w') as f:
+        f.write(text.replace('RW_410,100,', 'RW_410,120,'))
+    _touch(csv_path)
+    assert os.path.getsize(csv_path) == size
+    assert not data_snapshot.load_snapshot(_scheduler(csv_path))
+
+
+def test_a_size_change_invalidates_the_snapshot(csv_path):
+    _snapshotted(csv_path)
+    with open(csv_path, 'a') as f:
+        f.write('\n')
+    assert not data_snapshot.load_snapshot(_scheduler(csv_path))
+
+
+def test_other_loader_code_or_settings_invalidate_the_snapshot(csv_path, monkeypatch):
+    _snapshotted(csv_path)
+    assert not data_snapshot.load_snapshot(ProductionScheduler(csv_path, debug=False, late_part_delay_days=2.0))
+    monkeypatch.setattr(data_snapshot, '_loader_fingerprint', lambda: 'other code')
+    assert not data_snapshot.load_snapshot(_scheduler(csv_path))
+
+
+@pytest.mark.parametrize('contents', [b'not a pickle', b''])
+def test_an_unreadable_snapshot_falls_back_to_the_csv(csv_path, contents):
+    parsed = _snapshotted(csv_path)
+    path = data_snapshot.default_path(parsed)
+    with open(path, 'wb') as f:
+        f.write(contents)
+
+    scheduler = _scheduler(csv_path)
+    assert not data_snapshot.load_snapshot(scheduler)
+    scheduler.load_data_from_csv(use_snapshot=True)
+    assert scheduler.tasks == parsed.tasks
+    # The fallback parse wrote a good snapshot again
+    assert data_snapshot.load_snapshot(_scheduler(csv_path))
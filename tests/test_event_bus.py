@@ -0,0 +1,84 @@
+# tests/test_event_bus.py
+
+import json
+
+from flask import Flask
+
+from src import event_bus
+from src.blueprints import events as events_blueprint
+from src.event_bus import EventBus
+from src.json_provider import FastJSONProvider
+
+
+def _drain(subscription):
+    events = []
+    while (event := subscription.get(timeout=0)) is not None:
+        events.append(event)
+    return events
+
+
+def test_types_match_exactly_or_by_prefix():
+    bus = EventBus()
+    jobs = bus.subscribe(['job'])
+    incumbents = bus.subscribe(['solve.incumbent'])
+    everything = bus.subscribe()
+    for event_type in ('job.queued', 'jobs.other', 'job', 'solve.started', 'solve.incumbent'):
+        bus.publish(event_type, name='x')
+
+    assert [e['type'] for e in _drain(jobs)] == ['job.queued', 'job']
+    assert [e['type'] for e in _drain(incumbents)] == ['solve.incumbent']
+    assert [e['id'] for e in _drain(everything)] == [1, 2, 3, 4, 5]
+    assert bus.last('job.queued', name='x')['id'] == 1 and bus.last('job.queued', name='y') is None
+
+
+def test_a_reconnecting_subscriber_gets_what_it_missed():
+    bus = EventBus(keep=3)
+    for i in range(5):
+        bus.publish('job.progress', step=i)
+    subscription = bus.subscribe(['job'], last_event_id=2)
+    # Only the last `keep` events are still there to replay
+    assert [e['data']['step'] for e in _drain(subscription)] == [2, 3, 4]
+
+
+def test_a_subscriber_that_falls_behind_is_dropped(monkeypatch):
+    monkeypatch.setattr(event_bus, 'SUBSCRIBER_QUEUE_SIZE', 3)
+    bus = EventBus()
+    slow, other = bus.subscribe(), bus.subscribe(['solve'])
+    for i in range(4):
+        bus.publish('job.progress', step=i)
+
+    assert slow.closed and slow.get(timeout=0) is None
+    assert bus.subscriber_count() == 1 and not other.closed
+    # It catches up from the recent events when it comes back
+    again = bus.subscribe(last_event_id=1)
+    assert [e['data']['step'] for e in _drain(again)] == [1, 2, 3]
+
+
+def _stream(app, query=''):
+    with app.test_request_context(f'/events{query}'):
+        response = events_blueprint.stream_events()
+    return response, iter(response.response)
+
+
+def test_the_stream_sends_events_and_heartbeats(monkeypatch):
+    monkeypatch.setattr(events_blueprint, 'HEARTBEAT_SECONDS', 0.05)
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    subscribers = event_bus.events.subscriber_count()
+
+    response, chunks = _stream(app, '?types=job')
+    assert response.mimetype == 'text/event-stream' and response.headers['Cache-Control'] == 'no-cache'
+    assert next(chunks) == f'retry: {events_blueprint.RETRY_MS}\n\n'
+    # Nothing published yet: an idle stream gets a comment line
+    assert next(chunks) == ': keep-alive\n\n'
+
+    event_bus.events.publish('solve.started', scenario='baseline')
+    event = event_bus.events.publish('job.done', name='heuristic')
+    text = next(chunks)
+    lines = text.strip().split('\n')
+    assert lines[:2] == [f"id: {event['id']}", 'event: job.done']
+    assert json.loads(lines[2][len('data: '):]) == {'time': event['time'], 'name': 'heuristic'}
+
+    # Closing the stream unsubscribes it
+    chunks.close()
+    assert event_bus.events.subscriber_count() == subscribers
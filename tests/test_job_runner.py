@@ -0,0 +1,70 @@
+# tests/test_job_runner.py
+
+import threading
+
+import pytest
+
+from src.event_bus import EventBus
+from src.job_runner import DONE, FAILED, PENDING, RUNNING, SKIPPED, JobRunner
+
+
+def _fail():
+    raise RuntimeError('boom')
+
+
+def test_jobs_run_after_their_dependencies_and_report_events():
+    bus = EventBus()
+    subscription = bus.subscribe(types=('job',))
+    jobs, order = JobRunner(events=bus), []
+    gate = threading.Event()
+    jobs.submit('load', lambda: (gate.wait(5), order.append('load')))
+    jobs.submit('solve', order.append, 'solve', depends_on=['load'])
+    assert jobs.status('solve')['status'] == PENDING and jobs.any_active()
+
+    gate.set()
+    assert jobs.wait('solve', 5)
+    assert order == ['load', 'solve']
+    assert jobs.status('solve')['status'] == DONE and not jobs.any_active()
+
+    seen = []
+    while (event := subscription.get(timeout=0)) is not None:
+        seen.append((event['data']['name'], event['type']))
+    assert seen.index(('load', 'job.done')) < seen.index(('solve', 'job.running'))
+
+
+def test_a_failed_dependency_skips_its_dependents():
+    jobs, ran = JobRunner(events=EventBus()), []
+    jobs.submit('load', _fail)
+    jobs.submit('solve', ran.append, 'solve', depends_on=['load'])
+    jobs.submit('publish', ran.append, 'publish', depends_on=['solve'])
+    assert jobs.wait('publish', 5)
+
+    assert jobs.status('load')['status'] == FAILED and jobs.status('load')['error'] == 'boom'
+    assert jobs.status('solve')['status'] == SKIPPED
+    assert jobs.status('solve')['message'] == "dependency 'load' did not complete"
+    assert jobs.status('publish')['status'] == SKIPPED
+    assert ran == []
+
+
+def test_an_unknown_dependency_is_rejected():
+    jobs = JobRunner(events=EventBus())
+    with pytest.raises(ValueError, match='never submitted: load'):
+        jobs.submit('solve', print, depends_on=['load'])
+    assert jobs.status() == {}
+
+
+def test_if_idle_queues_nothing_while_the_job_is_active():
+    jobs, gate, runs = JobRunner(events=EventBus()), threading.Event(), []
+
+    def refresh():
+        runs.append(1)
+        gate.wait(5)
+    assert jobs.submit('refresh', refresh, if_idle=True) == 'refresh'
+    assert jobs.status('refresh')['status'] in (PENDING, RUNNING)
+    assert jobs.submit('refresh', refresh, if_idle=True) is None
+
+    gate.set()
+    assert jobs.wait('refresh', 5)
+    assert jobs.submit('refresh', refresh, if_idle=True) == 'refresh'
+    assert jobs.wait('refresh', 5)
+    assert len(runs) == 2
@@ -0,0 +1,75 @@
+# tests/test_json_provider.py
+
+import json
+import math
+from datetime import date, datetime, time
+
+import numpy as np
+import pytest
+from flask import Flask, jsonify
+
+from src import json_provider
+
+
+@pytest.fixture(params=['orjson', 'json'])
+def encoder(request, monkeypatch):
+    """Run a test on the orjson path and on the standard library fallback."""
+    if request.param == 'orjson':
+        if json_provider.orjson is None:
+            pytest.skip('orjson is not installed')
+    else:
+        monkeypatch.setattr(json_provider, 'orjson', None)
+    return request.param
+
+
+@pytest.fixture
+def app(encoder):
+    app = Flask(__name__)
+    app.json = json_provider.FastJSONProvider(app)
+    return app
+
+
+def test_non_finite_floats_become_null(encoder):
+    payload = {'nan': math.nan, 'inf': [math.inf, -math.inf, 1.5], 'np': np.float64('nan'),
+               'array': np.array([1.0, np.nan])}
+    assert json.loads(json_provider.encode(payload)) == {'nan': None, 'inf': [None, None, 1.5], 'np': None,
+                                                          'array': [1.0, None]}
+
+
+def test_datetimes_and_numpy_values(encoder):
+    payload = {'when': datetime(2025, 9, 1, 6, 30), 'day': date(2025, 9, 1), 'at': time(6, 30),
+               'count': np.int64(3), 'share': np.float32(0.5), 'flag': np.bool_(True),
+               'matrix': np.arange(4).reshape(2, 2), 'teams': {'Mech'}}
+    assert json.loads(json_provider.encode(payload)) == {
+        'when': '2025-09-01T06:30:00', 'day': '2025-09-01', 'at': '06:30:00', 'count': 3, 'share': 0.5,
+        'flag': True, 'matrix': [[0, 1], [2, 3]], 'teams': ['Mech']}
+
+    with pytest.raises(TypeError):
+        json_provider.encode({'value': object()})
+
+
+def test_keys_are_sorted_and_output_is_compact_unless_indented(encoder):
+    assert json_provider.encode({'b': 1, 'a': [1, 2]}) == b'{"a":[1,2],"b":1}'
+    assert json_provider.encode({'b': 1, 'a': 2}, sort_keys=False) == b'{"b":1,"a":2}'
+    assert json.loads(json_provider.encode({'a': [1]}, indent=True)) == {'a': [1]}
+    assert b'\n' in json_provider.encode({'a': [1]}, indent=True)
+
+
+def test_large_lists_are_streamed_as_valid_json(app, monkeypatch):
+    monkeypatch.setattr(json_provider, 'STREAM_MIN_ITEMS', 10)
+    monkeypatch.setattr(json_provider, 'STREAM_CHUNK_ITEMS', 4)
+    tasks = [{'taskId': f'T{i}', 'slack': math.nan if i == 3 else i} for i in range(11)]
+    payload = {'tasks': tasks, 'makespan': 5, 'empty': []}
+
+    chunks = list(app.json.iter_encode(payload))
+    assert len(chunks) > 5
+    expected = {'tasks': [{**task, 'slack': None if task['taskId'] == 'T3' else task['slack']} for task in tasks],
+                'makespan': 5, 'empty': []}
+    assert json.loads(b''.join(chunks)) == expected
+    assert json.loads(b''.join(app.json.iter_encode(tasks))) == expected['tasks']
+
+    with app.test_request_context():
+        streamed = jsonify(payload)
+        assert streamed.is_streamed and json.loads(streamed.get_data()) == expected
+        small = jsonify({'tasks': tasks[:5]})
+        assert not small.is_streamed and json.loads(small.get_data()) == {'tasks': expected['tasks'][:5]}
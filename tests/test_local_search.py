@@ -0,0 +1,85 @@
+# tests/test_local_search.py
+
+from bisect import insort
+from collections import defaultdict
+
+from src.scheduler import local_search, timeline, validation
+
+
+class _AlwaysOpen:
+    """Calendar with one endless working window."""
+
+    def window_after(self, minute):
+        return (0, 10 ** 9, 'Day')
+
+
+def _state(entries, capacity=1, due=None):
+    """A ScheduleState over entries {id: (start, duration, product)} all on one resource."""
+    state = local_search.ScheduleState.__new__(local_search.ScheduleState)
+    state.start, state.end, state.duration, state.units = {}, {}, {}, {}
+    state.shift, state.product, state.resources, state.calendar = {}, {}, {}, {}
+    state.release, state.fixed, state.not_before = {}, set(), 0
+    state.timelines = {'R': timeline.CapacityTimeline(capacity)}
+    state.members = defaultdict(list)
+    state.predecessors, state.successors = defaultdict(list), defaultdict(list)
+    state.product_ends = defaultdict(list)
+    for entry_id, (start, duration, product) in entries.items():
+        state.start[entry_id], state.end[entry_id] = start, start + duration
+        state.duration[entry_id], state.units[entry_id] = duration, 1
+        state.shift[entry_id], state.product[entry_id] = 'Day', product
+        state.resources[entry_id], state.calendar[entry_id] = ['R'], _AlwaysOpen()
+        state.timelines['R'].reserve(start, start + duration, 1)
+        state.members['R'].append(entry_id)
+        insort(state.product_ends[product], start + duration)
+    state.due = dict(due or {})
+    state.lateness_weight = {p: local_search.LATENESS_WEIGHT for p in state.product_ends}
+    state.finish_weight = {p: local_search.FINISH_WEIGHT for p in state.product_ends}
+    return state
+
+
+def test_swap_moves_the_late_entry_ahead_of_its_neighbour():
+    state = _state({'long': (0, 600, 'A'), 'short': (600, 60, 'B')}, due={'A': 2000, 'B': 300})
+    assert state.previous_on_resources('short') == ['long']
+    before = state.cost()
+    assert state.try_swap('long', 'short')
+    assert (state.start['short'], state.start['long']) == (0, 60)
+    assert state.cost() < before
+    assert state.timelines['R'].peak_usage(0, 1000) == 1
+
+
+def test_swap_is_undone_when_it_does_not_pay():
+    state = _state({'first': (0, 60, 'A'), 'second': (60, 60, 'B')}, due={'A': 60, 'B': 2000})
+    assert not state.try_swap('first', 'second')
+    assert (state.start['first'], state.start['second']) == (0, 60)
+    assert state.timelines['R'].peak_usage(0, 1000) == 1
+
+
+def test_swap_respects_the_first_entrys_successors():
+    state = _state({'a': (0, 60, 'A'), 'b': (60, 60, 'B'), 'c': (100, 60, 'A')}, capacity=2,
+                   due={'A': 2000, 'B': 0})
+    state._add_edge('a', 'c', 'FS')
+    state.fixed.add('c')
+    assert not state.try_swap('a', 'b')
+    assert state.start['a'] == 0
+
+
+def test_improve_schedule_keeps_the_schedule_valid(scheduled):
+    stats = local_search.improve_schedule(scheduled, time_budget=5)
+    assert stats['final_cost'] <= stats['initial_cost']
+    assert not validation.check_resource_conflicts(scheduled)
+    state = local_search.ScheduleState(scheduled)
+    for entry_id in state.start:
+        assert state.start[entry_id] >= state.earliest_start(entry_id)
+
+
+def test_a_round_without_gain_leaves_the_schedule_alone(scheduled, monkeypatch):
+    # Only cost-neutral moves: everything is pushed right against the product finishes
+    monkeypatch.setattr(local_search, '_left_justify', local_search._right_justify)
+    monkeypatch.setattr(local_search, '_bottleneck_insert', lambda state, deadline: 0)
+    monkeypatch.setattr(local_search, '_bottleneck_swap', lambda state, deadline: 0)
+    before = {e: (entry['start_time'], entry['shift']) for e, entry in scheduled.task_schedule.items()}
+
+    stats = local_search.improve_schedule(scheduled, time_budget=5)
+
+    assert stats['moved'] == 0 and stats['final_cost'] == stats['initial_cost']
+    assert {e: (entry['start_time'], entry['shift']) for e, entry in scheduled.task_schedule.items()} == before
@@ -0,0 +1,111 @@
+# tests/test_payload_codec.py
+
+import gzip
+from datetime import datetime, timedelta
+
+import pytest
+
+from src import payload_codec
+from src.scheduler import constraints
+from src.server_utils import export_scenario_with_capacities, scenario_payload
+
+
+def _decode(data):
+    """The dashboard's decodeColumnarScenario, in Python."""
+    scenario = {key: value for key, value in data.items() if key not in ('tasks', 'graph', 'format')}
+    encoded, graph = data['tasks'], data['graph']
+    nodes = graph['nodes']
+    epoch = datetime.fromisoformat(encoded['epoch'])
+
+    def neighbours(csr, i):
+        return [nodes[j] for j in csr['targets'][csr['offsets'][i]:csr['offsets'][i + 1]]]
+
+    def to_map(csr):
+        return {node: neighbours(csr, i) for i, node in enumerate(nodes) if csr['offsets'][i + 1] > csr['offsets'][i]}
+
+    node_index = {node: i for i, node in enumerate(nodes)}
+    scenario['tasks'] = []
+    for row in range(encoded['count']):
+        task = {}
+        for field, column in encoded['columns'].items():
+            value = column[row]
+            if field in encoded['dictionaries']:
+                task[field] = encoded['dictionaries'][field][value]
+            elif field in payload_codec.TIME_FIELDS:
+                task[field] = (epoch + timedelta(minutes=value)).isoformat()
+            elif field in encoded['booleanFields']:
+                task[field] = value == 1
+            else:
+                task[field] = value
+        task['originalTaskId'] = task['taskId'].split('---part')[0]
+        node = node_index.get(task['originalTaskId'])
+        task['dynamic_predecessors'] = [] if node is None else neighbours(graph['taskPredecessors'], node)
+        task['dependencies'] = task['dynamic_predecessors']
+        task['dynamic_successors'] = [] if node is None else neighbours(graph['taskSuccessors'], node)
+        scenario['tasks'].append(task)
+    scenario['predecessors_map'] = to_map(graph['predecessors'])
+    scenario['successors_map'] = to_map(graph['successors'])
+    return scenario
+
+
+def test_columnar_form_decodes_back_to_the_row_form(scheduled):
+    payload = scenario_payload(export_scenario_with_capacities(scheduled, 'baseline'))
+    predecessors, successors = constraints.get_dependency_maps(scheduled)
+    payload['predecessors_map'], payload['successors_map'] = dict(predecessors), dict(successors)
+
+    encoded = payload_codec.columnar_scenario(payload)
+    assert encoded['format'] == payload_codec.COLUMNAR_FORMAT
+    decoded = _decode(encoded)
+
+    assert {key: value for key, value in decoded.items() if key != 'tasks'} == \
+           {key: value for key, value in payload.items() if key != 'tasks'}
+    assert len(decoded['tasks']) == len(payload['tasks'])
+    for row, original in zip(decoded['tasks'], payload['tasks']):
+        expected = {**original, 'dependencies': original.get('dynamic_predecessors', [])}
+        # Times travel as whole minutes
+        for field in payload_codec.TIME_FIELDS:
+            expected[field] = datetime.fromisoformat(original[field]).replace(second=0, microsecond=0).isoformat()
+        assert row == expected
+
+
+def test_columnar_form_of_an_empty_scenario():
+    encoded = payload_codec.columnar_scenario({'tasks': [], 'makespan': 0})
+    assert encoded['tasks']['count'] == 0 and encoded['makespan'] == 0
+    assert _decode(encoded)['tasks'] == []
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip, deflate', 'gzip'),
+    ('gzip;q=0, identity', 'identity'),
+    ('*', 'br' if payload_codec.brotli else 'gzip'),
+    ('br;q=1.0, gzip;q=0.5', 'br' if payload_codec.brotli else 'gzip'),
+    ('gzip;q=bogus', 'identity'),
+    ('', 'identity'),
+    (None, 'identity'),
+])
+def test_negotiate_encoding(header, expected):
+    assert payload_codec.negotiate_encoding(header) == expected
+
+
+def test_body_cache_builds_once_per_source_version():
+    cache, builds = payload_codec.EncodedBodyCache(), []
+    source = {'v': 1}
+
+    def build():
+        builds.append(1)
+        return b'{"tasks": []}' * 50
+
+    body, etag = cache.get('a', (source,), build)
+    zipped, zipped_etag = cache.get('a', (source,), build, encoding='gzip')
+    assert len(builds) == 1 and zipped_etag == etag
+    assert gzip.decompress(zipped) == body
+
+    # A replaced source object rebuilds the body, even with equal content
+    cache.get('a', ({'v': 1},), build)
+    assert len(builds) == 2
+
+    cache.get('b', (source,), build)
+    cache.evict(lambda key: key == 'a')
+    assert len(cache) == 1
+    cache.clear()
+    assert len(cache) == 0
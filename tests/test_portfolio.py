@@ -0,0 +1,66 @@
+# tests/test_portfolio.py
+
+import pickle
+
+from src.scheduler import constraints, portfolio
+
+
+def _add_cycle(scheduler):
+    """Close a cycle by adding the reverse of one Finish <= Start edge."""
+    dependencies = constraints.build_dynamic_dependencies(scheduler)
+    edge = next(c for c in dependencies if c['Relationship'] == 'Finish <= Start'
+                and c['First'] in scheduler.tasks and c['Second'] in scheduler.tasks)
+    dependencies.append({**edge, 'First': edge['Second'], 'Second': edge['First']})
+    scheduler._dependency_index = None
+    return edge
+
+
+def test_rule_keys_follow_the_precedence_network(scheduler):
+    keys = portfolio.compute_rule_keys(scheduler)
+    assert set(keys) == set(portfolio.DEFAULT_RULES) - {'blend'}
+    for rule_keys in keys.values():
+        assert set(rule_keys) == set(scheduler.tasks)
+
+    successors, _ = constraints.get_dependency_index(scheduler)
+    for task, task_successors in successors.items():
+        for successor in task_successors:
+            if task not in scheduler.tasks or successor not in scheduler.tasks:
+                continue
+            duration = int(scheduler.tasks[successor]['duration'])
+            # A predecessor must finish before its successor can start, and goes first under every rule
+            assert keys['lft'][task] <= keys['lft'][successor] - duration
+            assert keys['most_successors'][task] < keys['most_successors'][successor]
+            assert keys['resource_weighted_cp'][task] < keys['resource_weighted_cp'][successor]
+
+
+def test_portfolio_keeps_the_best_run(scheduler):
+    summary = portfolio.run_priority_portfolio(scheduler, rules=('blend', 'lft', 'most_successors'),
+                                               seeds_per_rule=2, workers=1)
+    runs = summary['runs']
+    assert len(runs) == 6
+    best = min((run['unscheduled'], run['total_lateness_minutes'], run['flow_time_minutes']) for run in runs)
+    assert (summary['unscheduled'], summary['total_lateness_minutes']) == best[:2]
+    assert (runs[0]['rule'], runs[0]['seed']) == (summary['best_rule'], summary['best_seed'])
+    # The winner is what the scheduler holds
+    assert portfolio.score_schedule(scheduler)[:2] == best[:2]
+
+
+def test_portfolio_survives_a_dependency_cycle(scheduler):
+    edge = _add_cycle(scheduler)
+    keys = portfolio.compute_rule_keys(scheduler)
+    for rule_keys in keys.values():
+        assert edge['First'] in rule_keys and edge['Second'] in rule_keys
+
+    summary = portfolio.run_priority_portfolio(scheduler, rules=('blend', 'lft'), seeds_per_rule=1, workers=1)
+    assert summary['unscheduled'] > 0
+    assert len(scheduler.task_schedule) == len(scheduler.tasks) - summary['unscheduled']
+
+
+def test_worker_processes_find_the_same_winner(scheduler, scheduled_snapshot):
+    serial = pickle.loads(scheduled_snapshot)
+    rules = ('lft', 'most_successors')
+    expected = portfolio.run_priority_portfolio(serial, rules=rules, seeds_per_rule=1, workers=1)
+    summary = portfolio.run_priority_portfolio(scheduler, rules=rules, seeds_per_rule=1, workers=2)
+    assert (summary['best_rule'], summary['total_lateness_minutes']) == \
+        (expected['best_rule'], expected['total_lateness_minutes'])
+    assert scheduler.task_schedule == serial.task_schedule
@@ -0,0 +1,64 @@
+# tests/test_repair.py
+
+from datetime import timedelta
+
+from src.scheduler import local_search, repair
+
+
+def _task_with_successors(scheduler):
+    """A task instance whose delay reaches at least one other entry."""
+    state = local_search.ScheduleState(scheduler)
+    for task_id, parts in state.task_parts.items():
+        if any(successor not in parts for successor, _ in state.successors[parts[-1]]):
+            return task_id, state
+    raise AssertionError('no task with successors in the data')
+
+
+def test_cone_follows_successor_edges_only(scheduled):
+    task_id, state = _task_with_successors(scheduled)
+    roots = set(state.task_parts[task_id])
+    cone = repair._downstream_cone(state, roots)
+    assert cone and not cone & roots
+    for entry_id in cone:
+        assert any(p in cone or p in roots for p, _ in state.predecessors[entry_id])
+    order = repair._topological(state, cone)
+    assert sorted(order) == sorted(cone)
+    position = {e: i for i, e in enumerate(order)}
+    for entry_id in cone:
+        for successor, _ in state.successors[entry_id]:
+            if successor in cone:
+                assert position[entry_id] < position[successor]
+
+
+def test_delay_only_moves_the_reported_task_and_its_cone(scheduled):
+    task_id, state = _task_with_successors(scheduled)
+    before = {e: dict(entry) for e, entry in scheduled.task_schedule.items()}
+    roots = set(state.task_parts[task_id])
+    cone = repair._downstream_cone(state, roots)
+
+    result = repair.repair_schedule(scheduled, {task_id: {'delay_minutes': 600}, 'NOPE_1': {'delay_minutes': 5}})
+
+    assert result['unknown_tasks'] == ['NOPE_1']
+    assert result['cone_size'] == len(cone)
+    changed = {entry['task_id'] for entry in result['changed']}
+    assert roots <= changed <= roots | cone
+    for entry_id, entry in scheduled.task_schedule.items():
+        if entry_id not in changed:
+            assert (entry['start_time'], entry['end_time']) == (before[entry_id]['start_time'],
+                                                                before[entry_id]['end_time'])
+    for entry_id in roots:
+        assert scheduled.task_schedule[entry_id]['start_time'] == before[entry_id]['start_time'] + timedelta(minutes=600)
+
+    # Downstream entries respect their predecessors and are never pulled in
+    repaired = local_search.ScheduleState(scheduled)
+    for entry_id in cone:
+        assert repaired.start[entry_id] >= repaired.earliest_start(entry_id)
+        assert scheduled.task_schedule[entry_id]['start_time'] >= before[entry_id]['start_time']
+
+
+def test_actual_finish_sets_the_reported_end(scheduled):
+    task_id, state = _task_with_successors(scheduled)
+    last = state.task_parts[task_id][-1]
+    finish = scheduled.task_schedule[last]['end_time'] + timedelta(hours=3)
+    repair.repair_schedule(scheduled, {task_id: {'actual_finish': finish}})
+    assert scheduled.task_schedule[last]['end_time'] == finish
@@ -0,0 +1,73 @@
+# tests/test_result_store.py
+
+from src.result_store import ResultStore, file_hash
+
+
+def _store(tmp_path, input_hash='data-1', solver_profile='cp-sat'):
+    return ResultStore(str(tmp_path / 'results.sqlite3'), input_hash, solver_profile)
+
+
+def test_versions_are_per_key_and_bound_to_the_inputs(tmp_path):
+    store = _store(tmp_path)
+    assert store.save('scenario', 'baseline', {'makespan': 10}) == 1
+    assert store.save('scenario', 'baseline', {'makespan': 9}) == 2
+    assert store.save('scenario', 'baseline', {'makespan': 20}, params={'days': 2}) == 1
+
+    assert store.load('scenario', 'baseline') == {'makespan': 9}
+    assert store.load('scenario', 'baseline', version=1) == {'makespan': 10}
+    assert store.load('scenario', 'baseline', params={'days': 2}) == {'makespan': 20}
+    assert store.load('scenario', 'missing') is None
+
+    store.save('whatif', 'A', {'makespan': 1})
+    store.save('whatif', 'A', {'makespan': 2})
+    store.save('whatif', 'B', {'makespan': 3})
+    assert store.load_all('whatif') == {'A': {'makespan': 2}, 'B': {'makespan': 3}}
+
+    # Other data or another solver never sees these results
+    other = _store(tmp_path, input_hash='data-2')
+    assert other.load('scenario', 'baseline') is None
+    assert [entry['current'] for entry in other.list('scenario')] == [False] * 3
+    assert other.list('scenario', current_only=True) == []
+
+
+def test_prune_keeps_the_newest_versions_of_every_key(tmp_path):
+    store = _store(tmp_path)
+    for makespan in range(6):
+        store.save('scenario', 'baseline', {'makespan': makespan})
+    for makespan in range(3):
+        store.save('scenario', 'what-if', {'makespan': makespan})
+
+    assert store.prune(keep_versions=2) == 5
+    versions = sorted((entry['name'], entry['version']) for entry in store.list('scenario'))
+    assert versions == [('baseline', 5), ('baseline', 6), ('what-if', 2), ('what-if', 3)]
+    assert store.load('scenario', 'baseline') == {'makespan': 5}
+
+
+def test_prune_drops_stale_and_old_entries(tmp_path):
+    _store(tmp_path, input_hash='data-0').save('scenario', 'baseline', {'makespan': 1})
+    store = _store(tmp_path)
+    store.save('scenario', 'baseline', {'makespan': 2})
+    assert store.prune(drop_stale=True) == 1
+    assert [entry['input_hash'] for entry in store.list()] == ['data-1']
+
+    assert store.prune(older_than_days=1) == 0
+    assert store.prune(older_than_days=-1) == 1
+    assert store.list() == []
+
+
+def test_delete_removes_one_entry(tmp_path):
+    store = _store(tmp_path)
+    store.save('assignments', 'shift-1', {'T1': 'M1'})
+    entry_id = store.list('assignments')[0]['id']
+    assert store.delete(entry_id)
+    assert not store.delete(entry_id)
+    assert store.load('assignments', 'shift-1') is None
+
+
+def test_file_hash_changes_with_the_contents(tmp_path):
+    path = tmp_path / 'data.csv'
+    path.write_text('a,b\n1,2\n')
+    first = file_hash(str(path))
+    assert first == file_hash(str(path), chunk_size=3)
+    path.write_text('a,b\n1,3\n')
+    assert file_hash(str(path)) != first
@@ -0,0 +1,50 @@
+# tests/test_risk.py
+
+import numpy as np
+
+from src.scheduler import risk
+
+
+def test_levels_follow_the_longest_path_and_isolate_cycles():
+    edges = {(0, 1, 'FS'), (1, 2, 'FS'), (0, 2, 'SS'), (3, 4, 'FS'), (4, 3, 'FS')}
+    level, cyclic = risk._compute_levels(5, edges)
+    assert level[:3] == [0, 1, 2]
+    assert cyclic == {3, 4}
+    assert level[3] == level[4] == 3
+
+
+def test_network_without_variation_reproduces_the_plan(scheduled):
+    network = risk.build_risk_network(scheduled)
+    completions, critical = risk.simulate_network(network, 4, seed=1, duration_spread=(1.0, 1.0, 1.0),
+                                                  on_dock_slip_days=(0.0, 0.0, 0.0))
+    planned = [network['planned_end'][network['product_nodes'][p]].max() for p in network['products']]
+    assert np.allclose(completions, planned)
+    # Every product's last entry is critical in every sample
+    assert critical.max() == 4
+
+
+def test_overruns_never_pull_a_product_in(scheduled):
+    network = risk.build_risk_network(scheduled)
+    completions, _ = risk.simulate_network(network, 200, seed=7, duration_spread=(1.0, 1.0, 1.5))
+    planned = np.array([network['planned_end'][network['product_nodes'][p]].max() for p in network['products']])
+    assert (completions >= planned - 1e-6).all()
+    again, _ = risk.simulate_network(network, 200, seed=7, duration_spread=(1.0, 1.0, 1.5))
+    assert np.array_equal(completions, again)
+
+
+def test_simulate_schedule_risk_reports_ordered_percentiles(scheduled):
+    result = risk.simulate_schedule_risk(scheduled, n_samples=500, seed=3, workers=1)
+    assert result['samples'] == 500
+    assert set(result['products']) == {e['product'] for e in scheduled.task_schedule.values()}
+    for product in result['products'].values():
+        assert product['p50'] <= product['p80'] <= product['p95']
+        if 'on_time_probability' in product:
+            assert 0.0 <= product['on_time_probability'] <= 1.0
+    assert all(0.0 <= c <= 1.0 for c in result['criticality'].values())
+
+
+def test_samples_split_over_spawned_workers_are_reproducible(scheduled):
+    first = risk.simulate_schedule_risk(scheduled, n_samples=500, seed=3, workers=2)
+    second = risk.simulate_schedule_risk(scheduled, n_samples=500, seed=3, workers=2)
+    assert first['samples'] == 500 and first['workers'] == 2
+    assert first['products'] == second['products'] and first['criticality'] == second['criticality']
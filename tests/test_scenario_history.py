@@ -0,0 +1,91 @@
+# tests/test_scenario_history.py
+
+import copy
+
+from src import scenario_history
+from src.scheduler import repair
+from src.server_utils import export_scenario_with_capacities
+
+
+def _apply_delta(held, delta):
+    """The dashboard's applyScenarioDelta, in Python."""
+    scenario = {**held, **delta['values']}
+    for key in delta['removedValues']:
+        del scenario[key]
+
+    removed = set(delta['tasks']['removed'])
+    changed = {change['taskId']: change for change in delta['tasks']['changed']}
+    tasks = [{**task, **changed.get(task['taskId'], {})} for task in held['tasks'] if task['taskId'] not in removed]
+    scenario['tasks'] = sorted(tasks + delta['tasks']['added'], key=lambda task: task['priority'])
+
+    for key in scenario_history.MAP_KEYS:
+        dependencies = dict(held.get(key, {}))
+        for node, targets in delta['dependencies'][key].items():
+            if targets is None:
+                del dependencies[node]
+            else:
+                dependencies[node] = targets
+        scenario[key] = dependencies
+    return scenario
+
+
+def _assert_same_payload(applied, expected):
+    assert {key: value for key, value in applied.items() if key != 'tasks'} == \
+           {key: value for key, value in expected.items() if key != 'tasks'}
+    assert {task['taskId']: task for task in applied['tasks']} == {task['taskId']: task for task in expected['tasks']}
+    assert [task['priority'] for task in applied['tasks']] == sorted(task['priority'] for task in expected['tasks'])
+
+
+def test_delta_applied_to_the_old_version_reproduces_the_new_one(scheduled):
+    history = scenario_history.ScenarioHistory()
+    old = history.current('baseline', export_scenario_with_capacities(scheduled, 'baseline'), scheduled)
+
+    task_id = next(iter(scheduled.tasks))
+    repair.repair_schedule(scheduled, {task_id: {'delay_minutes': 3 * 24 * 60}})
+    new = history.current('baseline', export_scenario_with_capacities(scheduled, 'baseline'), scheduled)
+    assert new['version'] != old['version']
+
+    delta = scenario_history.diff_payloads(old['payload'], new['payload'])
+    assert delta['tasks']['changed'] or delta['tasks']['added']
+    _assert_same_payload(_apply_delta(old['payload'], delta), new['payload'])
+
+
+def test_delta_carries_removed_rows_values_and_dependencies():
+    old = {'tasks': [{'taskId': 'A', 'priority': 1, 'startTime': 's1'}, {'taskId': 'B', 'priority': 2},
+                     {'taskId': 'C', 'priority': 3}],
+           'makespan': 10, 'obsolete': True,
+           'predecessors_map': {'B': ['A'], 'C': ['B']}, 'successors_map': {'A': ['B'], 'B': ['C']}}
+    new = copy.deepcopy(old)
+    new['tasks'] = [{'taskId': 'C', 'priority': 0}, {'taskId': 'A', 'priority': 1, 'startTime': 's2'},
+                    {'taskId': 'D', 'priority': 4}]
+    new['makespan'] = 12
+    del new['obsolete']
+    new['predecessors_map'] = {'C': ['A'], 'D': ['C']}
+    new['successors_map'] = {'A': ['C'], 'C': ['D']}
+
+    delta = scenario_history.diff_payloads(old, new)
+    assert delta['tasks']['removed'] == ['B']
+    assert delta['tasks']['added'] == [{'taskId': 'D', 'priority': 4}]
+    assert {'taskId': 'A', 'startTime': 's2'} in delta['tasks']['changed']
+    assert delta['values'] == {'makespan': 12} and delta['removedValues'] == ['obsolete']
+    assert delta['dependencies']['predecessors_map'] == {'C': ['A'], 'D': ['C'], 'B': None}
+    _assert_same_payload(_apply_delta(old, delta), new)
+    # Nothing changed, nothing sent
+    empty = scenario_history.diff_payloads(new, copy.deepcopy(new))
+    assert not any(empty['tasks'].values()) and not empty['values'] and not empty['removedValues']
+
+
+def test_history_keeps_recent_versions_and_reuses_unchanged_ones():
+    history = scenario_history.ScenarioHistory(keep=2)
+    results = [{'tasks': [{'taskId': 'A', 'priority': i}]} for i in range(3)]
+    entries = [history.current('s', result, None) for result in results]
+    assert history.versions('s') == [entries[1]['version'], entries[2]['version']]
+    assert history.find('s', entries[0]['version']) is None
+    assert history.find('s', entries[1]['version'])['payload'] == entries[1]['payload']
+
+    # The same content republished keeps its version; the same objects reuse the entry
+    again = history.current('s', copy.deepcopy(results[2]), None)
+    assert again['version'] == entries[2]['version'] and history.versions('s')[-1] == again['version']
+    assert history.current('s', again['result'], None) is again
+    # The version is a content hash, identical in every process
+    assert scenario_history.scenario_version(again['payload']) == again['version']
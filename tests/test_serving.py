@@ -0,0 +1,94 @@
+# tests/test_serving.py
+
+import os
+import pickle
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from src import serving
+
+
+def _state(data_hash='data-1', marker=0):
+    return {'scenario_results': {'baseline': {'marker': marker}}, 'scenario_schedules': {},
+            'saved_scenarios': {}, 'mechanic_assignments': {}, 'data_hash': data_hash,
+            'jobs': {'heuristic': {'status': 'done'}}, 'jobs_started_at': datetime(2025, 9, 1),
+            'task_schedule': None, 'global_priority_list': None}
+
+
+def _current(directory):
+    with open(os.path.join(directory, serving.CURRENT_FILE)) as f:
+        return f.read()
+
+
+def test_write_snapshot_points_current_at_it_and_keeps_the_newest(tmp_path):
+    directory = str(tmp_path)
+    for version in range(1, 6):
+        path = serving.write_snapshot(directory, version, _state(marker=version))
+        assert _current(directory) == os.path.basename(path)
+
+    assert [version for version, _ in serving.snapshot_files(directory)] == \
+        list(range(6 - serving.KEEP_SNAPSHOTS, 6))
+    assert not [name for name in os.listdir(directory) if name.endswith('.tmp')]
+    with open(path, 'rb') as f:
+        assert pickle.load(f)['scenario_results'] == {'baseline': {'marker': 5}}
+
+
+def test_a_failed_write_leaves_the_current_snapshot_in_place(tmp_path, monkeypatch):
+    directory = str(tmp_path)
+    serving.write_snapshot(directory, 1, _state(marker=1))
+
+    def fail(*args, **kwargs):
+        raise OSError('disk full')
+    monkeypatch.setattr(serving.pickle, 'dump', fail)
+    with pytest.raises(OSError):
+        serving.write_snapshot(directory, 2, _state(marker=2))
+
+    assert _current(directory) == serving.SNAPSHOT_PATTERN.format(1)
+    assert [version for version, _ in serving.snapshot_files(directory)] == [1]
+    assert serving.SnapshotReader(directory).poll()['scenario_results'] == {'baseline': {'marker': 1}}
+
+
+def test_reader_loads_each_version_once(tmp_path):
+    directory = str(tmp_path)
+    reader = serving.SnapshotReader(directory)
+    assert reader.poll() is None
+
+    serving.write_snapshot(directory, 1, _state(marker=1))
+    assert reader.poll()['version'] == 1
+    assert reader.poll() is None
+
+    serving.write_snapshot(directory, 2, _state(marker=2))
+    state = reader.poll()
+    assert state['version'] == 2 and state['scenario_results'] == {'baseline': {'marker': 2}}
+    assert reader.poll() is None
+
+    # An unreadable snapshot is skipped and tried again on the next poll
+    with open(os.path.join(directory, serving.SNAPSHOT_PATTERN.format(3)), 'wb') as f:
+        f.write(b'not a pickle')
+    with open(os.path.join(directory, serving.CURRENT_FILE), 'w') as f:
+        f.write(serving.SNAPSHOT_PATTERN.format(3))
+    assert reader.poll() is None and reader.current_name == serving.SNAPSHOT_PATTERN.format(2)
+
+
+def _worker_app(data_hash):
+    return SimpleNamespace(data_hash=data_hash, scenario_results_lock=threading.Lock(), scenario_results={},
+                           scenario_schedules={}, saved_scenarios={}, mechanic_assignments={},
+                           jobs=serving.JobStatusMirror(), scheduler=None, snapshot_version=None)
+
+
+def test_apply_state_reloads_the_data_only_when_its_hash_changes():
+    app, reloads = _worker_app('data-1'), []
+    serving.apply_state(app, {**_state('data-1', marker=1), 'version': 1}, lambda: reloads.append(1))
+    assert reloads == [] and app.snapshot_version == 1
+    assert app.scenario_results == {'baseline': {'marker': 1}}
+    assert app.jobs.status('heuristic') == {'status': 'done'} and not app.jobs.any_active()
+
+    serving.apply_state(app, {**_state('data-2', marker=2), 'version': 2}, lambda: reloads.append(1))
+    assert reloads == [1] and app.data_hash == 'data-2' and app.snapshot_version == 2
+
+    # A snapshot taken before the data was hashed keeps the worker's hash
+    serving.apply_state(app, {**_state(None, marker=3), 'version': 3}, lambda: reloads.append(1))
+    assert reloads == [1] and app.data_hash == 'data-2'
@@ -0,0 +1,75 @@
+# tests/test_simulation.py
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from src.scheduler import simulation
+
+ORIGIN = datetime(2025, 9, 1, 6, 0)
+EXACT = {'duration_spread': (1.0, 1.0, 1.0), 'on_dock_slip_days': (0.0, 0.0, 0.0)}
+
+
+def _state(entries, edges=(), capacity=1):
+    """A ScheduleState stand-in: entries are (id, planned start, duration) on one team, no calendar."""
+    state = SimpleNamespace(origin=ORIGIN, start={}, duration={}, units={}, resources={}, calendar={},
+                            product={}, release={}, predecessors=defaultdict(list), successors=defaultdict(list),
+                            timelines={'Mech': SimpleNamespace(capacity=capacity)}, due={'P1': None},
+                            product_ends={'P1': []})
+    for entry_id, start, duration in entries:
+        state.start[entry_id], state.duration[entry_id] = start, duration
+        state.units[entry_id], state.resources[entry_id], state.product[entry_id] = 1, ['Mech'], 'P1'
+        state.product_ends['P1'].append(start + duration)
+    state.product_ends['P1'].sort()
+    for predecessor, successor, kind in edges:
+        state.successors[predecessor].append((successor, kind))
+        state.predecessors[successor].append((predecessor, kind))
+    return state
+
+
+def _simulate(state, **options):
+    scheduler = SimpleNamespace(task_schedule={'planned': True}, late_part_delay_days=0)
+    result = simulation.simulate_execution(scheduler, state=state, **{**EXACT, **options})
+    minutes = {entry_id: ((times['start_time'] - ORIGIN) // timedelta(minutes=1),
+                          None if times['end_time'] is None else (times['end_time'] - ORIGIN) // timedelta(minutes=1))
+               for entry_id, times in result['entries'].items()}
+    return result, minutes
+
+
+def test_a_replay_without_variation_follows_the_plan(scheduled):
+    result = simulation.simulate_execution(scheduled, **EXACT)
+    assert result['late_starts'] == 0
+    assert result['completed_tasks'] == result['total_tasks'] == len(scheduled.task_schedule)
+    for entry_id, times in result['entries'].items():
+        assert times['start_time'] == scheduled.task_schedule[entry_id]['start_time']
+
+
+def test_start_start_and_finish_finish_successors_are_gated():
+    state = _state([('A', 0, 60), ('SS', 0, 30), ('FS', 60, 30), ('FF', 0, 10)],
+                   edges=[('A', 'SS', 'SS'), ('A', 'FS', 'FS'), ('A', 'FF', 'FF')], capacity=3)
+    _, minutes = _simulate(state, actual_durations={'A': 120})
+    assert minutes['A'] == (0, 120)
+    # Starts with A, not after it
+    assert minutes['SS'] == (0, 30)
+    # Its own work is done at 10, but it cannot finish before A does
+    assert minutes['FF'] == (0, 120)
+    # Waits for the overrunning A to finish, then for a free mechanic
+    assert minutes['FS'] == (120, 150)
+
+
+def test_a_capacity_dip_delays_the_work_it_covers():
+    state = _state([('A', 0, 60), ('B', 60, 60)])
+    result, minutes = _simulate(state, capacity_changes=[
+        {'team': 'Mech', 'start': ORIGIN, 'end': ORIGIN + timedelta(hours=2), 'delta': -1},
+        {'team': 'Unknown', 'start': ORIGIN, 'end': None, 'delta': -5}])
+    assert minutes == {'A': (120, 180), 'B': (180, 240)}
+    assert result['late_starts'] == 2 and result['max_start_delay_hours'] == 2.0
+
+
+def test_the_simulation_stops_at_until():
+    state = _state([('A', 0, 60), ('B', 60, 60), ('C', 120, 60)], edges=[('A', 'B', 'FS'), ('B', 'C', 'FS')])
+    result, minutes = _simulate(state, until=ORIGIN + timedelta(minutes=90))
+    assert minutes == {'A': (0, 60), 'B': (60, None)}
+    assert result['simulated_until'] == ORIGIN + timedelta(minutes=90)
+    assert (result['started_tasks'], result['completed_tasks'], result['total_tasks']) == (2, 1, 3)
+    assert result['products']['P1']['simulated_completion'] is None
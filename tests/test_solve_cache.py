@@ -0,0 +1,83 @@
+# tests/test_solve_cache.py
+
+import pickle
+
+from src.scheduler import solve_cache
+from src.scheduler.solve_cache import HIT, MISS, NEAR_HIT, SolveCache
+
+
+def _cache(tmp_path, **kwargs):
+    return SolveCache(str(tmp_path / 'solves.sqlite3'), **kwargs)
+
+
+def test_problem_keys_are_stable_and_separate_data_from_structure(scheduler, loaded_snapshot):
+    keys = solve_cache.problem_keys(scheduler)
+    assert solve_cache.problem_keys(pickle.loads(loaded_snapshot)) == keys
+    assert solve_cache.problem_keys(scheduler) == keys
+
+    more_staff = pickle.loads(loaded_snapshot)
+    team = next(iter(more_staff.team_capacity))
+    more_staff.team_capacity[team] += 1
+    staffed_keys = solve_cache.problem_keys(more_staff)
+    assert staffed_keys[0] != keys[0] and staffed_keys[1] == keys[1]
+
+    rewired = pickle.loads(loaded_snapshot)
+    rewired.precedence_constraints = rewired.precedence_constraints[1:]
+    rewired._dynamic_constraints_cache = None
+    rewired_keys = solve_cache.problem_keys(rewired)
+    assert rewired_keys[0] != keys[0] and rewired_keys[1] != keys[1]
+
+
+def test_lookup_counts_hits_and_misses_per_kind(tmp_path):
+    cache = _cache(tmp_path)
+    keys = ('problem-1', 'structure-1')
+    assert cache.lookup('scenario', keys, {'time_limit': 60}) is None
+    cache.store('scenario', keys, {'time_limit': 60}, {'task_schedule': {'T1': 1}}, status='OPTIMAL', objective=5)
+
+    entry = cache.lookup('scenario', keys, {'time_limit': 60})
+    assert entry == {'status': 'OPTIMAL', 'objective': 5, 'bound': None, 'payload': {'task_schedule': {'T1': 1}}}
+    # Another config is another solve
+    assert cache.lookup('scenario', keys, {'time_limit': 30}) is None
+    assert cache.lookup('what_if', keys, {'time_limit': 60}) is None
+
+    stats = cache.stats()
+    assert stats['scenario'][HIT] == 1 and stats['scenario'][MISS] == 2
+    assert stats['scenario']['hit_rate'] == 0.333 and stats['scenario']['entries'] == 1
+    assert stats['what_if'] == {HIT: 0, MISS: 1, NEAR_HIT: 0, 'hit_rate': 0.0}
+
+
+def test_nearest_finds_the_same_network_with_other_data(tmp_path):
+    cache = _cache(tmp_path)
+    cache.store('scenario', ('problem-1', 'structure-1'), {}, {'version': 1})
+    cache.store('scenario', ('problem-2', 'structure-1'), {}, {'version': 2})
+    cache.store('scenario', ('problem-3', 'structure-2'), {}, {'version': 3})
+
+    assert cache.nearest('scenario', ('problem-4', 'structure-1'))['payload'] == {'version': 2}
+    # The exact problem is not its own near hit
+    assert cache.nearest('scenario', ('problem-3', 'structure-2')) is None
+    assert cache.nearest('what_if', ('problem-4', 'structure-1')) is None
+    assert cache.stats()['scenario'][NEAR_HIT] == 1
+
+
+def test_least_recently_used_entries_are_evicted_past_max_entries(tmp_path):
+    cache = _cache(tmp_path, max_entries=2)
+    cache.store('scenario', ('p1', 's'), {}, 1)
+    cache.store('scenario', ('p2', 's'), {}, 2)
+    # Using p1 makes p2 the least recently used
+    assert cache.lookup('scenario', ('p1', 's'))['payload'] == 1
+    cache.store('scenario', ('p3', 's'), {}, 3)
+
+    assert cache.lookup('scenario', ('p2', 's')) is None
+    assert [cache.lookup('scenario', (key, 's'))['payload'] for key in ('p1', 'p3')] == [1, 3]
+    assert cache.stats()['scenario']['entries'] == 2
+
+    cache.clear()
+    assert cache.stats() == {}
+
+
+def test_a_pickled_cache_reconnects_to_the_same_file(tmp_path):
+    cache = _cache(tmp_path, keep_models=True)
+    cache.store('scenario', ('p1', 's'), {}, 1, model_proto=b'model')
+    copy = pickle.loads(pickle.dumps(cache))
+    assert copy.lookup('scenario', ('p1', 's'))['payload'] == 1
+    assert copy.stats()['scenario']['model_bytes'] > 0
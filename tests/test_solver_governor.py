@@ -0,0 +1,84 @@
+# tests/test_solver_governor.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.scheduler.solver_governor import SolverGovernor
+
+
+def test_grants_scale_down_to_the_free_threads():
+    governor = SolverGovernor(cores=8)
+    first = governor.acquire('first', 6)
+    second = governor.acquire('second', 6)
+    assert (first.threads, second.threads) == (6, 2)
+    assert governor.try_acquire('third') is None
+    assert governor.allocations()['free'] == 0
+
+    first.release()
+    first.release()  # a second release is ignored
+    assert governor.allocations()['allocated'] == 2
+    with governor.try_acquire('third', 4) as third:
+        assert third.threads == 4
+    assert governor.allocations()['allocated'] == 2
+
+
+def test_min_threads_makes_a_solve_wait_instead_of_shrinking():
+    governor = SolverGovernor(cores=4)
+    held = governor.acquire('held', 3)
+    assert governor.try_acquire('big', 4, min_threads=2) is None
+    with pytest.raises(TimeoutError):
+        governor.acquire('big', 4, min_threads=2, timeout=0.05)
+    # min_threads above the whole budget is capped at the budget
+    held.release()
+    assert governor.acquire('huge', 16, min_threads=16).threads == 4
+
+
+def test_waiting_solves_are_served_first_come_first_served():
+    governor = SolverGovernor(cores=2)
+    held = governor.acquire('held', 2)
+    order = []
+
+    def wait_for(name):
+        grant = governor.acquire(name, 2)
+        order.append(name)
+        grant.release()
+
+    threads = []
+    for name in ('a', 'b', 'c'):
+        thread = threading.Thread(target=wait_for, args=(name,))
+        thread.start()
+        threads.append(thread)
+        while len(governor.allocations()['waiting']) < len(threads):
+            time.sleep(0.005)
+    # Nobody jumps the queue while solves are waiting
+    assert governor.try_acquire('jumper', 1) is None
+
+    held.release()
+    for thread in threads:
+        thread.join(5)
+    assert order == ['a', 'b', 'c']
+
+
+def test_submit_runs_with_the_granted_threads_and_releases_them():
+    governor = SolverGovernor(cores=4)
+    granted, released = [], []
+    governor.on_grant(granted.append)
+    governor.on_grant(granted.append)
+    governor.on_release(lambda: released.append(1))
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        ok = governor.submit(executor, 'ok', lambda x, num_workers: (x, num_workers), 'x', requested=3)
+        assert ok.result(5) == ('x', 3)
+
+        def fail(num_workers):
+            raise RuntimeError('boom')
+        failed = governor.submit(executor, 'fail', fail)
+        with pytest.raises(RuntimeError):
+            failed.result(5)
+
+    assert [grant.name for grant in granted] == ['ok', 'fail']
+    assert len(released) == 2
+    assert governor.allocations()['allocated'] == 0
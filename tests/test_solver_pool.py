@@ -0,0 +1,106 @@
+# tests/test_solver_pool.py
+
+import time
+
+from src import solver_pool
+from src.event_bus import EventBus
+from src.job_runner import DONE, PENDING, RUNNING
+from src.scheduler.solver_governor import SolverGovernor
+
+
+# Job functions run in spawned processes, so they live at module level
+def double(value, num_workers):
+    return value * 2, num_workers
+
+
+def sleep_for(seconds, num_workers):
+    time.sleep(seconds)
+    return seconds
+
+
+def _pool(cores=4, max_concurrent=1, governor=None):
+    return solver_pool.SolverPool(max_concurrent=max_concurrent, cores=cores,
+                                  governor=governor or SolverGovernor(cores=cores), events=EventBus())
+
+
+def _wait_for(pool, job_id, statuses, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = pool.status(job_id)
+        if job['status'] in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} stayed {pool.status(job_id)['status']}")
+
+
+def test_a_job_runs_in_a_child_process_with_the_granted_threads():
+    pool = _pool()
+    done = []
+    job_id, deduplicated = pool.submit('a', double, args=lambda: (21,), on_done=done.append)
+    assert not deduplicated
+    job = _wait_for(pool, job_id, solver_pool.FINISHED)
+    assert job['status'] == DONE and job['result'] is None
+    assert done == [(42, 4)] and job['num_workers'] == 4
+    assert pool.load()['threads_granted'] == 0
+
+
+def test_identical_pending_and_running_jobs_are_deduplicated():
+    pool = _pool()
+    running, _ = pool.submit('slow', sleep_for, args=(30,))
+    pending, _ = pool.submit('next', double, args=(1,))
+    built = []
+    assert pool.submit('slow', sleep_for, args=lambda: built.append(1) or (30,)) == (running, True)
+    assert pool.submit('next', double, args=(1,)) == (pending, True)
+    # The arguments of a duplicate are never built
+    assert built == []
+    assert pool.status(pending)['queue_position'] == 1
+
+    assert pool.cancel_where(lambda key: True) == [running, pending]
+    _wait_for(pool, running, solver_pool.FINISHED)
+    # A finished key can be submitted again
+    assert pool.submit('next', double, args=(1,))[1] is False
+
+
+def test_cancelling_pending_and_running_jobs():
+    pool = _pool()
+    running, _ = pool.submit('running', sleep_for, args=(30,))
+    pending, _ = pool.submit('pending', double, args=(1,))
+    assert pool.status(running)['status'] == RUNNING and pool.status(pending)['status'] == PENDING
+
+    assert pool.cancel(pending)
+    assert pool.status(pending)['status'] == solver_pool.CANCELLED
+    assert pool.cancel(running)
+    assert pool.status(running)['status'] == solver_pool.CANCELLED
+    # The watcher records the end and frees the threads once the process is gone
+    deadline = time.time() + 30
+    while pool.load()['running'] and time.time() < deadline:
+        time.sleep(0.02)
+    job = pool.status(running)
+    assert job['finished_at'] and job['error'] is None and job['result'] is None
+    assert pool.load() == {'running': 0, 'pending': 0, 'max_concurrent': 1, 'threads_per_job': 4,
+                           'threads_granted': 0}
+    assert not pool.cancel(running) and not pool.cancel('missing')
+
+
+def test_a_job_starts_only_once_the_governor_grants_threads():
+    governor = SolverGovernor(cores=4)
+    held = governor.acquire('another solve', 4)
+    pool = _pool(governor=governor)
+    job_id, _ = pool.submit('a', double, args=(1,))
+    assert pool.status(job_id)['status'] == PENDING
+
+    # Releasing the threads starts the queued job with what the governor can spare
+    held.release()
+    job = _wait_for(pool, job_id, solver_pool.FINISHED)
+    assert job['status'] == DONE and job['result'] == (2, 4)
+
+
+def test_only_the_newest_finished_jobs_are_kept(monkeypatch):
+    monkeypatch.setattr(solver_pool, 'KEEP_FINISHED', 2)
+    pool = _pool()
+    held = pool.governor.acquire('held', 4)
+    job_ids = [pool.submit(f'job {i}', double, args=(i,))[0] for i in range(4)]
+    for job_id in job_ids:
+        pool.cancel(job_id)
+    held.release()
+    assert [job['id'] for job in pool.status()] == job_ids[-2:]
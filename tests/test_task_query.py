@@ -0,0 +1,96 @@
+# tests/test_task_query.py
+
+import copy
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src import task_query
+
+ORIGIN = datetime(2025, 9, 1, 6, 0)
+
+
+def _result(count=23):
+    rows = []
+    for i in range(count):
+        start = ORIGIN + timedelta(hours=3 * i)
+        rows.append({'taskId': f'T{i:03d}', 'priority': (i * 7) % 11, 'startTime': start.isoformat(),
+                     'endTime': (start + timedelta(hours=2)).isoformat(), 'duration': 120,
+                     'slackHours': None if i % 5 == 0 else float(i), 'product': f'P{i % 3}',
+                     'team': 'Mech', 'teamSkill': f'Mech ({i % 2})', 'skill': str(i % 2), 'type': 'Production',
+                     'criticality': 'CRITICAL' if i % 4 == 0 else 'NORMAL', 'isCritical': i % 4 == 0})
+    return {'allTasks': rows}
+
+
+def _walk(index, limit, **kwargs):
+    """Every row reached by following nextCursor from the first page."""
+    seen, cursor = [], None
+    while True:
+        page = index.query(limit=limit, cursor=cursor, **kwargs)
+        assert len(page['tasks']) <= limit
+        seen.extend(row['taskId'] for row in page['tasks'])
+        cursor = page['nextCursor']
+        if cursor is None:
+            return seen, page['total']
+
+
+@pytest.mark.parametrize('sort', sorted(task_query.SORT_FIELDS))
+@pytest.mark.parametrize('descending', [False, True])
+def test_cursor_pages_cover_the_sorted_rows_exactly_once(sort, descending):
+    index = task_query.TaskIndex(_result())
+    seen, total = _walk(index, 4, sort=sort, descending=descending)
+    everything = index.query(limit=1000, sort=sort, descending=descending)['tasks']
+    assert seen == [row['taskId'] for row in everything]
+    assert total == len(seen) == 23
+
+
+def test_filters_and_windows_page_through_matching_rows_only():
+    index = task_query.TaskIndex(_result())
+    seen, total = _walk(index, 2, filters={'product': ['P1', 'P2'], 'critical': ['true']}, sort='start')
+    expected = [f'T{i:03d}' for i in range(23) if i % 3 != 0 and i % 4 == 0]
+    assert seen == expected and total == len(expected)
+
+    page = index.query(window_start=ORIGIN + timedelta(hours=7), window_end=ORIGIN + timedelta(hours=12),
+                       sort='start')
+    # T002 ends at 8:00 after the window opens; T004 starts at 12:00, when it closes
+    assert [row['taskId'] for row in page['tasks']] == ['T002', 'T003']
+
+
+def test_cursor_is_rejected_after_a_republish_or_for_another_sort():
+    result = _result()
+    index = task_query.TaskIndex(result)
+    cursor = index.query(limit=5, sort='priority')['nextCursor']
+    with pytest.raises(task_query.CursorError):
+        index.query(limit=5, sort='start', cursor=cursor)
+
+    republished = copy.deepcopy(result)
+    republished['allTasks'][7]['priority'] = 99
+    with pytest.raises(task_query.CursorError):
+        task_query.TaskIndex(republished).query(limit=5, sort='priority', cursor=cursor)
+    # Any sortable value changing gives a new version; the same rows give the same one
+    assert task_query.TaskIndex(result).version == index.version
+    assert task_query.TaskIndex(republished).version != index.version
+
+
+def test_bad_parameters_raise_value_error():
+    index = task_query.TaskIndex(_result())
+    for kwargs in ({'limit': 'abc'}, {'sort': 'colour'}, {'filters': {'colour': ['red']}}, {'cursor': '!!!'}):
+        with pytest.raises(ValueError):
+            index.query(**kwargs)
+    assert len(index.query(limit=0)['tasks']) == 1
+
+
+def test_index_is_rebuilt_only_for_a_new_result():
+    indexes, result = {}, _result()
+    index = task_query.index_for(indexes, 'baseline', result)
+    assert task_query.index_for(indexes, 'baseline', result) is index
+    assert task_query.index_for(indexes, 'baseline', _result()) is not index
+
+
+def test_windows_with_a_timezone_are_read_as_local_time():
+    index = task_query.TaskIndex(_result())
+    local_start = (ORIGIN + timedelta(hours=7)).astimezone()
+    local_end = (ORIGIN + timedelta(hours=12)).astimezone()
+    page = index.query(window_start=local_start.astimezone(timezone.utc),
+                       window_end=datetime.fromisoformat(local_end.isoformat()), sort='start')
+    assert [row['taskId'] for row in page['tasks']] == ['T002', 'T003']
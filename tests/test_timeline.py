@@ -0,0 +1,113 @@
+# tests/test_timeline.py
+
+from datetime import datetime
+
+from src.scheduler import timeline, validation
+
+
+# Which end of each task a relationship ties together: (first's, second's)
+_RELATION_ENDS = {
+    'Finish <= Start': ('end_time', 'start_time'),
+    'Finish = Start': ('end_time', 'start_time'),
+    'Finish <= Finish': ('end_time', 'end_time'),
+    'Start <= Start': ('start_time', 'start_time'),
+    'Start = Start': ('start_time', 'start_time'),
+    'Start <= Finish': ('start_time', 'end_time'),
+}
+
+
+class _Calendar:
+    """Calendar over fixed (start, end, shift) windows."""
+
+    def __init__(self, windows):
+        self.windows = windows
+
+    def window_after(self, minute):
+        return next((w for w in self.windows if w[1] > minute), None)
+
+    def windows_before(self, minute):
+        return reversed([w for w in self.windows if w[0] < minute])
+
+
+def test_reserve_and_release_keep_a_step_function():
+    line = timeline.CapacityTimeline(3)
+    line.reserve(10, 20, 2)
+    line.reserve(15, 30, 1)
+    assert [line.usage_at(t) for t in (0, 10, 15, 20, 29, 30)] == [0, 2, 3, 1, 1, 0]
+    assert line.peak_usage(0, 100) == 3
+    assert line.peak_usage(20, 100) == 1
+    line.release(15, 30, 1)
+    assert line.peak_usage(0, 100) == 2
+    assert line.usage_at(25) == 0
+
+
+def test_earliest_fit_skips_full_segments():
+    line = timeline.CapacityTimeline(2)
+    line.reserve(10, 20, 2)
+    line.reserve(25, 40, 1)
+    assert line.earliest_fit(0, 10, 1) == 0
+    assert line.earliest_fit(5, 10, 1) == 20
+    assert line.earliest_fit(5, 10, 2) == 40
+    assert line.earliest_fit(5, 10, 2, latest_start=30) is None
+    assert line.earliest_fit(0, 10, 3) is None
+
+
+def test_latest_fit_walks_back_over_full_segments():
+    line = timeline.CapacityTimeline(1)
+    line.reserve(50, 60, 1)
+    assert line.latest_fit(55, 10, 1, earliest_start=0) == 40
+    assert line.latest_fit(70, 10, 1, earliest_start=0) == 70
+    assert line.latest_fit(55, 10, 1, earliest_start=45) is None
+
+
+def test_find_slot_stays_inside_one_window_on_quarter_hours():
+    calendar = _Calendar([(0, 120, 'Day'), (1440, 1560, 'Day')])
+    line = timeline.CapacityTimeline(1)
+    line.reserve(0, 70, 1)
+    # 70 rounds up to 75, and 75 + 60 overruns the first window
+    assert timeline.find_slot([line], calendar, 0, 60, 1) == (1440, 'Day')
+    assert timeline.find_slot([line], calendar, 0, 45, 1) == (75, 'Day')
+    # Every timeline must have room at the same start
+    other = timeline.CapacityTimeline(1)
+    other.reserve(1440, 1500, 1)
+    assert timeline.find_slot([line, other], calendar, 0, 60, 1) == (1500, 'Day')
+    assert timeline.find_slot([line], calendar, 0, 200, 1) == (None, None)
+
+
+def test_find_latest_slot_ends_by_the_deadline():
+    calendar = _Calendar([(0, 120, 'Day'), (1440, 1560, 'Day')])
+    line = timeline.CapacityTimeline(1)
+    line.reserve(60, 120, 1)
+    assert timeline.find_latest_slot([line], calendar, 1500, 0, 30, 1) == (1470, 'Day')
+    assert timeline.find_latest_slot([line], calendar, 1450, 0, 30, 1) == (30, 'Day')
+    assert timeline.find_latest_slot([line], calendar, 1450, 40, 30, 1) == (None, None)
+
+
+def test_team_calendar_windows_are_ordered_working_time(scheduler):
+    task = next(iter(scheduler.tasks.values()))
+    team, product = task['team_skill'], task['product']
+    calendar = timeline.TeamCalendar(scheduler, team, product, scheduler.start_date)
+    window = calendar.window_after(0)
+    previous_end = None
+    for _ in range(40):
+        start, end, _shift = window
+        assert start < end
+        assert previous_end is None or start >= previous_end
+        previous_end = end
+        window = calendar.window_after(end)
+
+
+def test_serial_sgs_places_every_task_within_capacity_and_precedence(scheduled):
+    assert set(scheduled.task_schedule) == set(scheduled.tasks)
+    assert not validation.check_resource_conflicts(scheduled)
+    for constraint in scheduled.build_dynamic_dependencies():
+        first = scheduled.task_schedule.get(constraint['First'])
+        second = scheduled.task_schedule.get(constraint['Second'])
+        if first is None or second is None:
+            continue
+        first_end, second_end = _RELATION_ENDS.get(constraint['Relationship'], ('end_time', 'start_time'))
+        assert first[first_end] <= second[second_end], constraint
+    for entry in scheduled.task_schedule.values():
+        assert entry['start_time'] >= scheduled.start_date
+        assert entry['start_time'].minute % timeline.SLOT_GRANULARITY == 0
+        assert entry['end_time'] < datetime(2031, 1, 1)